@@ -1,3 +1,27 @@
 """agent-pack: AI agent configuration manager."""
 
 __version__ = "0.1.0"
+
+
+def main() -> None:
+    """Console entry point.
+
+    ``--version`` is answered without importing the CLI module (and with it typer
+    and click), and so are commands relayed to a running `agentpack serve`;
+    everything else is handed to the typer app.
+    """
+    import sys
+
+    if sys.argv[1:] == ["--version"]:
+        print(f"agentpack {__version__}")
+        return
+
+    from agent_pack.serve import delegate
+
+    code = delegate(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from agent_pack.cli import app
+
+    app()
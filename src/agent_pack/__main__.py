@@ -1,5 +1,5 @@
 """Allow running as `python -m agent_pack`."""
 
-from agent_pack.cli import app
+from agent_pack import main
 
-app()
+main()
@@ -0,0 +1,1010 @@
+"""In-process Python API: the commands behind the CLI, returning structured results.
+
+Every function takes a project root and options, does its work without echoing
+anything and returns a result object. Problems that stop a command raise
+:class:`AgentpackError`; per-file and per-remote outcomes are reported in the
+result. The typer CLI is a thin layer that prints these results.
+
+    from agent_pack import api
+
+    result = api.generate(Path("."), jobs=4)
+    print(result.written, result.deleted)
+"""
+
+import contextlib
+import os
+import posixpath
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar, Union
+
+from agent_pack.artifacts import (
+    AGENTPACK_DIR,
+    MARKER_PREFIX,
+    SKILL,
+    Artifact,
+    ArtifactSet,
+    load_artifacts,
+    load_yaml,
+)
+from agent_pack.check import CheckResult, check_outputs
+from agent_pack.filesync import ASSET_MODES, COPY, sync_tree, write_atomic
+from agent_pack.lint import LINT_FILE, LintResult, lint_artifacts
+from agent_pack.manifest import (
+    STATE_FILE,
+    Manifest,
+    hash_bytes,
+    matches_stat,
+    tree_signature,
+)
+from agent_pack.paths import (
+    INDEX_FILE,
+    PathIndex,
+    load_index,
+    relative_paths,
+    save_index,
+)
+from agent_pack.stats import (
+    STATS_FILE,
+    AgentStats,
+    StatsCache,
+    StatsResult,
+    output_stats,
+    over_budget,
+    parse_budget,
+)
+from agent_pack.timings import record_read, record_written, span, traced
+
+__all__ = [
+    "AgentpackError",
+    "CheckResult",
+    "DedupeResult",
+    "GenerateResult",
+    "LintResult",
+    "Output",
+    "PackResult",
+    "Result",
+    "StatsResult",
+    "SyncResult",
+    "bundle_index",
+    "check",
+    "dedupe",
+    "generate",
+    "init",
+    "lint",
+    "pack",
+    "stats",
+    "sync",
+    "unpack",
+    "watch",
+    "which",
+]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+WRITTEN = "written"
+UNCHANGED = "unchanged"
+SKIPPED = "skipped"
+
+DEFAULT_CONFIG = """\
+agents: [claude, cursor]
+gitignore: true
+"""
+
+DEFAULT_CLAUDE_MD = """\
+---
+description: Main project instructions for AI agents
+alwaysApply: true
+---
+
+# Project Instructions
+
+<!-- Add your project-specific instructions here.
+     This file maps to CLAUDE.md (when claude agent is configured)
+     or AGENTS.md (when cursor-only) at the project root,
+     when you run `agentpack generate`. -->
+"""
+
+
+class AgentpackError(Exception):
+    """A command cannot run, e.g. the project is not initialized or misconfigured."""
+
+
+@dataclass
+class Result:
+    """Files a command touched, as paths relative to the project root.
+
+    ``skipped`` lists files left alone because they were modified outside
+    agentpack; ``warnings`` holds any other messages for the user.
+    """
+
+    root: Path
+    written: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class Output:
+    """One planned output of `generate` and what happened to it."""
+
+    agent: str
+    path: str
+    source: str
+    status: str
+
+
+@dataclass
+class GenerateResult(Result):
+    """Result of :func:`generate`; ``outputs`` is in plan order, per agent."""
+
+    agents: list[str] = field(default_factory=list)
+    outputs: list[Output] = field(default_factory=list)
+    gitignore: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SyncResult(Result):
+    """Result of :func:`sync`, with one :class:`~agent_pack.remotes.FetchResult`
+    per remote, in configuration order.
+    """
+
+    remotes: list = field(default_factory=list)
+    inherit: bool = False
+
+    @property
+    def failed(self) -> list:
+        return [r for r in self.remotes if not r.ok]
+
+
+@dataclass
+class PackResult(Result):
+    """Result of :func:`pack`: the bundle written, its SHA-256 and the
+    :class:`~agent_pack.bundle.BundleEntry` of every file it holds.
+    """
+
+    bundle: Optional[Path] = None
+    sha256: str = ""
+    entries: list = field(default_factory=list)
+
+
+@dataclass
+class DedupeResult(Result):
+    """Result of :func:`dedupe`, with the
+    :class:`~agent_pack.dedupe.DuplicateGroup` found, largest saving first.
+    """
+
+    groups: list = field(default_factory=list)
+
+
+# Parsed sources per root, kept between calls inside :func:`caching`.
+_caches: Optional[dict[Path, dict]] = None
+
+
+@contextlib.contextmanager
+def caching() -> Iterator[None]:
+    """Keep every root's parsed sources in memory between calls in the block.
+
+    :func:`generate`, :func:`check` and :func:`which` then re-read only sources
+    whose size or mtime changed since the previous call for the same root, as
+    `agentpack serve` needs. Calls on the same root must not overlap.
+    """
+    global _caches
+    previous, _caches = _caches, {}
+    try:
+        yield
+    finally:
+        _caches = previous
+
+
+def _source_cache(root: Path, cache: Optional[dict]) -> Optional[dict]:
+    if cache is None and _caches is not None:
+        cache = _caches.setdefault(root, {})
+    return cache
+
+
+def _ap_dir(root: Path) -> Path:
+    ap_dir = root / AGENTPACK_DIR
+    if not ap_dir.exists():
+        raise AgentpackError("Not initialized. Run `agentpack init` first.")
+    return ap_dir
+
+
+# ---------------------------------------------------------------------------
+# Init
+# ---------------------------------------------------------------------------
+
+
+def init(root: Path) -> Result:
+    """Bootstrap ``.agentpack/`` with a starter config and main instructions file."""
+    root = root.resolve()
+    ap_dir = root / AGENTPACK_DIR
+
+    if ap_dir.exists():
+        raise AgentpackError(f"Already initialized: {ap_dir}")
+
+    rules_dir = ap_dir / "rules"
+    skills_dir = ap_dir / "skills"
+
+    rules_dir.mkdir(parents=True)
+    skills_dir.mkdir(parents=True)
+
+    (ap_dir / "agentpack.yaml").write_text(DEFAULT_CONFIG)
+    (rules_dir / "CLAUDE.md").write_text(DEFAULT_CLAUDE_MD)
+    return Result(
+        root,
+        written=[f"{AGENTPACK_DIR}/agentpack.yaml", f"{AGENTPACK_DIR}/rules/CLAUDE.md"],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Configuration and sources
+# ---------------------------------------------------------------------------
+
+
+@traced("load config")
+def load_config(ap_dir: Path) -> dict:
+    config_path = ap_dir / "agentpack.yaml"
+    if not config_path.exists():
+        raise AgentpackError(f"Config not found: {config_path}")
+    text = config_path.read_text()
+    record_read(len(text))
+    return load_yaml(text) or {}
+
+
+def _generation_settings(config: dict) -> tuple[list, str]:
+    """Validated ``agents`` and ``assets`` settings of ``agentpack.yaml``."""
+    agents = config.get("agents", [])
+    assets = config.get("assets", COPY)
+
+    if not agents:
+        raise AgentpackError("No agents configured in agentpack.yaml")
+
+    if assets not in ASSET_MODES:
+        raise AgentpackError(
+            f"Invalid assets mode in agentpack.yaml: {assets!r} "
+            f"(expected one of: {', '.join(ASSET_MODES)})"
+        )
+    return agents, assets
+
+
+def _resolve_hierarchy(
+    root: Path,
+    ap_dir: Path,
+    config: dict,
+    cache: Optional[dict],
+    warnings: list,
+    packs: list,
+) -> ArtifactSet:
+    """Layer user, parent-project and synced remote packs with the repo pack."""
+    from agent_pack.hierarchy import resolve_artifacts, resolve_levels
+
+    try:
+        levels, missing = resolve_levels(root, ap_dir, config)
+    except ValueError as exc:
+        raise AgentpackError(f"Invalid remotes in agentpack.yaml: {exc}") from exc
+    for name in missing:
+        warnings.append(
+            f"WARN: remote '{name}' is not in the cache. Run `agentpack sync`."
+        )
+    packs += [level.pack for level in levels]
+    return resolve_artifacts(levels, cache)
+
+
+@traced("load sources")
+def _load_sources(
+    root: Path,
+    ap_dir: Path,
+    config: dict,
+    cache: Optional[dict],
+    warnings: list,
+    packs: Optional[list] = None,
+) -> ArtifactSet:
+    """The effective artifacts of ``root``, layered when ``inherit`` is set.
+
+    The pack directories read are appended to ``packs``, if given.
+    """
+    packs = [] if packs is None else packs
+    if config.get("inherit", False):
+        return _resolve_hierarchy(root, ap_dir, config, cache, warnings, packs)
+    packs.append(ap_dir)
+    return load_artifacts(ap_dir, cache)
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+
+@traced("plan claude")
+def _generate_claude(root: Path, artifacts: ArtifactSet) -> list[tuple[Path, Artifact]]:
+    """Plan Claude outputs as ``(output path, artifact)`` pairs."""
+    plan = []
+    if artifacts.main:
+        plan.append((root / "CLAUDE.md", artifacts.main))
+
+    for rule in artifacts.rules:
+        plan.append((root / ".claude" / "rules" / rule.name, rule))
+
+    for skill in artifacts.skills:
+        plan.append((root / ".claude" / "skills" / skill.name / "SKILL.md", skill))
+    return plan
+
+
+@traced("plan cursor")
+def _generate_cursor(
+    root: Path, artifacts: ArtifactSet, agents: list
+) -> list[tuple[Path, Artifact]]:
+    """Plan Cursor outputs as ``(output path, artifact)`` pairs."""
+    plan = []
+    # When cursor-only: generate AGENTS.md at project root (stripped of frontmatter).
+    # When claude is also present, CLAUDE.md at root is recognised by Cursor natively.
+    if "claude" not in agents and artifacts.main:
+        plan.append((root / "AGENTS.md", artifacts.main))
+
+    # Modular rules — CLAUDE.md is handled above, never goes into .cursor/rules/
+    for rule in artifacts.rules:
+        plan.append((root / ".cursor" / "rules" / rule.name, rule))
+
+    if "claude" not in agents:
+        for skill in artifacts.skills:
+            plan.append((root / ".cursor" / "skills" / skill.name / "SKILL.md", skill))
+    return plan
+
+
+def _plan_sections(
+    root: Path, artifacts: ArtifactSet, agents: list
+) -> list[tuple[str, list[tuple[Path, Artifact]]]]:
+    """Planned outputs per configured agent, in generation order."""
+    sections = []
+    if "claude" in agents:
+        sections.append(("claude", _generate_claude(root, artifacts)))
+    if "cursor" in agents:
+        sections.append(("cursor", _generate_cursor(root, artifacts, agents)))
+    return sections
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def _has_marker(content: str) -> bool:
+    return MARKER_PREFIX in content
+
+
+def _write_generated(
+    out: Path,
+    content: str,
+    force: bool,
+    root: Path,
+    manifest: Manifest,
+    source_rel: str,
+    digest: Optional[str] = None,
+) -> str:
+    """Write a generated file with overwrite protection.
+
+    Returns ``WRITTEN``, ``UNCHANGED`` when the file already holds exactly this
+    content and is left untouched, or ``SKIPPED`` when an unmarked file is in the
+    way. Real changes replace the file atomically, so readers never see a partial
+    write.
+    """
+    rel = out.relative_to(root).as_posix()
+    data = content.encode("utf-8")
+    digest = digest or hash_bytes(data)
+    if manifest.is_current(rel, digest, out):
+        manifest.record(rel, source_rel, digest, out)
+        return UNCHANGED
+    if out.exists():
+        existing = out.read_bytes()
+        record_read(len(existing))
+        if existing == data:
+            manifest.record(rel, source_rel, digest, out)
+            return UNCHANGED
+        if not _has_marker(existing.decode("utf-8", errors="ignore")) and not force:
+            return SKIPPED
+    write_atomic(out, data)
+    manifest.record(rel, source_rel, digest, out)
+    return WRITTEN
+
+
+def _write_output(
+    out: Path,
+    artifact: Artifact,
+    force: bool,
+    root: Path,
+    manifest: Manifest,
+    assets: str = COPY,
+) -> str:
+    """Write one planned output and return its status.
+
+    Skills also get their supplementary directories copied.
+    """
+    with span("render and write"):
+        status = _write_generated(
+            out,
+            artifact.rendered,
+            force,
+            root,
+            manifest,
+            artifact.source_rel,
+            artifact.rendered_hash,
+        )
+    if artifact.kind == SKILL:
+        _copy_supplementary(artifact, out.parent, root, manifest, assets)
+    return status
+
+
+def _run_parallel(fn: Callable[[T], R], items: list[T], jobs: int) -> list[R]:
+    """Apply ``fn`` to ``items`` on up to ``jobs`` threads, preserving input order."""
+    if jobs <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+@traced("copy supplementary")
+def _copy_supplementary(
+    skill: Artifact,
+    skill_out: Path,
+    root: Path,
+    manifest: Manifest,
+    assets: str = COPY,
+) -> None:
+    """Copy supplementary directories (scripts/, references/, assets/, etc.) alongside SKILL.md.
+
+    Directories whose source and destination trees are unchanged since the last run
+    are skipped; otherwise only files that differ are copied or deleted. ``assets``
+    selects whether files are copied, hardlinked, reflinked or symlinked.
+    """
+    for child in skill.supplementary:
+        dest = skill_out / child.name
+        rel = dest.relative_to(root).as_posix()
+        source_sig = tree_signature(child)
+        if not manifest.dir_is_current(rel, source_sig, dest, assets):
+            sync_tree(child, dest, assets)
+        source_rel = f"{posixpath.dirname(skill.source_rel)}/{child.name}"
+        manifest.record_dir(rel, source_rel, source_sig, dest, assets)
+
+
+# ---------------------------------------------------------------------------
+# Cleanup
+# ---------------------------------------------------------------------------
+
+
+def _file_has_marker(f: Path) -> bool:
+    try:
+        text = f.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return False
+    record_read(len(text))
+    return _has_marker(text)
+
+
+def _remove_owned(f: Path, root: Path) -> bool:
+    """Delete an owned file and any directories left empty up to ``root``."""
+    try:
+        f.unlink()
+    except OSError:
+        return False
+    parent = f.parent
+    while parent != root and parent.is_relative_to(root):
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+    return True
+
+
+@traced("cleanup")
+def _cleanup_stale_generated(root: Path, agents: list, manifest: Manifest) -> list:
+    """Delete agentpack-generated files that the current run did not produce.
+
+    With a ledger from a previous run, only the files it lists are considered, and a
+    file is read only if its stat changed since it was written. Without one, output
+    locations are scanned for the agentpack marker. Returns the removed paths.
+    """
+    if manifest.has_ledger:
+        return _cleanup_owned(root, manifest)
+    return _cleanup_marked(root, agents, set(manifest.outputs))
+
+
+def _cleanup_owned(root: Path, manifest: Manifest) -> list:
+    """Delete stale files listed in the manifest ledger."""
+    removed = []
+    for rel, entry in manifest.stale_outputs():
+        f = root / rel
+        if matches_stat(f, entry.get("size"), entry.get("mtime_ns")):
+            if _remove_owned(f, root):
+                removed.append(rel)
+        elif _file_has_marker(f):
+            # Touched since it was written, but still carries the marker.
+            if _remove_owned(f, root):
+                removed.append(rel)
+
+    for rel, entry in manifest.stale_dirs():
+        for name, (size, mtime_ns) in entry.get("files", {}).items():
+            f = root / rel / name
+            # Supplementary files carry no marker; modified ones are left to the user.
+            # Symlinks point back into .agentpack/ and are always ours to remove.
+            if f.is_symlink() or matches_stat(f, size, mtime_ns):
+                if _remove_owned(f, root):
+                    removed.append(f"{rel}/{name}")
+    return removed
+
+
+def _marked_files(root: Path, agents: list) -> Iterator[Path]:
+    """Yield files carrying the agentpack marker in the output locations."""
+    # Root-level files are always included regardless of current agent config, so
+    # that switching agents (e.g. removing claude) removes stale CLAUDE.md.
+    for filename in ("CLAUDE.md", "AGENTS.md"):
+        f = root / filename
+        if f.exists() and _file_has_marker(f):
+            yield f
+
+    dirs_to_scan = []
+    if "claude" in agents:
+        dirs_to_scan.append(root / ".claude")
+    if "cursor" in agents:
+        dirs_to_scan.append(root / ".cursor" / "rules")
+        dirs_to_scan.append(root / ".cursor" / "skills")
+
+    for scan_dir in dirs_to_scan:
+        if not scan_dir.exists():
+            continue
+        for f in scan_dir.rglob("*"):
+            if f.is_file() and _file_has_marker(f):
+                yield f
+
+
+def _cleanup_marked(root: Path, agents: list, keep: set) -> list:
+    """Delete marked files that are not in ``keep`` by scanning output locations.
+
+    ``keep`` holds root-relative paths of outputs generated or found up to date
+    during this run.
+    """
+    removed = []
+    for f in list(_marked_files(root, agents)):
+        rel = f.relative_to(root).as_posix()
+        if rel not in keep:
+            f.unlink(missing_ok=True)
+            removed.append(rel)
+    return removed
+
+
+@traced("update gitignore")
+def _update_gitignore(root: Path, agents: list) -> list[str]:
+    """Add generated paths to ``.gitignore``; return the entries added."""
+    gitignore = root / ".gitignore"
+    entries = []
+    if "claude" in agents:
+        entries.append("CLAUDE.md")
+        entries.append(".claude/")
+    if "cursor" in agents:
+        entries.append(".cursor/")
+    if "cursor" in agents and "claude" not in agents:
+        entries.append("AGENTS.md")
+    entries.append(f"{AGENTPACK_DIR}/{STATE_FILE}")
+    entries.append(f"{AGENTPACK_DIR}/{INDEX_FILE}")
+    entries.append(f"{AGENTPACK_DIR}/{STATS_FILE}")
+    entries.append(f"{AGENTPACK_DIR}/{LINT_FILE}")
+
+    existing = gitignore.read_text() if gitignore.exists() else ""
+    record_read(len(existing))
+    lines = existing.splitlines()
+
+    added = []
+    for entry in entries:
+        if entry not in lines:
+            lines.append(entry)
+            added.append(entry)
+
+    if added:
+        text = "\n".join(lines) + "\n"
+        gitignore.write_text(text)
+        record_written(len(text))
+    return added
+
+
+# ---------------------------------------------------------------------------
+# Generate and check
+# ---------------------------------------------------------------------------
+
+
+def generate(
+    root: Path,
+    force: bool = False,
+    jobs: Optional[int] = None,
+    cache: Optional[dict] = None,
+) -> GenerateResult:
+    """Compile ``root``'s `.agentpack/` into tool-specific outputs.
+
+    ``jobs`` outputs are written in parallel (default: CPU count). ``cache`` is
+    handed to :func:`~agent_pack.artifacts.load_artifacts` so long-running callers
+    such as ``watch`` re-read only sources whose stat changed since the last call.
+    """
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    config = load_config(ap_dir)
+    agents, assets = _generation_settings(config)
+    cache = _source_cache(root, cache)
+    result = GenerateResult(root)
+    use_gitignore = config.get("gitignore", True)
+
+    with span("load manifest"):
+        manifest = Manifest.load(ap_dir)
+    packs: list[Path] = []
+    artifacts = _load_sources(root, ap_dir, config, cache, result.warnings, packs)
+    for artifact in artifacts:
+        manifest.add_source(artifact.source_rel, artifact.hash)
+
+    # Every planned output is independent, so all targets share one pool; results
+    # come back in plan order.
+    sections = _plan_sections(root, artifacts, agents)
+    result.agents = [agent for agent, _ in sections]
+    plan = [(agent, o) for agent, outputs in sections for o in outputs]
+    with span("write outputs"):
+        statuses = _run_parallel(
+            lambda o: _write_output(o[1][0], o[1][1], force, root, manifest, assets),
+            plan,
+            jobs or os.cpu_count() or 1,
+        )
+    lists = {WRITTEN: result.written, UNCHANGED: result.unchanged}
+    lists[SKIPPED] = result.skipped
+    for (agent, (out, artifact)), status in zip(plan, statuses):
+        rel = out.relative_to(root).as_posix()
+        result.outputs.append(Output(agent, rel, artifact.source_rel, status))
+        lists[status].append(rel)
+
+    # Stale outputs are removed after generation so that unchanged outputs are never
+    # deleted and rewritten; only files this run did not produce are candidates.
+    result.deleted = _cleanup_stale_generated(root, agents, manifest)
+
+    if use_gitignore:
+        result.gitignore = _update_gitignore(root, agents)
+
+    with span("index paths"):
+        save_index(ap_dir, artifacts, packs)
+    with span("save manifest"):
+        manifest.save()
+    return result
+
+
+def check(root: Path) -> CheckResult:
+    """Report generated outputs of ``root`` that are missing, stale or modified.
+
+    Nothing is written; see :func:`agent_pack.check.check_outputs`.
+    """
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    config = load_config(ap_dir)
+    agents, _ = _generation_settings(config)
+    manifest = Manifest.load(ap_dir)
+    artifacts = _load_sources(root, ap_dir, config, _source_cache(root, None), [])
+    plan = [
+        o for _, outputs in _plan_sections(root, artifacts, agents) for o in outputs
+    ]
+    return check_outputs(root, plan, manifest, _marked_files(root, agents))
+
+
+@dataclass
+class Match:
+    """A rule that applies to a file; ``glob`` is None for always-loaded rules."""
+
+    rule: str
+    source: str
+    glob: Optional[str] = None
+
+
+def which(root: Path, files: list[str]) -> dict[str, Optional[list[Match]]]:
+    """Map each of ``files`` to the rules that apply to it.
+
+    Always-loaded rules come first, then path-scoped rules whose `paths:` globs
+    match. Files outside ``root`` map to None. The index saved by the last
+    `generate` is used while its sources are unchanged; otherwise it is rebuilt
+    in memory, and nothing is written.
+    """
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    index = load_index(ap_dir)
+    if index is None:
+        config = load_config(ap_dir)
+        cache = _source_cache(root, None)
+        index = PathIndex.build(_load_sources(root, ap_dir, config, cache, []))
+    always = [Match(rule.name, rule.source) for rule in index.always]
+    matches: dict[str, Optional[list[Match]]] = {}
+    for name, rel in relative_paths(root, files):
+        if rel is None:
+            matches[name] = None
+            continue
+        scoped = [Match(r.name, r.source, glob) for r, glob in index.match(rel)]
+        matches[name] = always + scoped
+    return matches
+
+
+def stats(root: Path) -> StatsResult:
+    """Approximate token counts of ``root``'s outputs and its always-loaded context.
+
+    Every agent is charged for each artifact it reads, including the ones it picks
+    up from another agent's output (Cursor reads ``CLAUDE.md`` and Claude's skills
+    when both are configured). Violations of the ``budget`` in `agentpack.yaml` are
+    listed in ``over``. Counts are cached per source hash in ``.agentpack/``.
+    """
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    config = load_config(ap_dir)
+    agents, _ = _generation_settings(config)
+    try:
+        budget = parse_budget(config.get("budget"))
+    except ValueError as exc:
+        raise AgentpackError(f"Invalid budget in agentpack.yaml: {exc}") from exc
+    artifacts = _load_sources(root, ap_dir, config, None, [])
+
+    sections = _plan_sections(root, artifacts, agents)
+    outputs: dict[str, dict[str, str]] = {}
+    for agent, plan in sections:
+        for out, artifact in plan:
+            rel = out.relative_to(root).as_posix()
+            outputs.setdefault(artifact.source_rel, {})[agent] = rel
+
+    cache = StatsCache.load(ap_dir)
+    result = StatsResult(budget=budget)
+    for agent, _ in sections:
+        agent_stats = AgentStats(agent)
+        for artifact in artifacts:
+            paths = outputs.get(artifact.source_rel)
+            if paths:
+                rel = paths.get(agent) or next(iter(paths.values()))
+                agent_stats.outputs.append(output_stats(rel, artifact, cache))
+        result.agents.append(agent_stats)
+    cache.save()
+    result.over = over_budget(result.agents, budget)
+    return result
+
+
+def lint(root: Path, jobs: Optional[int] = None) -> LintResult:
+    """Validate the frontmatter of ``root``'s own rules and skills.
+
+    Inherited packs are not linted, and `agentpack.yaml` need not be valid. Files
+    are checked on up to ``jobs`` worker processes and unchanged files are answered
+    from the cache; see :func:`agent_pack.lint.lint_artifacts`.
+    """
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    return lint_artifacts(ap_dir, load_artifacts(ap_dir), jobs)
+
+
+def dedupe(
+    root: Path,
+    threshold: float = 0.8,
+    min_words: int = 12,
+    collapse: bool = False,
+    into: str = "shared.md",
+) -> DedupeResult:
+    """Find paragraphs repeated, nearly verbatim, across ``root``'s rules and skills.
+
+    Blocks of at least ``min_words`` words whose shingle similarity reaches
+    ``threshold`` are grouped. With ``collapse``, duplicates in the local rules
+    are replaced by one copy in the shared rule ``into``; see
+    :func:`agent_pack.dedupe.collapse`.
+    """
+    from agent_pack import dedupe as finder
+
+    if not 0 < threshold <= 1:
+        raise AgentpackError("The threshold must be between 0 and 1.")
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    config = load_config(ap_dir)
+    result = DedupeResult(root)
+    artifacts = _load_sources(root, ap_dir, config, None, result.warnings)
+    result.groups = finder.find_duplicates(artifacts, threshold, min_words)
+    if collapse:
+        written = finder.collapse(ap_dir / "rules", artifacts, result.groups, into)
+        result.written = [f.relative_to(root).as_posix() for f in written]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Watch
+# ---------------------------------------------------------------------------
+
+
+def watch(
+    root: Path,
+    on_pass: Callable[[Union[GenerateResult, AgentpackError]], None],
+    force: bool = False,
+    jobs: Optional[int] = None,
+    debounce: float = 0.2,
+    poll: bool = False,
+    interval: float = 0.5,
+    on_start: Optional[Callable[[str], None]] = None,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Generate ``root``, then regenerate after every burst of source changes.
+
+    ``on_pass`` receives the result of each pass, or the error that stopped it;
+    errors do not stop watching, so a broken configuration can be fixed in place.
+    ``on_start`` receives the watcher's name ("inotify" or "polling") once the first
+    pass is done. Runs until ``stop`` is set; see :mod:`agent_pack.watch` for
+    ``debounce``, ``poll`` and ``interval``.
+    """
+    from agent_pack.watch import open_watcher
+    from agent_pack.watch import watch as watch_sources
+
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    # Parsed artifacts persist across passes; only changed sources are re-read.
+    cache: dict = {}
+
+    def regenerate() -> None:
+        try:
+            result = generate(root, force, jobs, cache)
+        except AgentpackError as exc:
+            on_pass(exc)
+        else:
+            on_pass(result)
+
+    regenerate()
+    watcher = open_watcher(ap_dir, interval, poll)
+    try:
+        if on_start:
+            on_start(watcher.name)
+        watch_sources(watcher, regenerate, debounce, stop)
+    finally:
+        watcher.close()
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+
+def sync(
+    root: Path,
+    remote: Optional[str] = None,
+    jobs: int = 4,
+    timeout: float = 300,
+) -> SyncResult:
+    """Fetch remotes and merge their rules and skills into ``root``'s `.agentpack/`.
+
+    ``remote`` is a configured name or a URL; by default every configured remote is
+    synced. A remote that fails is reported in the result and does not stop the
+    others.
+    """
+    from agent_pack.remotes import (
+        ADDED,
+        KEPT,
+        REMOVED,
+        UPDATED,
+        apply_remote,
+        fetch_all,
+        load_sync_state,
+        merged_revision,
+        remote_checkout,
+        resolve_remotes,
+        save_sync_state,
+    )
+
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    config = load_config(ap_dir)
+    try:
+        remotes = resolve_remotes(config, remote)
+    except KeyError as exc:
+        raise AgentpackError(f"Unknown remote: {remote}") from exc
+    except ValueError as exc:
+        raise AgentpackError(f"Invalid remotes in agentpack.yaml: {exc}") from exc
+    if not remotes:
+        raise AgentpackError("No remotes configured in agentpack.yaml.")
+
+    state = load_sync_state(ap_dir)
+    # Remotes whose merged files are untouched only need a ref query to confirm
+    # that nothing changed upstream.
+    # With `inherit`, remotes are read from their cached checkouts by generate, so
+    # those checkouts must still exist as well.
+    inherit = config.get("inherit", False)
+    known = {}
+    for r in remotes:
+        revision = merged_revision(r, ap_dir, state, inherit)
+        if revision and inherit:
+            checkout = remote_checkout(r, revision)
+            if not checkout.is_dir():
+                continue
+            os.utime(checkout)
+        if revision:
+            known[r.name] = revision
+    result = SyncResult(root, inherit=inherit)
+    result.remotes = fetch_all(remotes, jobs, timeout, known)
+
+    # Merging is sequential and in configuration order, so when two remotes provide
+    # the same rule the outcome does not depend on which fetch finished first.
+    lists = {
+        ADDED: result.written,
+        UPDATED: result.written,
+        REMOVED: result.deleted,
+        KEPT: result.skipped,
+    }
+    for fetched in result.remotes:
+        if not fetched.ok:
+            result.warnings.append(f"{fetched.remote.name}: {fetched.error}")
+            continue
+        if fetched.skipped:
+            continue
+        # Inherited remotes are layered by generate instead of being copied in; any
+        # files merged before `inherit` was enabled are removed.
+        fetched.changes = apply_remote(fetched, ap_dir, state, inherit)
+        for action, rel in fetched.changes:
+            lists[action].append(f"{AGENTPACK_DIR}/{rel}")
+    save_sync_state(ap_dir, state)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Bundles
+# ---------------------------------------------------------------------------
+
+
+def pack(root: Path, output: Optional[Path] = None) -> PackResult:
+    """Pack the rules and skills of ``root``'s `.agentpack/` into a bundle file.
+
+    ``output`` defaults to ``<root name>.agentpack.zip`` in the working directory.
+    """
+    from agent_pack.bundle import BUNDLE_SUFFIX, write_bundle
+
+    root = root.resolve()
+    ap_dir = _ap_dir(root)
+    out = (output or Path.cwd() / f"{root.name}{BUNDLE_SUFFIX}").resolve()
+    result = PackResult(root, bundle=out)
+    result.entries = write_bundle(ap_dir, out)
+    result.sha256 = hash_bytes(out.read_bytes())
+    return result
+
+
+def bundle_index(bundle: Path) -> list:
+    """The :class:`~agent_pack.bundle.BundleEntry` of every file in ``bundle``."""
+    from agent_pack.bundle import BundleError, read_index
+
+    try:
+        return read_index(bundle)
+    except BundleError as exc:
+        raise AgentpackError(f"Invalid bundle: {exc}") from exc
+
+
+def unpack(root: Path, bundle: Path, force: bool = False) -> Result:
+    """Extract ``bundle``'s rules and skills into ``root``'s `.agentpack/`.
+
+    Local files that differ from the bundle are reported as skipped and left alone
+    unless ``force`` is set.
+    """
+    from agent_pack.bundle import Bundle, BundleError
+
+    root = root.resolve()
+    try:
+        opened = Bundle(bundle)
+    except BundleError as exc:
+        raise AgentpackError(f"Invalid bundle: {exc}") from exc
+
+    result = Result(root)
+    with opened:
+        ap_dir = _ap_dir(root)
+        try:
+            for rel, entry in opened.entries.items():
+                dest = ap_dir / rel
+                current = hash_bytes(dest.read_bytes()) if dest.is_file() else None
+                if current == entry.hash:
+                    result.unchanged.append(f"{AGENTPACK_DIR}/{rel}")
+                elif current is not None and not force:
+                    result.skipped.append(f"{AGENTPACK_DIR}/{rel}")
+                else:
+                    opened.extract(rel, dest)
+                    result.written.append(f"{AGENTPACK_DIR}/{rel}")
+        except BundleError as exc:
+            raise AgentpackError(f"Invalid bundle: {exc}") from exc
+    return result
@@ -0,0 +1,343 @@
+"""Canonical artifact model: `.agentpack/` parsed once and shared by every target."""
+
+import os
+import time
+from dataclasses import dataclass, replace
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from agent_pack.manifest import hash_text
+from agent_pack.timings import record_read
+
+AGENTPACK_DIR = ".agentpack"
+MARKER_PREFIX = "GENERATED BY agentpack."
+
+MAIN = "main"
+RULE = "rule"
+SKILL = "skill"
+
+
+def load_yaml(stream: Any) -> Any:
+    """Parse YAML safely, using the libyaml C loader when it is available.
+
+    PyYAML is imported on first use so that commands which never parse YAML do not
+    pay for the import.
+    """
+    import yaml
+
+    return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def find_skill_md(skill_dir: Path) -> Optional[Path]:
+    """Return the skill markdown file in a skill directory (case-insensitive match for skill.md)."""
+    for f in skill_dir.iterdir():
+        if f.is_file() and f.name.lower() == "skill.md":
+            return f
+    return None
+
+
+def strip_frontmatter(content: str) -> str:
+    """Remove YAML frontmatter block from markdown content."""
+    if not content.startswith("---"):
+        return content
+    end_idx = content.find("\n---", 3)
+    if end_idx == -1:
+        return content
+    after = end_idx + 4
+    if after < len(content) and content[after] == "\n":
+        after += 1
+    return content[after:]
+
+
+def frontmatter_text(content: str) -> Optional[str]:
+    """Return the raw YAML between the opening and closing ``---``, if any."""
+    if not content.startswith("---"):
+        return None
+    end_idx = content.find("\n---", 3)
+    if end_idx == -1:
+        return None
+    return content[3:end_idx]
+
+
+def add_yaml_marker(content: str, source_rel: str) -> str:
+    """Insert YAML comment marker after the opening ``---`` in frontmatter."""
+    marker_line = f"# {MARKER_PREFIX} Source: {source_rel}"
+    if content.startswith("---\n"):
+        return f"---\n{marker_line}\n{content[4:]}"
+    return f"---\n{marker_line}\n---\n{content}"
+
+
+def add_html_marker(content: str, source_rel: str) -> str:
+    """Prepend HTML comment marker."""
+    return f"<!-- {MARKER_PREFIX} Source: {source_rel} -->\n{content}"
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A single canonical source: the main instructions file, a rule or a skill.
+
+    Frontmatter, body and the marked output are derived lazily and cached, so each
+    is computed at most once however many targets render the artifact.
+    """
+
+    kind: str
+    name: str
+    source: Path
+    source_rel: str
+    text: str
+    hash: str
+    supplementary: tuple[Path, ...] = ()
+
+    @cached_property
+    def frontmatter(self) -> dict:
+        raw = frontmatter_text(self.text)
+        if raw is None:
+            return {}
+        import yaml
+
+        try:
+            data = load_yaml(raw)
+        except yaml.YAMLError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @cached_property
+    def body(self) -> str:
+        return strip_frontmatter(self.text)
+
+    @cached_property
+    def rendered(self) -> str:
+        """Generated file content with the agentpack marker, identical for all targets.
+
+        The main instructions file loses its frontmatter and gets an HTML marker;
+        rules and skills keep their frontmatter and get a YAML comment marker.
+        """
+        if self.kind == MAIN:
+            return add_html_marker(self.body, self.source_rel)
+        return add_yaml_marker(self.text, self.source_rel)
+
+    @cached_property
+    def rendered_hash(self) -> str:
+        """Hash of :attr:`rendered`, as recorded in the manifest."""
+        return hash_text(self.rendered)
+
+
+@dataclass(frozen=True)
+class ArtifactSet:
+    """All artifacts of one `.agentpack/` directory, in generation order."""
+
+    main: Optional[Artifact]
+    rules: tuple[Artifact, ...]
+    skills: tuple[Artifact, ...]
+
+    def __iter__(self) -> Iterator[Artifact]:
+        if self.main:
+            yield self.main
+        yield from self.rules
+        yield from self.skills
+
+
+# Filesystem timestamps can be coarser than the time between two edits, so a source
+# or an index is only memoized once it has been left alone for this long.
+_RACY_NS = 2_000_000_000
+
+
+def load_artifact(
+    cache: Optional[dict],
+    kind: str,
+    name: str,
+    source: Path,
+    source_rel: str,
+    supplementary: tuple[Path, ...] = (),
+) -> Artifact:
+    """Read one source into an :class:`Artifact`.
+
+    With a ``cache`` (see :func:`load_artifacts`), a source whose size and mtime
+    are unchanged is reused unless it was modified within ``_RACY_NS``.
+    """
+    if cache is None:
+        text = source.read_text()
+        record_read(len(text))
+        return Artifact(
+            kind, name, source, source_rel, text, hash_text(text), supplementary
+        )
+
+    st = source.stat()
+    key = (st.st_size, st.st_mtime_ns)
+    racy = time.time_ns() - st.st_mtime_ns <= _RACY_NS
+    cached = cache.get(source)
+    if cached and not racy and cached[0] == key and cached[1].source_rel == source_rel:
+        artifact = cached[1]
+        if artifact.supplementary != supplementary:
+            artifact = replace(artifact, supplementary=supplementary)
+    else:
+        text = source.read_text()
+        record_read(len(text))
+        artifact = Artifact(
+            kind, name, source, source_rel, text, hash_text(text), supplementary
+        )
+    if racy:
+        cache.pop(source, None)
+    else:
+        cache[source] = (key, artifact)
+    return artifact
+
+
+def pack_files(pack: Path) -> dict[str, Path]:
+    """Shareable files of a pack keyed by path relative to it: rules and skills.
+
+    Configuration and hidden files are not part of what a pack shares.
+    """
+    files = {}
+    rules = pack / "rules"
+    if rules.is_dir():
+        for f in rules.glob("*.md"):
+            if f.is_file() and not f.name.startswith("."):
+                files[f"rules/{f.name}"] = f
+    skills = pack / "skills"
+    if skills.is_dir():
+        for f in skills.rglob("*"):
+            rel = f.relative_to(pack)
+            if f.is_file() and not any(p.startswith(".") for p in rel.parts):
+                files[rel.as_posix()] = f
+    return dict(sorted(files.items()))
+
+
+@dataclass(frozen=True)
+class PackIndex:
+    """Source paths of one pack directory, without their contents.
+
+    ``skill_dirs`` lists every directory under ``skills/``, with or without a
+    SKILL.md, because adding one changes only that directory's mtime.
+    """
+
+    signature: tuple
+    main: Optional[Path]
+    rules: tuple[Path, ...]
+    skills: tuple[tuple[str, Path, tuple[Path, ...]], ...]
+    skill_dirs: tuple[Path, ...]
+
+
+_INDEXES: dict[Path, PackIndex] = {}
+
+
+def _dir_key(directory: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def _signature(pack: Path, skill_dirs: tuple[Path, ...]) -> tuple:
+    return (
+        _dir_key(pack / "rules"),
+        _dir_key(pack / "skills"),
+        tuple(_dir_key(d) for d in skill_dirs),
+    )
+
+
+def index_pack(pack: Path) -> PackIndex:
+    """List the main file, rules and skills of ``pack``, memoized per directory.
+
+    The memo is keyed on the stat signatures of ``rules/``, ``skills/`` and every
+    skill directory. Adding, removing or renaming a source changes one of them, so
+    a warm lookup costs only those stat calls.
+    """
+    cached = _INDEXES.get(pack)
+    if cached and _signature(pack, cached.skill_dirs) == cached.signature:
+        return cached
+
+    rules_dir = pack / "rules"
+    skills_dir = pack / "skills"
+    skill_dirs = ()
+    if skills_dir.is_dir():
+        skill_dirs = tuple(sorted(d for d in skills_dir.iterdir() if d.is_dir()))
+    # Taken before scanning, so a change made while scanning invalidates the index.
+    signature = _signature(pack, skill_dirs)
+
+    main_md = rules_dir / "CLAUDE.md"
+    rules = ()
+    if rules_dir.is_dir():
+        rules = tuple(
+            f for f in sorted(rules_dir.glob("*.md")) if f.name != "CLAUDE.md"
+        )
+    skills = []
+    for skill_dir in skill_dirs:
+        skill_md = find_skill_md(skill_dir)
+        if skill_md:
+            supplementary = tuple(sorted(c for c in skill_dir.iterdir() if c.is_dir()))
+            skills.append((skill_dir.name, skill_md, supplementary))
+
+    index = PackIndex(
+        signature,
+        main_md if main_md.exists() else None,
+        rules,
+        tuple(skills),
+        skill_dirs,
+    )
+    newest = max((key[1] for key in _flatten(signature)), default=0)
+    if time.time_ns() - newest > _RACY_NS:
+        _INDEXES[pack] = index
+    else:
+        _INDEXES.pop(pack, None)
+    return index
+
+
+def clear_index_cache() -> None:
+    """Forget every memoized :func:`index_pack` result, e.g. between benchmarks."""
+    _INDEXES.clear()
+
+
+def _flatten(signature: tuple) -> Iterator[tuple[int, int]]:
+    rules_key, skills_key, skill_keys = signature
+    for key in (rules_key, skills_key, *skill_keys):
+        if key is not None:
+            yield key
+
+
+def load_artifacts(ap_dir: Path, cache: Optional[dict] = None) -> ArtifactSet:
+    """Read every rule and skill under ``ap_dir`` exactly once.
+
+    If ``cache`` is given it maps source paths to ``(stat key, Artifact)`` from an
+    earlier call, and sources whose size and mtime are unchanged are not re-read.
+    Sources modified within the last ``_RACY_NS`` are always re-read, because a
+    same-size edit within the timestamp granularity would keep both.
+    """
+    index = index_pack(ap_dir)
+
+    main = None
+    if index.main:
+        main = load_artifact(
+            cache, MAIN, "CLAUDE.md", index.main, f"{AGENTPACK_DIR}/rules/CLAUDE.md"
+        )
+
+    rules = tuple(
+        load_artifact(cache, RULE, f.name, f, f"{AGENTPACK_DIR}/rules/{f.name}")
+        for f in index.rules
+    )
+
+    skills = tuple(
+        load_artifact(
+            cache,
+            SKILL,
+            name,
+            skill_md,
+            f"{AGENTPACK_DIR}/skills/{name}/SKILL.md",
+            supplementary,
+        )
+        for name, skill_md, supplementary in index.skills
+    )
+
+    artifacts = ArtifactSet(main, rules, skills)
+    if cache is not None:
+        prune_cache(cache, artifacts)
+    return artifacts
+
+
+def prune_cache(cache: dict, artifacts: ArtifactSet) -> None:
+    """Drop cached artifacts whose sources are no longer part of ``artifacts``."""
+    live = {a.source for a in artifacts}
+    for stale in [p for p in cache if p not in live]:
+        del cache[stale]
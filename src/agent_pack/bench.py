@@ -0,0 +1,331 @@
+"""Benchmark harness: synthesize packs of a given size and time agentpack on them.
+
+Run ``python -m agent_pack.bench --help``. Every scenario runs in-process against
+a fresh temporary tree and the results are printed as JSON, so runs can be stored
+and compared between releases.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import typer
+
+from agent_pack import __version__
+from agent_pack.artifacts import AGENTPACK_DIR, clear_index_cache
+
+SUPPLEMENTARY = ("scripts", "references", "assets")
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "agentpack-bench",
+    "GIT_AUTHOR_EMAIL": "bench@agentpack.invalid",
+    "GIT_COMMITTER_NAME": "agentpack-bench",
+    "GIT_COMMITTER_EMAIL": "bench@agentpack.invalid",
+}
+
+
+@dataclass(frozen=True)
+class PackSpec:
+    """Size of a synthetic pack.
+
+    Each skill gets up to ``files`` supplementary files spread over scripts/,
+    references/ and assets/, with sizes drawn between ``min_bytes`` and
+    ``max_bytes``.
+    """
+
+    rules: int = 100
+    skills: int = 20
+    files: int = 10
+    min_bytes: int = 256
+    max_bytes: int = 16384
+    seed: int = 0
+
+
+def synthesize(ap_dir: Path, spec: PackSpec, agents: str = "[claude, cursor]") -> None:
+    """Write a `.agentpack/` directory of the size described by ``spec``."""
+    rng = random.Random(spec.seed)
+    rules_dir = ap_dir / "rules"
+    rules_dir.mkdir(parents=True, exist_ok=True)
+    (ap_dir / "agentpack.yaml").write_text(f"agents: {agents}\ngitignore: false\n")
+    (rules_dir / "CLAUDE.md").write_text(
+        "---\ndescription: Project instructions\nalwaysApply: true\n---\n\n"
+        "# Project\n\n" + _paragraphs(rng, 4)
+    )
+    for i in range(spec.rules):
+        if i % 3 == 0:
+            scope = "alwaysApply: true\n"
+        else:
+            scope = f"paths: ['src/mod{i % 17}/**/*.py', 'tests/**/test_{i}*.py']\n"
+        (rules_dir / f"rule-{i:04d}.md").write_text(
+            f"---\ndescription: Synthetic rule {i}\n{scope}---\n\n"
+            f"# Rule {i}\n\n" + _paragraphs(rng, rng.randint(1, 6))
+        )
+
+    for i in range(spec.skills):
+        name = f"skill-{i:03d}"
+        skill_dir = ap_dir / "skills" / name
+        skill_dir.mkdir(parents=True, exist_ok=True)
+        (skill_dir / "SKILL.md").write_text(
+            f"---\nname: {name}\ndescription: Synthetic skill {i}\n---\n\n"
+            f"# {name}\n\n" + _paragraphs(rng, 3)
+        )
+        for j in range(rng.randint(0, spec.files)):
+            sub = skill_dir / SUPPLEMENTARY[j % len(SUPPLEMENTARY)]
+            if j >= len(SUPPLEMENTARY):
+                sub = sub / f"group-{j % 4}"
+            sub.mkdir(parents=True, exist_ok=True)
+            size = rng.randint(spec.min_bytes, spec.max_bytes)
+            (sub / f"file-{j:03d}.bin").write_bytes(rng.randbytes(size))
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    words = ("always", "never", "prefer", "tests", "module", "error", "review")
+    return "".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(20, 80))) + ".\n\n"
+        for _ in range(count)
+    )
+
+
+def make_remote(base: Path, name: str, spec: PackSpec) -> str:
+    """Create a bare git repository holding a synthetic pack; return its URL."""
+    bare = base / f"{name}.git"
+    work = base / f"{name}.work"
+    synthesize(work / AGENTPACK_DIR, spec)
+    env = {**os.environ, **GIT_ENV}
+    for args in (
+        ["init", "-q", "--bare", str(bare)],
+        ["init", "-q", str(work)],
+        ["-C", str(work), "add", "-A"],
+        ["-C", str(work), "commit", "-q", "-m", "pack"],
+        ["-C", str(work), "push", "-q", str(bare), "HEAD:refs/heads/main"],
+        ["--git-dir", str(bare), "symbolic-ref", "HEAD", "refs/heads/main"],
+    ):
+        subprocess.run(["git", *args], check=True, capture_output=True, env=env)
+    shutil.rmtree(work)
+    return f"file://{bare}"
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Timing:
+    """Wall-clock seconds of the repeated runs of one scenario."""
+
+    runs: list[float]
+
+    def summary(self) -> dict:
+        return {
+            "min": min(self.runs),
+            "median": statistics.median(self.runs),
+            "max": max(self.runs),
+            "runs": self.runs,
+        }
+
+
+@contextlib.contextmanager
+def _measured(module, name: str, sink: list[float]) -> Iterator[None]:
+    """Accumulate the time spent in ``module.name`` into ``sink`` while active."""
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            sink.append(time.perf_counter() - start)
+
+    setattr(module, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+def _generate(root: Path) -> None:
+    from agent_pack import api
+
+    api.generate(root)
+
+
+def _clean_outputs(root: Path) -> None:
+    for name in ("CLAUDE.md", "AGENTS.md", ".claude", ".cursor"):
+        path = root / name
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+    (root / AGENTPACK_DIR / ".state.json").unlink(missing_ok=True)
+    clear_index_cache()
+
+
+def _time(setup: Callable[[], None], run: Callable[[], None], repeat: int) -> Timing:
+    runs = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return Timing(runs)
+
+
+def bench_generate(base: Path, spec: PackSpec, repeat: int) -> dict:
+    """Time cold, warm and no-op generation and the cleanup phase."""
+    from agent_pack import api
+
+    root = base / "generate"
+    ap_dir = root / AGENTPACK_DIR
+    synthesize(ap_dir, spec)
+    results = {}
+
+    supplementary: list[float] = []
+    with _measured(api, "_copy_supplementary", supplementary):
+        cold = _time(lambda: _clean_outputs(root), lambda: _generate(root), repeat)
+    results["generate_cold"] = cold.summary()
+    # Summed over worker threads, so it can exceed the wall time of the run.
+    results["copy_supplementary_cold_total"] = sum(supplementary) / repeat
+
+    rules = sorted((ap_dir / "rules").glob("rule-*.md"))
+    counter = iter(range(1 << 30))
+
+    def touch_one_rule() -> None:
+        if rules:
+            with open(rules[0], "a") as f:
+                f.write(f"\nEdit {next(counter)}.\n")
+
+    _generate(root)
+    results["generate_warm"] = _time(
+        touch_one_rule, lambda: _generate(root), repeat
+    ).summary()
+    results["generate_noop"] = _time(
+        lambda: None, lambda: _generate(root), repeat
+    ).summary()
+
+    # Cleanup: half of the rules and skills disappear between two runs.
+    removed = base / "removed"
+    cleanup: list[float] = []
+
+    def remove_half() -> None:
+        if removed.is_dir():
+            restore()
+            removed.rmdir()
+        _generate(root)
+        removed.mkdir()
+        for f in rules[::2]:
+            shutil.move(f, removed / f.name)
+        for d in sorted((ap_dir / "skills").iterdir())[::2]:
+            shutil.move(d, removed / d.name)
+
+    def restore() -> None:
+        for f in removed.iterdir():
+            dest = ap_dir / ("rules" if f.is_file() else "skills") / f.name
+            shutil.move(f, dest)
+
+    def generate_measured() -> None:
+        with _measured(api, "_cleanup_stale_generated", cleanup):
+            _generate(root)
+
+    total = _time(remove_half, generate_measured, repeat)
+    restore()
+    results["generate_after_removal"] = total.summary()
+    results["cleanup_stale_generated"] = Timing(cleanup).summary()
+    return results
+
+
+def bench_sync(base: Path, spec: PackSpec, remotes: int, repeat: int) -> dict:
+    """Time first and no-op syncs of ``remotes`` local bare repositories."""
+    from agent_pack import api
+
+    urls = {
+        f"remote{i}": make_remote(base / "remotes", f"remote{i}", spec)
+        for i in range(remotes)
+    }
+    root = base / "sync"
+    ap_dir = root / AGENTPACK_DIR
+    ap_dir.mkdir(parents=True)
+    lines = "".join(f"  {name}: {url}\n" for name, url in urls.items())
+    (ap_dir / "agentpack.yaml").write_text(f"agents: [claude]\nremotes:\n{lines}")
+
+    def run() -> None:
+        result = api.sync(root)
+        if result.failed:
+            raise RuntimeError(result.warnings)
+
+    def reset() -> None:
+        shutil.rmtree(base / "cache", ignore_errors=True)
+        (ap_dir / ".sync.json").unlink(missing_ok=True)
+        for name in ("rules", "skills"):
+            shutil.rmtree(ap_dir / name, ignore_errors=True)
+
+    previous = os.environ.get("AGENTPACK_CACHE_DIR")
+    os.environ["AGENTPACK_CACHE_DIR"] = str(base / "cache")
+    try:
+        cold = _time(reset, run, repeat)
+        noop = _time(lambda: None, run, repeat)
+    finally:
+        if previous is None:
+            os.environ.pop("AGENTPACK_CACHE_DIR", None)
+        else:
+            os.environ["AGENTPACK_CACHE_DIR"] = previous
+    return {"sync_cold": cold.summary(), "sync_noop": noop.summary()}
+
+
+def run_benchmarks(
+    spec: PackSpec, repeat: int = 5, remotes: int = 2, sync: bool = True
+) -> dict:
+    """Run every scenario in a temporary directory and return the report."""
+    with tempfile.TemporaryDirectory(prefix="agentpack-bench-") as tmp:
+        base = Path(tmp)
+        results = bench_generate(base, spec, repeat)
+        if sync and remotes:
+            results.update(bench_sync(base, spec, remotes, repeat))
+    return {
+        "agentpack": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "spec": asdict(spec),
+        "repeat": repeat,
+        "remotes": remotes if sync else 0,
+        "results": results,
+    }
+
+
+def main(
+    rules: int = typer.Option(100, help="Rules per pack."),
+    skills: int = typer.Option(20, help="Skills per pack."),
+    files: int = typer.Option(10, help="Maximum supplementary files per skill."),
+    min_bytes: int = typer.Option(256, help="Smallest supplementary file."),
+    max_bytes: int = typer.Option(16384, help="Largest supplementary file."),
+    seed: int = typer.Option(0, help="Seed for the synthetic content."),
+    repeat: int = typer.Option(5, min=1, help="Runs per scenario."),
+    remotes: int = typer.Option(2, min=0, help="Bare remotes to sync from."),
+    no_sync: bool = typer.Option(False, "--no-sync", help="Skip sync scenarios."),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Write the JSON report here instead of stdout."
+    ),
+):
+    """Benchmark generate, cleanup and sync on synthetic packs."""
+    spec = PackSpec(rules, skills, files, min_bytes, max_bytes, seed)
+    report = run_benchmarks(spec, repeat, remotes, not no_sync)
+    text = json.dumps(report, indent=2) + "\n"
+    if output:
+        output.write_text(text)
+    else:
+        typer.echo(text, nl=False)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,224 @@
+"""Single-file bundles of a pack: a zip whose first member indexes the rest.
+
+The index lists every file's path, hash, size, mode and parsed frontmatter, so a
+consumer can inspect a bundle and read individual rules by random access without
+extracting it. Bundles are deterministic: packing the same sources twice yields the
+same bytes, so a bundle's hash identifies its content.
+"""
+
+import json
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+from agent_pack.artifacts import frontmatter_text, load_yaml, pack_files
+from agent_pack.filesync import write_atomic
+from agent_pack.manifest import hash_bytes
+
+INDEX_NAME = "agentpack-index.json"
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = ".agentpack.zip"
+
+# Fixed member timestamps keep bundles byte-for-byte reproducible.
+_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class BundleError(Exception):
+    """A bundle is malformed or its content does not match its index."""
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    """One indexed file of a bundle."""
+
+    path: str
+    hash: str
+    size: int
+    mode: int
+    frontmatter: dict
+
+
+def is_bundle(location: str) -> bool:
+    return location.endswith(BUNDLE_SUFFIX)
+
+
+def is_shareable(rel: str) -> bool:
+    """Whether ``rel`` is a path :func:`~agent_pack.artifacts.pack_files` can
+    produce: ``rules/<name>.md`` or a file under ``skills/<name>/``, with no
+    hidden part.
+    """
+    path = PurePosixPath(rel)
+    parts = path.parts
+    if path.as_posix() != rel or path.is_absolute():
+        return False
+    if any(p.startswith(".") for p in parts):
+        return False
+    if parts[0] == "rules":
+        return len(parts) == 2 and parts[1].endswith(".md")
+    return parts[0] == "skills" and len(parts) >= 3
+
+
+def _frontmatter(rel: str, data: bytes) -> dict:
+    """Parsed frontmatter of rules and SKILL.md files, as JSON-safe values."""
+    if not rel.endswith(".md") or not (
+        rel.startswith("rules/") or rel.lower().endswith("/skill.md")
+    ):
+        return {}
+    raw = frontmatter_text(data.decode("utf-8", errors="replace"))
+    if raw is None:
+        return {}
+    import yaml
+
+    try:
+        parsed = load_yaml(raw)
+    except yaml.YAMLError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return json.loads(json.dumps(parsed, default=str))
+
+
+def write_bundle(pack: Path, out: Path) -> list[BundleEntry]:
+    """Pack the rules and skills of ``pack`` into the bundle ``out``."""
+    members = []
+    entries = []
+    for rel, f in pack_files(pack).items():
+        data = f.read_bytes()
+        mode = f.stat().st_mode & 0o777
+        entries.append(
+            BundleEntry(rel, hash_bytes(data), len(data), mode, _frontmatter(rel, data))
+        )
+        members.append((rel, data, mode))
+
+    index = {
+        "version": BUNDLE_VERSION,
+        "files": [entry.__dict__ for entry in entries],
+    }
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.agentpack-tmp")
+    try:
+        with zipfile.ZipFile(tmp, "w") as zf:
+            # Stored first and uncompressed, so the index is also readable from the
+            # head of the file by streaming consumers.
+            info = zipfile.ZipInfo(INDEX_NAME, _EPOCH)
+            zf.writestr(info, json.dumps(index, indent=1, sort_keys=True))
+            for rel, data, mode in members:
+                info = zipfile.ZipInfo(rel, _EPOCH)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = (0o100000 | mode) << 16
+                zf.writestr(info, data)
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return entries
+
+
+class Bundle:
+    """An open bundle; files are read on demand and checked against the index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            self._zip = zipfile.ZipFile(path)
+        except (OSError, zipfile.BadZipFile) as exc:
+            raise BundleError(f"{path}: {exc}") from exc
+        try:
+            self.entries = self._read_index()
+        except BaseException:
+            self._zip.close()
+            raise
+
+    def _read_index(self) -> dict[str, BundleEntry]:
+        infos = self._zip.infolist()
+        if not infos or infos[0].filename != INDEX_NAME:
+            raise BundleError(f"{self.path}: not an agentpack bundle")
+        try:
+            index = json.loads(self._zip.read(INDEX_NAME))
+        except ValueError as exc:
+            raise BundleError(f"{self.path}: unreadable index") from exc
+        if index.get("version") != BUNDLE_VERSION:
+            raise BundleError(
+                f"{self.path}: unsupported bundle version {index.get('version')}"
+            )
+        entries = {}
+        for item in index.get("files", []):
+            try:
+                entry = BundleEntry(**item)
+            except TypeError as exc:
+                raise BundleError(f"{self.path}: malformed index entry") from exc
+            if not is_shareable(entry.path):
+                raise BundleError(f"{self.path}: unsafe path {entry.path!r}")
+            entries[entry.path] = entry
+        return entries
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def read(self, rel: str) -> bytes:
+        """Return one file's content, verified against the index."""
+        entry = self.entries[rel]
+        try:
+            data = self._zip.read(rel)
+        except (KeyError, zipfile.BadZipFile) as exc:
+            raise BundleError(f"{self.path}: cannot read {rel}") from exc
+        if hash_bytes(data) != entry.hash:
+            raise BundleError(f"{self.path}: {rel} does not match the index")
+        return data
+
+    def extract(self, rel: str, dest: Path) -> None:
+        """Write one file to ``dest`` atomically, with its recorded mode."""
+        write_atomic(dest, self.read(rel))
+        os.chmod(dest, self.entries[rel].mode)
+
+    def sources(self) -> dict:
+        """Merge sources for :func:`agent_pack.remotes.merge_remote`.
+
+        Hashes come from the index, so only files that differ are ever read.
+        """
+        return {
+            rel: (entry.hash, partial(self.extract, rel))
+            for rel, entry in self.entries.items()
+        }
+
+    def extract_all(self, dest: Path) -> None:
+        for rel in self.entries:
+            self.extract(rel, dest / rel)
+
+
+def materialize(bundle_path: Path, dest: Path) -> Path:
+    """Extract a bundle into ``dest`` once; an existing ``dest`` is reused.
+
+    Used for content-addressed cache directories, which never change once written.
+    """
+    if dest.is_dir():
+        return dest
+    tmp = dest.with_name(f".{dest.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        with Bundle(bundle_path) as bundle:
+            bundle.extract_all(tmp)
+        tmp.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, dest)
+    except OSError:
+        # Another process may have materialized the same content meanwhile.
+        if not dest.is_dir():
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return dest
+
+
+def read_index(path: Path) -> list[BundleEntry]:
+    """The index of the bundle at ``path``, without reading any other member."""
+    with Bundle(path) as bundle:
+        return list(bundle.entries.values())
@@ -0,0 +1,149 @@
+"""Read-only verification that generated outputs match `.agentpack/`.
+
+Outputs are compared by hash against the content `generate` would write. The
+manifest of the previous run lets unchanged outputs be confirmed from a stat call
+alone, so a check of an up-to-date tree reads only the sources.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from agent_pack.artifacts import MARKER_PREFIX, SKILL, Artifact
+from agent_pack.filesync import file_hash
+from agent_pack.manifest import (
+    Manifest,
+    hash_bytes,
+    matches_stat,
+    tree_listing,
+    tree_signature,
+)
+
+MISSING = "missing"
+STALE = "stale"
+MODIFIED = "modified"
+
+
+@dataclass
+class CheckResult:
+    """Outputs checked and the ``(status, path)`` of every one that is not current."""
+
+    checked: int = 0
+    problems: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+def _has_marker(data: bytes) -> bool:
+    return MARKER_PREFIX.encode() in data
+
+
+def _check_file(
+    out: Path, rel: str, artifact: Artifact, manifest: Manifest
+) -> Optional[str]:
+    """Status of one generated file, or None if it holds the expected content."""
+    expected = artifact.rendered_hash
+    recorded = manifest.previous.get("outputs", {}).get(rel)
+    if recorded and recorded.get("hash") == expected:
+        if matches_stat(out, recorded.get("size"), recorded.get("mtime_ns")):
+            return None
+    try:
+        data = out.read_bytes()
+    except FileNotFoundError:
+        return MISSING
+    except OSError:
+        return MODIFIED
+    digest = hash_bytes(data)
+    if digest == expected:
+        return None
+    if recorded and digest == recorded.get("hash"):
+        # Exactly what an earlier run wrote: the sources have moved on since.
+        return STALE
+    if not recorded and _has_marker(data):
+        return STALE
+    return MODIFIED
+
+
+def _check_dir(src: Path, dest: Path, rel: str, manifest: Manifest) -> list:
+    """Problems of one supplementary directory copied from ``src`` to ``dest``."""
+    recorded = manifest.previous.get("dirs", {}).get(rel) or {}
+    src_files = tree_listing(src)
+    dest_files = tree_listing(dest) if dest.is_dir() else {}
+    recorded_files = recorded.get("files", {})
+    if dest_files and dest_files == recorded_files:
+        # Untouched since generated; it is current if the source is too.
+        if recorded.get("source_sig") == tree_signature(src):
+            return []
+
+    problems = []
+    for name in src_files:
+        if name not in dest_files:
+            problems.append((MISSING, f"{rel}/{name}"))
+        elif file_hash(src / name) != file_hash(dest / name):
+            touched = (
+                name in recorded_files and recorded_files[name] != dest_files[name]
+            )
+            problems.append((MODIFIED if touched else STALE, f"{rel}/{name}"))
+    for name in dest_files:
+        if name not in src_files:
+            problems.append((STALE, f"{rel}/{name}"))
+    return problems
+
+
+def check_outputs(
+    root: Path,
+    plan: list[tuple[Path, Artifact]],
+    manifest: Manifest,
+    marked: Iterable[Path] = (),
+) -> CheckResult:
+    """Compare the planned outputs under ``root`` with what is on disk.
+
+    Besides missing and differing outputs, files that `generate` would remove are
+    reported as stale: those owned by the previous run per the manifest, or, when
+    there is no manifest, the marked files in ``marked`` that are not planned.
+    Nothing is written.
+    """
+    result = CheckResult()
+    planned = set()
+    planned_dirs = set()
+    for out, artifact in plan:
+        rel = out.relative_to(root).as_posix()
+        planned.add(rel)
+        result.checked += 1
+        status = _check_file(out, rel, artifact, manifest)
+        if status:
+            result.problems.append((status, rel))
+        if artifact.kind == SKILL:
+            for child in artifact.supplementary:
+                dest = out.parent / child.name
+                dir_rel = dest.relative_to(root).as_posix()
+                planned_dirs.add(dir_rel)
+                result.problems += _check_dir(child, dest, dir_rel, manifest)
+
+    if manifest.has_ledger:
+        outputs = manifest.previous.get("outputs", {})
+        for rel, entry in sorted(outputs.items()):
+            if rel in planned:
+                continue
+            f = root / rel
+            if matches_stat(f, entry.get("size"), entry.get("mtime_ns")):
+                result.problems.append((STALE, rel))
+            elif f.is_file() and _has_marker(f.read_bytes()):
+                result.problems.append((STALE, rel))
+        for rel, entry in sorted(manifest.previous.get("dirs", {}).items()):
+            if rel in planned_dirs:
+                continue
+            for name, (size, mtime_ns) in entry.get("files", {}).items():
+                f = root / rel / name
+                if f.is_symlink() or matches_stat(f, size, mtime_ns):
+                    result.problems.append((STALE, f"{rel}/{name}"))
+    else:
+        for f in marked:
+            rel = f.relative_to(root).as_posix()
+            if rel not in planned:
+                result.problems.append((STALE, rel))
+
+    result.problems.sort(key=lambda p: p[1])
+    return result
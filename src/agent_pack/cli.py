@@ -1,38 +1,27 @@
-"""CLI entry point for agentpack."""
+"""CLI entry point for agentpack.
 
-import shutil
+Only typer is imported eagerly. PyYAML, thread pools and the modules behind
+individual commands are imported where they are used, because agentpack runs from
+git hooks and editor integrations where startup latency adds up.
+
+Commands are thin wrappers over :mod:`agent_pack.api`: they print its results and
+turn :class:`~agent_pack.api.AgentpackError` into a message and exit code 1.
+"""
+
+import contextlib
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import typer
-import yaml
 
-from agent_pack import __version__
+from agent_pack import __version__, api
+from agent_pack.api import SKIPPED, WRITTEN, AgentpackError
+from agent_pack.artifacts import AGENTPACK_DIR
+from agent_pack.timings import span
 
 app = typer.Typer(help="AI agent configuration manager.")
 
-AGENTPACK_DIR = ".agentpack"
-MARKER_PREFIX = "GENERATED BY agentpack."
-
-DEFAULT_CONFIG = """\
-agents: [claude, cursor]
-gitignore: true
-"""
-
-DEFAULT_CLAUDE_MD = """\
----
-description: Main project instructions for AI agents
-alwaysApply: true
----
-
-# Project Instructions
-
-<!-- Add your project-specific instructions here.
-     This file maps to CLAUDE.md (when claude agent is configured)
-     or AGENTS.md (when cursor-only) at the project root,
-     when you run `agentpack generate`. -->
-"""
-
 
 def version_callback(value: bool):
     if value:
@@ -65,22 +54,10 @@ def init(
 ):
     """Bootstrap .agentpack/ directory structure with starter config."""
     root = (path or Path.cwd()).resolve()
-    ap_dir = root / AGENTPACK_DIR
-
-    if ap_dir.exists():
-        typer.echo(f"Already initialized: {ap_dir}", err=True)
-        raise typer.Exit(code=1)
-
-    rules_dir = ap_dir / "rules"
-    skills_dir = ap_dir / "skills"
-
-    rules_dir.mkdir(parents=True)
-    skills_dir.mkdir(parents=True)
+    with _reported():
+        api.init(root)
 
-    (ap_dir / "agentpack.yaml").write_text(DEFAULT_CONFIG)
-    (rules_dir / "CLAUDE.md").write_text(DEFAULT_CLAUDE_MD)
-
-    typer.echo(f"Initialized {ap_dir}")
+    typer.echo(f"Initialized {root / AGENTPACK_DIR}")
     typer.echo("  agentpack.yaml   — project configuration")
     typer.echo("  rules/CLAUDE.md  — starter project instructions")
     typer.echo("\nNext: edit your rules, then run `agentpack generate`.")
@@ -91,228 +68,347 @@ def init(
 # ---------------------------------------------------------------------------
 
 
-def _load_config(ap_dir: Path) -> dict:
-    config_path = ap_dir / "agentpack.yaml"
-    if not config_path.exists():
-        typer.echo(f"Config not found: {config_path}", err=True)
+@contextlib.contextmanager
+def _reported() -> Iterator[None]:
+    """Report an :class:`AgentpackError` on stderr and exit with code 1."""
+    try:
+        yield
+    except AgentpackError as exc:
+        typer.echo(str(exc), err=True)
         raise typer.Exit(code=1)
-    with open(config_path) as f:
-        return yaml.safe_load(f) or {}
-
-
-def _find_skill_md(skill_dir: Path) -> Optional[Path]:
-    """Return the skill markdown file in a skill directory (case-insensitive match for skill.md)."""
-    for f in skill_dir.iterdir():
-        if f.is_file() and f.name.lower() == "skill.md":
-            return f
-    return None
 
 
-def _has_marker(content: str) -> bool:
-    return MARKER_PREFIX in content
+def _run_generate(root: Path, force: bool, jobs: Optional[int]) -> None:
+    """Run one generation pass for ``root`` and print its results."""
+    with _reported():
+        result = api.generate(root, force, jobs)
+    _print_generate(result)
 
 
-def _strip_frontmatter(content: str) -> str:
-    """Remove YAML frontmatter block from markdown content."""
-    if not content.startswith("---"):
-        return content
-    end_idx = content.find("\n---", 3)
-    if end_idx == -1:
-        return content
-    after = end_idx + 4
-    if after < len(content) and content[after] == "\n":
-        after += 1
-    return content[after:]
-
+def _print_generate(result: api.GenerateResult) -> None:
+    for warning in result.warnings:
+        typer.echo(warning, err=True)
+    typer.echo("Generating...")
+    for agent in result.agents:
+        typer.echo(f"{agent.capitalize()}:")
+        for output in result.outputs:
+            if output.agent != agent:
+                continue
+            if output.status == SKIPPED:
+                typer.echo(
+                    f"WARN: {output.path} already exists and was not generated by "
+                    "agentpack, skipping. Use --force to overwrite.",
+                    err=True,
+                )
+            elif output.status == WRITTEN:
+                typer.echo(f"  {output.path}")
+    for entry in result.gitignore:
+        typer.echo(f"  .gitignore: added {entry}")
 
-def _add_yaml_marker(content: str, source_rel: str) -> str:
-    """Insert YAML comment marker after the opening ``---`` in frontmatter."""
-    marker_line = f"# {MARKER_PREFIX} Source: {source_rel}"
-    if content.startswith("---\n"):
-        return f"---\n{marker_line}\n{content[4:]}"
-    return f"---\n{marker_line}\n---\n{content}"
+    typer.echo(
+        f"Done: {len(result.written)} written, {len(result.unchanged)} unchanged, "
+        f"{len(result.skipped)} skipped, {len(result.deleted)} removed."
+    )
 
 
-def _add_html_marker(content: str, source_rel: str) -> str:
-    """Prepend HTML comment marker."""
-    return f"<!-- {MARKER_PREFIX} Source: {source_rel} -->\n{content}"
+def _generate_recursive(base: Path, force: bool, jobs: Optional[int]) -> None:
+    """Generate every root under ``base`` in a process pool and summarise."""
+    from agent_pack.monorepo import discover_roots, generate_roots
 
+    roots = discover_roots(base)
+    if not roots:
+        typer.echo(f"No {AGENTPACK_DIR}/ directories found under {base}", err=True)
+        raise typer.Exit(code=1)
 
-def _write_generated(out: Path, content: str, force: bool, root: Path) -> bool:
-    """Write a generated file with overwrite protection. Returns True if written."""
-    if out.exists():
-        existing = out.read_text()
-        if not _has_marker(existing) and not force:
-            rel = out.relative_to(root)
+    typer.echo(f"Generating {len(roots)} roots...")
+    results = generate_roots(roots, force, jobs or os.cpu_count() or 1)
+    failed = [r for r in results if not r.ok]
+    for result in results:
+        rel = result.root.relative_to(base).as_posix()
+        if result.ok:
+            r = result.result
             typer.echo(
-                f"WARN: {rel} already exists and was not generated by agentpack, skipping. "
-                "Use --force to overwrite.",
-                err=True,
+                f"  {rel}: ok ({len(r.written)} written, {len(r.skipped)} skipped, "
+                f"{len(r.deleted)} removed)"
             )
-            return False
-    out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(content)
-    return True
-
-
-def _copy_supplementary(skill_src: Path, skill_out: Path) -> None:
-    """Copy supplementary directories (scripts/, references/, assets/, etc.) alongside SKILL.md."""
-    for child in skill_src.iterdir():
-        if child.is_dir():
-            dest = skill_out / child.name
-            if dest.exists():
-                shutil.rmtree(dest)
-            shutil.copytree(child, dest)
-
-
-def _cleanup_stale_generated(root: Path, agents: list) -> None:
-    """Delete agentpack-generated files before regenerating to remove stale artifacts."""
-    # Always clean up root-level generated files regardless of current agent config,
-    # so that switching agents (e.g. removing claude) removes stale CLAUDE.md.
-    for filename in ("CLAUDE.md", "AGENTS.md"):
-        f = root / filename
-        if f.exists():
-            try:
-                content = f.read_text(encoding="utf-8", errors="ignore")
-                if _has_marker(content):
-                    f.unlink()
-            except OSError:
-                pass
-
-    dirs_to_scan = []
-    if "claude" in agents:
-        dirs_to_scan.append(root / ".claude")
-    if "cursor" in agents:
-        dirs_to_scan.append(root / ".cursor" / "rules")
-        dirs_to_scan.append(root / ".cursor" / "skills")
-
-    for scan_dir in dirs_to_scan:
-        if not scan_dir.exists():
-            continue
-        for f in scan_dir.rglob("*"):
-            if f.is_file():
-                try:
-                    content = f.read_text(encoding="utf-8", errors="ignore")
-                    if _has_marker(content):
-                        f.unlink()
-                except OSError:
-                    pass
+        else:
+            typer.echo(f"  {rel}: FAILED")
+    for result in failed:
+        typer.echo(f"\n{result.root.relative_to(base).as_posix()}:", err=True)
+        typer.echo(result.error, err=True)
+
+    typer.echo(f"Done: {len(results) - len(failed)} succeeded, {len(failed)} failed.")
+    if failed:
+        raise typer.Exit(code=1)
 
 
 # ---------------------------------------------------------------------------
-# Generators
+# Commands
 # ---------------------------------------------------------------------------
 
 
-def _generate_claude(root: Path, ap_dir: Path, force: bool) -> None:
-    rules_dir = ap_dir / "rules"
-    skills_dir = ap_dir / "skills"
+@app.command()
+def generate(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Overwrite files modified outside agentpack.",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of outputs to write in parallel. Defaults to the CPU count.",
+    ),
+    recursive: bool = typer.Option(
+        False,
+        "--recursive",
+        "-r",
+        help="Generate every .agentpack/ found under the target directory.",
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Print wall time, files and bytes read and written per phase.",
+    ),
+    profile: Optional[Path] = typer.Option(
+        None,
+        "--profile",
+        help="Write a Chrome trace of the run to this JSON file.",
+    ),
+):
+    """Compile canonical rulesets into tool-specific configs."""
+    root = (path or Path.cwd()).resolve()
 
-    agents_md = rules_dir / "CLAUDE.md"
-    if agents_md.exists():
-        out = root / "CLAUDE.md"
-        content = _strip_frontmatter(agents_md.read_text())
-        content = _add_html_marker(content, ".agentpack/rules/CLAUDE.md")
-        if _write_generated(out, content, force, root):
-            typer.echo(f"  {out.relative_to(root)}")
+    if recursive:
+        if timings or profile:
+            typer.echo("--timings and --profile need a single root.", err=True)
+            raise typer.Exit(code=1)
+        _generate_recursive(root, force, jobs)
+        return
+
+    if not (timings or profile):
+        _run_generate(root, force, jobs)
+        return
+
+    from agent_pack.timings import tracing
+
+    with tracing() as tracer:
+        try:
+            with span("generate"):
+                _run_generate(root, force, jobs)
+        finally:
+            if timings:
+                typer.echo("Timings:")
+                for line in tracer.summary():
+                    typer.echo(line)
+            if profile:
+                tracer.write_trace(profile)
+                typer.echo(f"Profile written to {profile}")
 
-    for rule_file in sorted(rules_dir.glob("*.md")):
-        if rule_file.name == "CLAUDE.md":
-            continue
-        out = root / ".claude" / "rules" / rule_file.name
-        content = _add_yaml_marker(
-            rule_file.read_text(), f".agentpack/rules/{rule_file.name}"
-        )
-        if _write_generated(out, content, force, root):
-            typer.echo(f"  {out.relative_to(root)}")
-
-    if skills_dir.exists():
-        for skill_dir in sorted(d for d in skills_dir.iterdir() if d.is_dir()):
-            skill_md = _find_skill_md(skill_dir)
-            if skill_md:
-                out = root / ".claude" / "skills" / skill_dir.name / "SKILL.md"
-                content = _add_yaml_marker(
-                    skill_md.read_text(),
-                    f".agentpack/skills/{skill_dir.name}/SKILL.md",
-                )
-                if _write_generated(out, content, force, root):
-                    typer.echo(f"  {out.relative_to(root)}")
-                _copy_supplementary(skill_dir, out.parent)
-
-
-def _generate_cursor(root: Path, ap_dir: Path, agents: list, force: bool) -> None:
-    rules_dir = ap_dir / "rules"
-    skills_dir = ap_dir / "skills"
-
-    # When cursor-only: generate AGENTS.md at project root (stripped of frontmatter).
-    # When claude is also present, CLAUDE.md at root is recognised by Cursor natively.
-    if "claude" not in agents:
-        agents_md = rules_dir / "CLAUDE.md"
-        if agents_md.exists():
-            out = root / "AGENTS.md"
-            content = _strip_frontmatter(agents_md.read_text())
-            content = _add_html_marker(content, ".agentpack/rules/CLAUDE.md")
-            if _write_generated(out, content, force, root):
-                typer.echo(f"  {out.relative_to(root)}")
-
-    # Modular rules — CLAUDE.md is handled above, never goes into .cursor/rules/
-    for rule_file in sorted(rules_dir.glob("*.md")):
-        if rule_file.name == "CLAUDE.md":
-            continue
-        out = root / ".cursor" / "rules" / rule_file.name
-        content = _add_yaml_marker(
-            rule_file.read_text(), f".agentpack/rules/{rule_file.name}"
-        )
-        if _write_generated(out, content, force, root):
-            typer.echo(f"  {out.relative_to(root)}")
-
-    if "claude" not in agents and skills_dir.exists():
-        for skill_dir in sorted(d for d in skills_dir.iterdir() if d.is_dir()):
-            skill_md = _find_skill_md(skill_dir)
-            if skill_md:
-                out = root / ".cursor" / "skills" / skill_dir.name / "SKILL.md"
-                content = _add_yaml_marker(
-                    skill_md.read_text(),
-                    f".agentpack/skills/{skill_dir.name}/SKILL.md",
-                )
-                if _write_generated(out, content, force, root):
-                    typer.echo(f"  {out.relative_to(root)}")
-                _copy_supplementary(skill_dir, out.parent)
 
+@app.command()
+def check(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+):
+    """Verify that generated outputs are up to date, without writing anything."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.check(root)
 
-def _update_gitignore(root: Path, agents: list) -> None:
-    gitignore = root / ".gitignore"
-    entries = []
-    if "claude" in agents:
-        entries.append("CLAUDE.md")
-        entries.append(".claude/")
-    if "cursor" in agents:
-        entries.append(".cursor/")
-    if "cursor" in agents and "claude" not in agents:
-        entries.append("AGENTS.md")
+    if result.ok:
+        typer.echo(f"Up to date: {result.checked} outputs checked.")
+        return
+    for status, rel in result.problems:
+        typer.echo(f"  {status:<8}  {rel}")
+    typer.echo(
+        f"Out of date: {len(result.problems)} path(s). Run `agentpack generate`.",
+        err=True,
+    )
+    raise typer.Exit(code=1)
 
-    existing = gitignore.read_text() if gitignore.exists() else ""
-    lines = existing.splitlines()
 
-    added = []
-    for entry in entries:
-        if entry not in lines:
-            lines.append(entry)
-            added.append(entry)
+@app.command()
+def which(
+    files: list[str] = typer.Argument(..., help="Files to look up."),
+    path: Optional[Path] = typer.Option(
+        None,
+        "--path",
+        help="Target directory. Defaults to current directory.",
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print a JSON object mapping each file to its rules.",
+    ),
+):
+    """Show which rules apply to the given files."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        matches = api.which(root, files)
+
+    if as_json:
+        import json
+
+        data = {
+            name: None if found is None else [m.__dict__ for m in found]
+            for name, found in matches.items()
+        }
+        typer.echo(json.dumps(data, indent=2))
+        return
+
+    for name, found in matches.items():
+        if found is None:
+            typer.echo(f"WARN: {name} is outside {root}, skipping.", err=True)
+            continue
+        typer.echo(name)
+        width = max((len(m.rule) for m in found), default=0)
+        for m in found:
+            typer.echo(f"  {m.rule:<{width}}  {m.glob or '(always)'}")
 
-    if added:
-        gitignore.write_text("\n".join(lines) + "\n")
-        for e in added:
-            typer.echo(f"  .gitignore: added {e}")
 
+@app.command()
+def lint(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of worker processes. Defaults to the CPU count.",
+    ),
+):
+    """Validate rule and skill frontmatter."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.lint(root, jobs)
+
+    for issue in result.issues:
+        typer.echo(str(issue), err=issue.severity == "error")
+    warnings = len(result.issues) - len(result.errors)
+    typer.echo(
+        f"Checked {result.checked} files: {len(result.errors)} error(s), "
+        f"{warnings} warning(s)."
+    )
+    if not result.ok:
+        raise typer.Exit(code=1)
 
-# ---------------------------------------------------------------------------
-# Commands
-# ---------------------------------------------------------------------------
+
+@app.command()
+def stats(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the statistics as JSON.",
+    ),
+):
+    """Show approximate token counts of generated outputs and check the budget."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.stats(root)
+
+    if as_json:
+        import json
+
+        data = {
+            "agents": {
+                s.agent: {
+                    "always": s.always,
+                    "outputs": [o.__dict__ for o in s.outputs],
+                }
+                for s in result.agents
+            },
+            "budget": result.budget,
+            "over": result.over,
+        }
+        typer.echo(json.dumps(data, indent=2))
+    else:
+        for s in result.agents:
+            limit = result.budget.get("always")
+            budget = f" of {limit}" if limit else ""
+            typer.echo(f"{s.agent}: {s.always}{budget} tokens always loaded")
+            typer.echo(f"  {'tokens':>7}  {'loaded':>7}  {'scope':<6}  output")
+            for o in s.outputs:
+                typer.echo(f"  {o.tokens:>7}  {o.loaded:>7}  {o.scope:<6}  {o.path}")
+    for message in result.over:
+        typer.echo(f"Over budget: {message}", err=True)
+    if not result.ok:
+        raise typer.Exit(code=1)
 
 
 @app.command()
-def generate(
+def dedupe(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    threshold: float = typer.Option(
+        0.8,
+        "--threshold",
+        help="Minimum similarity (0-1) of word shingles to count as a duplicate.",
+    ),
+    min_words: int = typer.Option(
+        12,
+        "--min-words",
+        min=1,
+        help="Ignore paragraphs shorter than this.",
+    ),
+    collapse: bool = typer.Option(
+        False,
+        "--collapse",
+        help="Move duplicates in local rules into one shared rule.",
+    ),
+    into: str = typer.Option(
+        "shared.md",
+        "--into",
+        help="File name of the shared rule in .agentpack/rules/.",
+    ),
+):
+    """Report near-duplicate paragraphs across rules and skills."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.dedupe(root, threshold, min_words, collapse, into)
+
+    for warning in result.warnings:
+        typer.echo(warning, err=True)
+    for group in result.groups:
+        typer.echo(
+            f"{len(group.blocks)} copies, {group.tokens} tokens each, "
+            f"similarity {group.similarity:.2f}:"
+        )
+        for block in group.blocks:
+            typer.echo(f"  {block.location}")
+    saved = sum(group.saved for group in result.groups)
+    typer.echo(
+        f"Found {len(result.groups)} duplicated paragraph(s); "
+        f"about {saved} tokens in repeated copies."
+    )
+    for rel in result.written:
+        typer.echo(f"  {rel}")
+    if collapse:
+        typer.echo(
+            f"Collapsed into {len(result.written)} file(s). "
+            "Run `agentpack generate` to update outputs."
+        )
+
+
+@app.command()
+def watch(
     path: Optional[Path] = typer.Argument(
         None,
         help="Target directory. Defaults to current directory.",
@@ -322,43 +418,223 @@ def generate(
         "--force",
         help="Overwrite files modified outside agentpack.",
     ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of outputs to write in parallel. Defaults to the CPU count.",
+    ),
+    debounce: float = typer.Option(
+        0.2,
+        "--debounce",
+        min=0.0,
+        help="Seconds without further changes before regenerating.",
+    ),
+    poll: bool = typer.Option(
+        False,
+        "--poll",
+        help="Use stat polling even where inotify is available.",
+    ),
+    interval: float = typer.Option(
+        0.5,
+        "--interval",
+        min=0.01,
+        help="Polling interval in seconds.",
+    ),
 ):
-    """Compile canonical rulesets into tool-specific configs."""
+    """Regenerate outputs whenever rules, skills or agentpack.yaml change."""
     root = (path or Path.cwd()).resolve()
-    ap_dir = root / AGENTPACK_DIR
 
-    if not ap_dir.exists():
-        typer.echo("Not initialized. Run `agentpack init` first.", err=True)
-        raise typer.Exit(code=1)
+    def report(outcome) -> None:
+        # Configuration errors are reported; watching continues for a fix.
+        if isinstance(outcome, AgentpackError):
+            typer.echo(str(outcome), err=True)
+        else:
+            _print_generate(outcome)
+
+    def started(name: str) -> None:
+        typer.echo(f"Watching {root / AGENTPACK_DIR} ({name}). Press Ctrl+C to stop.")
+
+    try:
+        with _reported():
+            api.watch(
+                root, report, force, jobs, debounce, poll, interval, on_start=started
+            )
+    except KeyboardInterrupt:
+        typer.echo("Stopped.")
 
-    config = _load_config(ap_dir)
-    agents = config.get("agents", [])
-    use_gitignore = config.get("gitignore", True)
 
-    if not agents:
-        typer.echo("No agents configured in agentpack.yaml", err=True)
+@app.command()
+def sync(
+    remote: Optional[str] = typer.Argument(
+        None,
+        help="Remote name from agentpack.yaml or a git URL. Defaults to all remotes.",
+    ),
+    path: Optional[Path] = typer.Option(
+        None,
+        "--path",
+        help="Target directory. Defaults to current directory.",
+    ),
+    jobs: int = typer.Option(
+        4,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of remotes to fetch concurrently.",
+    ),
+    timeout: float = typer.Option(
+        300,
+        "--timeout",
+        min=1,
+        help="Seconds allowed for fetching each remote.",
+    ),
+):
+    """Pull shared configurations from a remote repository."""
+    from agent_pack.remotes import KEPT
+
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.sync(root, remote, jobs, timeout)
+
+    typer.echo(f"Syncing {len(result.remotes)} remote(s)...")
+    for fetched in result.remotes:
+        name = fetched.remote.name
+        if not fetched.ok:
+            typer.echo(f"  {name}: FAILED: {fetched.error}", err=True)
+            continue
+        if fetched.skipped:
+            typer.echo(f"  {name}: {fetched.revision[:12]} (up to date)")
+            continue
+        suffix = " (inherited)" if result.inherit else ""
+        typer.echo(f"  {name}: {fetched.revision[:12]}{suffix}")
+        for action, rel in fetched.changes:
+            note = " (local override)" if action == KEPT else ""
+            typer.echo(f"    {action} {rel}{note}")
+
+    failed = len(result.failed)
+    typer.echo(f"Done: {len(result.remotes) - failed} synced, {failed} failed.")
+    if failed:
         raise typer.Exit(code=1)
 
-    typer.echo("Generating...")
-    _cleanup_stale_generated(root, agents)
 
-    if "claude" in agents:
-        typer.echo("Claude:")
-        _generate_claude(root, ap_dir, force)
+@app.command()
+def pack(
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Bundle file to write. Defaults to <directory>.agentpack.zip.",
+    ),
+):
+    """Pack .agentpack/ rules and skills into a single-file bundle."""
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.pack(root, output)
 
-    if "cursor" in agents:
-        typer.echo("Cursor:")
-        _generate_cursor(root, ap_dir, agents, force)
+    typer.echo(f"Packed {len(result.entries)} files into {result.bundle}")
+    typer.echo(f"  sha256: {result.sha256}")
 
-    if use_gitignore:
-        _update_gitignore(root, agents)
 
-    typer.echo("Done.")
+@app.command()
+def unpack(
+    bundle: Path = typer.Argument(..., help="Bundle file to unpack."),
+    path: Optional[Path] = typer.Argument(
+        None,
+        help="Target directory. Defaults to current directory.",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Overwrite local files that differ from the bundle.",
+    ),
+    list_only: bool = typer.Option(
+        False,
+        "--list",
+        help="Print the bundle index without unpacking anything.",
+    ),
+):
+    """Unpack a bundle's rules and skills into .agentpack/."""
+    if list_only:
+        with _reported():
+            entries = api.bundle_index(bundle)
+        for entry in entries:
+            description = entry.frontmatter.get("description", "")
+            line = f"{entry.hash[:12]}  {entry.size:>8}  {entry.path}"
+            typer.echo(f"{line}  {description}".rstrip())
+        return
+
+    root = (path or Path.cwd()).resolve()
+    with _reported():
+        result = api.unpack(root, bundle, force)
+
+    for rel in result.skipped:
+        typer.echo(
+            f"WARN: {rel} differs from the bundle, skipping. Use --force to overwrite.",
+            err=True,
+        )
+    for rel in result.written:
+        typer.echo(f"  {rel}")
+    typer.echo(
+        f"Done: {len(result.written)} written, {len(result.unchanged)} unchanged, "
+        f"{len(result.skipped)} skipped."
+    )
 
 
 @app.command()
-def sync(
-    remote: Optional[str] = typer.Argument(None, help="Remote repository URL."),
+def serve(
+    socket: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        help="Socket path. Defaults to $AGENTPACK_SOCKET or the runtime directory.",
+    ),
+    idle_timeout: Optional[float] = typer.Option(
+        None,
+        "--idle-timeout",
+        min=1,
+        help="Exit after this many seconds without a request.",
+    ),
+    status: bool = typer.Option(
+        False,
+        "--status",
+        help="Report whether a daemon is running, then exit.",
+    ),
+    stop: bool = typer.Option(
+        False,
+        "--stop",
+        help="Stop the running daemon, then exit.",
+    ),
 ):
-    """Pull shared configurations from a remote repository."""
-    print("agentpack sync: not yet implemented")
+    """Keep sources in memory and answer generate, check and which for the CLI."""
+    from agent_pack import serve as daemon
+
+    path = socket or daemon.socket_path()
+    if status:
+        info = daemon.ping(path)
+        if info is None:
+            typer.echo(f"No daemon on {path}")
+            raise typer.Exit(code=1)
+        typer.echo(
+            f"Daemon {info['version']} on {path}: pid {info['pid']}, "
+            f"up {info['uptime']:.0f}s"
+        )
+        return
+    if stop:
+        if not daemon.stop(path):
+            typer.echo(f"No daemon on {path}", err=True)
+            raise typer.Exit(code=1)
+        typer.echo(f"Stopped daemon on {path}")
+        return
+
+    typer.echo(f"Serving on {path} (pid {os.getpid()}). Stop with Ctrl-C.")
+    try:
+        daemon.serve(path, idle_timeout)
+    except RuntimeError as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,275 @@
+"""Near-duplicate paragraphs across rules and skills, found with MinHash and LSH.
+
+Every artifact is split into blocks: paragraphs separated by blank lines, with
+fenced code kept whole. Each block becomes a set of word shingles, summarised by a
+MinHash signature whose agreement rate estimates the Jaccard similarity of two
+sets. Signatures are cut into bands and hashed into buckets (locality-sensitive
+hashing), so only blocks sharing a bucket are compared. The work grows with the
+number of blocks plus the number of candidate pairs instead of with every pair,
+and candidates are confirmed with their exact similarity.
+
+Groups of confirmed duplicates can be collapsed: the copies in local rules are
+removed and one copy moves into a shared rule with the same scope.
+"""
+
+import json
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.artifacts import MAIN, SKILL, Artifact, ArtifactSet
+from agent_pack.filesync import write_atomic
+from agent_pack.paths import rule_patterns
+from agent_pack.stats import estimate_tokens
+
+SHINGLE_WORDS = 5
+NUM_PERM = 32
+BANDS = 8
+
+_WORD = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+
+
+@dataclass
+class Block:
+    """A paragraph of ``artifact`` spanning ``lines`` (1-based, end inclusive)."""
+
+    artifact: Artifact
+    lines: tuple[int, int]
+    text: str
+    shingles: frozenset[int] = field(default=frozenset(), repr=False)
+
+    @property
+    def location(self) -> str:
+        return f"{self.artifact.source_rel}:{self.lines[0]}"
+
+
+@dataclass
+class DuplicateGroup:
+    """Blocks whose pairwise similarity chains reach ``threshold``; the first is
+    the copy that collapsing keeps.
+    """
+
+    blocks: list[Block]
+    similarity: float
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.blocks[0].text)
+
+    @property
+    def saved(self) -> int:
+        """Tokens saved by keeping a single copy."""
+        return self.tokens * (len(self.blocks) - 1)
+
+
+def split_blocks(artifact: Artifact) -> list[Block]:
+    """Paragraphs of the artifact's body; fenced code blocks are never split."""
+    lines = artifact.text.split("\n")
+    start = 0
+    if lines and lines[0].strip() == "---":
+        for i in range(1, len(lines)):
+            if lines[i].strip() == "---":
+                start = i + 1
+                break
+
+    blocks = []
+    current: list[int] = []
+    fenced = False
+    for i in range(start, len(lines)):
+        line = lines[i]
+        if line.lstrip().startswith(("```", "~~~")):
+            fenced = not fenced
+        if not line.strip() and not fenced:
+            if current:
+                blocks.append(current)
+            current = []
+        else:
+            current.append(i)
+    if current:
+        blocks.append(current)
+    return [
+        Block(artifact, (b[0] + 1, b[-1] + 1), "\n".join(lines[b[0] : b[-1] + 1]))
+        for b in blocks
+    ]
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> frozenset[int]:
+    """Hashes of the ``k``-word windows of ``text``, case-insensitive."""
+    words = [w.lower() for w in _WORD.findall(text)]
+    if len(words) <= k:
+        return frozenset([zlib.crc32(" ".join(words).encode())])
+    return frozenset(
+        zlib.crc32(" ".join(words[i : i + k]).encode())
+        for i in range(len(words) - k + 1)
+    )
+
+
+def _permutations(seed: int = 1) -> list[tuple[int, int]]:
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(NUM_PERM)]
+
+
+def signature(items: frozenset[int], perms: list[tuple[int, int]]) -> tuple:
+    """MinHash signature: the minimum of each universal hash over ``items``."""
+    return tuple(min([(a * x + b) % _PRIME for x in items]) for a, b in perms)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_duplicates(
+    artifacts: ArtifactSet, threshold: float = 0.8, min_words: int = 12
+) -> list[DuplicateGroup]:
+    """Groups of blocks from different artifacts with similarity >= ``threshold``.
+
+    Blocks shorter than ``min_words`` words are ignored, so headings and short
+    list items do not count as duplicates. Groups are sorted by tokens saved.
+    """
+    blocks = []
+    for artifact in artifacts:
+        for block in split_blocks(artifact):
+            if len(_WORD.findall(block.text)) >= min_words:
+                block.shingles = shingles(block.text)
+                blocks.append(block)
+
+    perms = _permutations()
+    rows = NUM_PERM // BANDS
+    buckets: dict[tuple, list[int]] = {}
+    for i, block in enumerate(blocks):
+        sig = signature(block.shingles, perms)
+        for band in range(BANDS):
+            key = (band, sig[band * rows : (band + 1) * rows])
+            buckets.setdefault(key, []).append(i)
+
+    parent = list(range(len(blocks)))
+    edges: list[tuple[int, float]] = []
+    checked = set()
+    for members in buckets.values():
+        for n, i in enumerate(members):
+            for j in members[n + 1 :]:
+                if (i, j) in checked or blocks[i].artifact is blocks[j].artifact:
+                    continue
+                checked.add((i, j))
+                score = jaccard(blocks[i].shingles, blocks[j].shingles)
+                if score >= threshold:
+                    ri, rj = _find(parent, i), _find(parent, j)
+                    parent[max(ri, rj)] = min(ri, rj)
+                    edges.append((i, score))
+
+    groups: dict[int, list[Block]] = {}
+    for i, block in enumerate(blocks):
+        groups.setdefault(_find(parent, i), []).append(block)
+    similarity: dict[int, float] = {}
+    for i, score in edges:
+        root = _find(parent, i)
+        similarity[root] = min(score, similarity.get(root, 1.0))
+    found = [
+        DuplicateGroup(members, similarity[root])
+        for root, members in groups.items()
+        if len(members) > 1
+    ]
+    found.sort(key=lambda g: (-g.saved, g.blocks[0].location))
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Collapsing
+# ---------------------------------------------------------------------------
+
+
+def _scope(artifact: Artifact) -> Optional[tuple[str, ...]]:
+    """Sorted `paths:` globs of a path-scoped rule, or None if always loaded."""
+    if artifact.kind == MAIN or artifact.frontmatter.get("alwaysApply"):
+        return None
+    return tuple(sorted(rule_patterns(artifact))) or None
+
+
+def _shared_text(scope: Optional[tuple[str, ...]], blocks: list[str]) -> str:
+    head = "---\ndescription: Guidance shared by several rules\n"
+    if scope:
+        head += f"paths: {json.dumps(list(scope))}\n"
+    return head + "---\n\n" + "\n\n".join(blocks) + "\n"
+
+
+def collapse(
+    rules_dir: Path, artifacts: ArtifactSet, groups: list[DuplicateGroup], into: str
+) -> list[Path]:
+    """Move one copy of each group into a shared rule and delete the others.
+
+    Only copies in rules under ``rules_dir`` are touched; skills and inherited
+    packs keep theirs. A group needs two such copies to be collapsed. The shared
+    rule is always loaded if any copy was, and otherwise applies to the union of
+    the copies' `paths:`; groups with different scopes go to ``<into>-<n>.md``.
+    Returns the files written.
+    """
+    stem = into[:-3] if into.endswith(".md") else into
+    targets: dict[Optional[tuple], Path] = {}
+    existing = {a.source: a for a in artifacts.rules}
+
+    def target(scope: Optional[tuple]) -> Path:
+        if scope not in targets:
+            names = [f"{stem}.md"] if scope is None else []
+            names += (f"{stem}-{n}.md" for n in range(1, len(existing) + 2))
+            for name in names:
+                path = rules_dir / name
+                if path in targets.values():
+                    continue
+                current = existing.get(path)
+                if current is None and not path.exists():
+                    break
+                if current is not None and _scope(current) == scope:
+                    break
+            targets[scope] = path
+        return targets[scope]
+
+    removals: dict[Path, list[tuple[int, int]]] = {}
+    additions: dict[Path, list[str]] = {}
+    for group in groups:
+        local = [
+            b
+            for b in group.blocks
+            if b.artifact.kind != SKILL and b.artifact.source.parent == rules_dir
+        ]
+        if len(local) < 2:
+            continue
+        scopes = [_scope(b.artifact) for b in local]
+        if None in scopes:
+            scope = None
+        else:
+            scope = tuple(sorted({p for s in scopes for p in s}))
+        path = target(scope)
+        if not any(b.artifact.source == path for b in local):
+            additions.setdefault(path, []).append(local[0].text)
+        for b in local:
+            if b.artifact.source != path:
+                removals.setdefault(b.artifact.source, []).append(b.lines)
+
+    written = []
+    for source, spans in removals.items():
+        lines = source.read_text().split("\n")
+        for first, last in sorted(spans, reverse=True):
+            del lines[first - 1 : last]
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).rstrip("\n") + "\n"
+        write_atomic(source, text.encode("utf-8"))
+        written.append(source)
+    for path, texts in additions.items():
+        if path.exists():
+            text = path.read_text().rstrip("\n") + "\n\n" + "\n\n".join(texts) + "\n"
+        else:
+            scope = next(s for s, p in targets.items() if p == path)
+            text = _shared_text(scope, texts)
+        write_atomic(path, text.encode("utf-8"))
+        written.append(path)
+    return written
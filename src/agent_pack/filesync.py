@@ -0,0 +1,248 @@
+"""Delta synchronisation of supplementary skill directories."""
+
+import hashlib
+import itertools
+import os
+import shutil
+import stat
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent_pack.timings import record_read, record_written
+
+_CHUNK = 1 << 20
+
+# Distinguishes the temporary files of concurrent writes within one process.
+_tmp_ids = itertools.count()
+
+COPY = "copy"
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+SYMLINK = "symlink"
+ASSET_MODES = (COPY, HARDLINK, REFLINK, SYMLINK)
+
+# ioctl(2) request that clones a whole file on copy-on-write filesystems (Linux).
+FICLONE = 0x40049409
+
+
+@dataclass
+class SyncStats:
+    """Files copied, deleted and left untouched by :func:`sync_tree`."""
+
+    copied: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+
+def _walk_files(directory: Path, follow: bool = True) -> dict[str, os.stat_result]:
+    """Stat every file under ``directory``; ``follow=False`` reports symlinks."""
+    files = {}
+    if not directory.is_dir():
+        return files
+    stat_fn = os.stat if follow else os.lstat
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                files[Path(path).relative_to(directory).as_posix()] = stat_fn(path)
+            except OSError:
+                continue
+    return files
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 hex digest of the file at ``path``, read in chunks."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+            size += len(chunk)
+    record_read(size)
+    return h.hexdigest()
+
+
+def _copy_range(fsrc, fdst, size: int) -> None:
+    """Copy ``size`` bytes in the kernel where possible.
+
+    Tries ``os.copy_file_range``, then ``os.sendfile``, then a userspace copy,
+    which reads to the end of the file whatever its size.
+    """
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    for fn in ("copy_file_range", "sendfile"):
+        kernel_copy = getattr(os, fn, None)
+        if kernel_copy is None:
+            continue
+        copied = 0
+        try:
+            while copied < size:
+                if fn == "copy_file_range":
+                    n = kernel_copy(infd, outfd, size - copied)
+                else:
+                    n = kernel_copy(outfd, infd, copied, size - copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied == size:
+                return
+        except OSError:
+            pass
+        # Unsupported for this pair of files (e.g. across filesystems on old
+        # kernels), or it stopped short of ``size``, e.g. because the file
+        # shrank; restart with the next strategy.
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+    shutil.copyfileobj(fsrc, fdst, _CHUNK)
+
+
+def _prepare(dst: Path) -> Path:
+    """Clear a directory in the way of ``dst`` and return a temporary sibling path.
+
+    The name is unique per process and call, so concurrent writers of the same
+    output, e.g. ``watch`` and a git hook, never share a temporary file.
+    """
+    if dst.is_dir() and not dst.is_symlink():
+        shutil.rmtree(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    return dst.with_name(f".{dst.name}.{os.getpid()}-{next(_tmp_ids)}.agentpack-tmp")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temporary sibling and ``os.replace``.
+
+    An existing file keeps its permission bits.
+    """
+    tmp = _prepare(path)
+    try:
+        tmp.write_bytes(data)
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+        record_written(len(data))
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """Copy ``src`` to ``dst`` atomically, preserving mode and timestamps."""
+    tmp = _prepare(dst)
+    try:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            size = os.fstat(fsrc.fileno()).st_size
+            _copy_range(fsrc, fdst, size)
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+        record_read(size)
+        record_written(size)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _link_file(src: Path, dst: Path, mode: str) -> None:
+    """Hardlink, reflink or symlink ``src`` at ``dst``, replacing it atomically.
+
+    Raises OSError when the filesystem or platform cannot provide the link.
+    """
+    tmp = _prepare(dst)
+    try:
+        if mode == HARDLINK:
+            os.link(src, tmp)
+        elif mode == SYMLINK:
+            os.symlink(os.path.relpath(src, dst.parent), tmp)
+        else:
+            import fcntl
+
+            with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+        # Links share the source's data blocks: a new file, but no bytes written.
+        record_written(0)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def place_file(src: Path, dst: Path, mode: str = COPY) -> None:
+    """Materialise ``src`` at ``dst`` using ``mode``, copying if linking fails.
+
+    Linking fails across devices, on filesystems without copy-on-write support
+    (reflink) and on platforms where symlinks need extra privileges.
+    """
+    if mode != COPY:
+        try:
+            _link_file(src, dst, mode)
+            return
+        except (OSError, ImportError):
+            pass
+    copy_file(src, dst)
+
+
+def _is_current(
+    src: Path, dst: Path, st: os.stat_result, existing: os.stat_result, mode: str
+) -> bool:
+    """Return True if ``dst``, with lstat ``existing``, already provides ``src``."""
+    if stat.S_ISLNK(existing.st_mode):
+        return mode == SYMLINK and os.readlink(dst) == os.path.relpath(src, dst.parent)
+    linked = (existing.st_dev, existing.st_ino) == (st.st_dev, st.st_ino)
+    if mode == HARDLINK:
+        if linked:
+            return True
+        if existing.st_dev == st.st_dev:
+            return False
+        # The output lives on another device, so a copy is the best available.
+    elif mode == SYMLINK or linked:
+        # A copy that should become a symlink, or a hardlink that must become a copy.
+        return False
+    if existing.st_size != st.st_size:
+        return False
+    if existing.st_mtime_ns == st.st_mtime_ns:
+        return True
+    if file_hash(src) == file_hash(dst):
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+        return True
+    return False
+
+
+def _prune_empty_dirs(directory: Path) -> None:
+    for dirpath, _, _ in sorted(os.walk(directory), reverse=True):
+        if Path(dirpath) != directory:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+
+
+def sync_tree(src: Path, dest: Path, mode: str = COPY) -> SyncStats:
+    """Make ``dest`` mirror ``src``, touching only files that differ.
+
+    In copy and reflink mode a file is skipped when size and mtime match. When only
+    the mtime differs the contents are compared by hash, and identical files just
+    get their mtime restored. Hardlinks and symlinks are skipped when they already
+    point at the source. Files missing from ``src`` are deleted from ``dest``.
+    """
+    stats = SyncStats()
+    src_files = _walk_files(src)
+    dest_files = _walk_files(dest, follow=False)
+
+    for rel, st in src_files.items():
+        s, d = src / rel, dest / rel
+        existing = dest_files.get(rel)
+        if existing is not None and _is_current(s, d, st, existing, mode):
+            stats.unchanged += 1
+            continue
+        place_file(s, d, mode)
+        stats.copied += 1
+
+    removed = [rel for rel in dest_files if rel not in src_files]
+    for rel in removed:
+        (dest / rel).unlink(missing_ok=True)
+        stats.deleted += 1
+    if removed:
+        _prune_empty_dirs(dest)
+    return stats
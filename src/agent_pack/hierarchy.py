@@ -0,0 +1,159 @@
+"""Hierarchy resolution: layer inherited packs beneath the repo's `.agentpack/`.
+
+From lowest to highest precedence the levels are: synced remotes (global, then org,
+in reverse configuration order), parent projects (farthest first), the repo pack and
+the user's ``~/.config/agentpack/``. A rule overrides rules with the same filename
+in lower levels, and a skill overrides skills with the same name.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.artifacts import (
+    AGENTPACK_DIR,
+    MAIN,
+    RULE,
+    SKILL,
+    ArtifactSet,
+    index_pack,
+    load_artifact,
+    prune_cache,
+)
+
+USER = "user"
+PROJECT = "project"
+REPO = "repo"
+REMOTE = "remote"
+
+
+@dataclass(frozen=True)
+class Level:
+    """One pack in the hierarchy; ``label`` prefixes its artifacts' source paths."""
+
+    kind: str
+    pack: Path
+    label: str
+
+
+def user_pack_dir() -> Path:
+    """The per-user pack: ``$AGENTPACK_CONFIG_DIR`` or ``~/.config/agentpack``."""
+    override = os.environ.get("AGENTPACK_CONFIG_DIR")
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CONFIG_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".config") / "agentpack"
+
+
+def _display(path: Path, root: Path) -> str:
+    """``path`` relative to ``root`` or the home directory, for source labels."""
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        pass
+    try:
+        return "~/" + path.relative_to(Path.home()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def remote_levels(ap_dir: Path, config: dict) -> tuple[list[Level], list[str]]:
+    """Checkouts of the synced remotes, lowest precedence first.
+
+    Returns the levels and the names of synced remotes whose checkout is missing
+    from the cache.
+    """
+    from agent_pack.remotes import (
+        load_sync_state,
+        pack_dir,
+        remote_checkout,
+        resolve_remotes,
+    )
+
+    state = load_sync_state(ap_dir)
+    levels, missing = [], []
+    for remote in reversed(resolve_remotes(config, None)):
+        entry = state["remotes"].get(remote.name)
+        if not entry or not entry.get("revision"):
+            continue
+        checkout = remote_checkout(remote, entry["revision"])
+        if not checkout.is_dir():
+            missing.append(remote.name)
+            continue
+        levels.append(
+            Level(REMOTE, pack_dir(checkout, remote.path), f"remote:{remote.name}")
+        )
+    return levels, missing
+
+
+def project_levels(root: Path) -> list[Level]:
+    """Packs of the directories above ``root``, farthest first."""
+    levels = []
+    for parent in reversed(root.parents):
+        pack = parent / AGENTPACK_DIR
+        if pack.is_dir():
+            levels.append(Level(PROJECT, pack, os.path.relpath(pack, root)))
+    return levels
+
+
+def resolve_levels(
+    root: Path, ap_dir: Path, config: dict
+) -> tuple[list[Level], list[str]]:
+    """All levels for ``root``, lowest precedence first, and missing remotes."""
+    levels, missing = remote_levels(ap_dir, config)
+    levels += project_levels(root)
+    levels.append(Level(REPO, ap_dir, AGENTPACK_DIR))
+    user = user_pack_dir()
+    if user.is_dir() and user.resolve() != ap_dir.resolve():
+        levels.append(Level(USER, user, _display(user, root)))
+    return levels, missing
+
+
+def resolve_artifacts(levels: list[Level], cache: Optional[dict] = None) -> ArtifactSet:
+    """Merge ``levels`` (lowest precedence first) into one effective artifact set.
+
+    Only each level's index is consulted while resolving, and only the winning
+    sources are read. The main instructions file comes from the repo pack, or else
+    from the nearest parent project that has one.
+    """
+    rules: dict[str, tuple[Level, Path]] = {}
+    skills: dict[str, tuple[Level, Path, tuple[Path, ...]]] = {}
+    main: Optional[tuple[Level, Path]] = None
+    for level in levels:
+        index = index_pack(level.pack)
+        for f in index.rules:
+            rules[f.name] = (level, f)
+        for name, skill_md, supplementary in index.skills:
+            skills[name] = (level, skill_md, supplementary)
+        if index.main and level.kind in (PROJECT, REPO):
+            if main is None or main[0].kind != REPO:
+                main = (level, index.main)
+
+    main_artifact = None
+    if main:
+        level, path = main
+        main_artifact = load_artifact(
+            cache, MAIN, "CLAUDE.md", path, f"{level.label}/rules/CLAUDE.md"
+        )
+    artifacts = ArtifactSet(
+        main_artifact,
+        tuple(
+            load_artifact(cache, RULE, name, path, f"{level.label}/rules/{name}")
+            for name, (level, path) in sorted(rules.items())
+        ),
+        tuple(
+            load_artifact(
+                cache,
+                SKILL,
+                name,
+                skill_md,
+                f"{level.label}/skills/{name}/SKILL.md",
+                supplementary,
+            )
+            for name, (level, skill_md, supplementary) in sorted(skills.items())
+        ),
+    )
+    if cache is not None:
+        prune_cache(cache, artifacts)
+    return artifacts
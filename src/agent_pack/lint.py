@@ -0,0 +1,296 @@
+"""Frontmatter validation of rules and skills against the field tables of the spec.
+
+Each source is checked on its own, so files are linted on a pool of worker
+processes. Results are cached in ``.agentpack/.lint.json`` by file hash, together
+with the kind and name the checks depend on, so a repeated run only lints the
+files that changed.
+"""
+
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.artifacts import MAIN, SKILL, Artifact, ArtifactSet, load_yaml
+from agent_pack.filesync import write_atomic
+from agent_pack.timings import record_read
+
+LINT_FILE = ".lint.json"
+# Bump when the checks change, so cached results are not reused.
+LINT_VERSION = 1
+
+ERROR = "error"
+WARNING = "warning"
+
+RULE_FIELDS = frozenset({"description", "paths", "alwaysApply"})
+SKILL_FIELDS = frozenset(
+    {
+        # Common
+        "name",
+        "description",
+        # Claude
+        "argument-hint",
+        "user-invocable",
+        "allowed-tools",
+        "model",
+        "context",
+        "agent",
+        "hooks",
+        "disable-model-invocation",
+        # Cursor
+        "license",
+        "compatibility",
+        "metadata",
+    }
+)
+_BOOLEAN = {
+    "alwaysApply",
+    "user-invocable",
+    "disable-model-invocation",
+}
+_STRING = {
+    "description",
+    "argument-hint",
+    "model",
+    "agent",
+    "license",
+    "compatibility",
+}
+_SKILL_NAME = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Fewer files than this are linted in-process: starting workers costs more.
+MIN_PARALLEL = 64
+
+
+@dataclass(frozen=True)
+class Issue:
+    """A problem in ``path``; ``line`` is 1-based, or None for the whole file."""
+
+    path: str
+    severity: str
+    message: str
+    line: Optional[int] = None
+
+    def __str__(self) -> str:
+        where = f"{self.path}:{self.line}" if self.line else self.path
+        return f"{where}: {self.severity}: {self.message}"
+
+
+@dataclass
+class LintResult:
+    """Files checked, how many came from the cache, and the issues found."""
+
+    checked: int = 0
+    cached: int = 0
+    issues: list[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> list[Issue]:
+        return [i for i in self.issues if i.severity == ERROR]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _frontmatter(text: str) -> Optional[str]:
+    """Raw frontmatter of ``text``, or None; raises ValueError if the closing
+    ``---`` is missing.
+    """
+    lines = text.split("\n")
+    if not lines or lines[0].rstrip() != "---":
+        return None
+    for i in range(1, len(lines)):
+        if lines[i].rstrip() == "---":
+            return "\n".join(lines[1:i])
+    raise ValueError("frontmatter is not closed with '---'")
+
+
+def _field_lines(raw: str) -> dict[str, int]:
+    """Line numbers in the file of the top-level keys of frontmatter ``raw``."""
+    lines = {}
+    for i, line in enumerate(raw.split("\n")):
+        match = re.match(r"([^\s#:'\"][^:]*?)\s*:", line)
+        if match:
+            lines.setdefault(match.group(1), i + 2)
+    return lines
+
+
+def lint_source(kind: str, name: str, source_rel: str, text: str) -> list[Issue]:
+    """Issues of one source. ``name`` is the rule file or skill directory name."""
+    import yaml
+
+    lines: dict[str, int] = {}
+
+    def issue(severity: str, message: str, key: Optional[str] = None) -> Issue:
+        return Issue(source_rel, severity, message, lines.get(key) if key else None)
+
+    try:
+        raw = _frontmatter(text)
+    except ValueError as exc:
+        return [Issue(source_rel, ERROR, str(exc), 1)]
+    if raw is None:
+        if kind == MAIN:
+            return []
+        return [issue(ERROR, "missing frontmatter")]
+    try:
+        meta = load_yaml(raw)
+    except yaml.YAMLError as exc:
+        mark = getattr(exc, "problem_mark", None)
+        problem = getattr(exc, "problem", None) or str(exc).split("\n")[0]
+        line = mark.line + 2 if mark is not None else 1
+        message = f"invalid YAML in frontmatter: {problem}"
+        return [Issue(source_rel, ERROR, message, line)]
+    if meta is None:
+        meta = {}
+    if not isinstance(meta, dict):
+        return [Issue(source_rel, ERROR, "frontmatter must be a mapping of fields", 2)]
+
+    lines.update(_field_lines(raw))
+    issues = []
+    known = SKILL_FIELDS if kind == SKILL else RULE_FIELDS
+    for key in meta:
+        if key not in known:
+            issues.append(issue(WARNING, f"unknown field {key!r}", key))
+    for key, value in meta.items():
+        if key in _BOOLEAN and not isinstance(value, bool):
+            issues.append(issue(ERROR, f"{key!r} must be true or false", key))
+        elif key in _STRING and value is not None and not isinstance(value, str):
+            issues.append(issue(ERROR, f"{key!r} must be a string", key))
+
+    if kind == SKILL:
+        skill_name = meta.get("name")
+        if not skill_name:
+            issues.append(issue(ERROR, "missing required field 'name'"))
+        elif not isinstance(skill_name, str) or not _SKILL_NAME.fullmatch(skill_name):
+            issues.append(
+                issue(
+                    ERROR,
+                    f"name {skill_name!r} must use lowercase letters, numbers "
+                    "and hyphens",
+                    "name",
+                )
+            )
+        elif skill_name != name:
+            issues.append(
+                issue(
+                    ERROR,
+                    f"name {skill_name!r} does not match directory {name!r}",
+                    "name",
+                )
+            )
+        if meta.get("context") not in (None, "fork"):
+            issues.append(issue(ERROR, "'context' must be 'fork'", "context"))
+        if "agent" in meta and meta.get("context") != "fork":
+            issues.append(
+                issue(WARNING, "'agent' has no effect without context: fork", "agent")
+            )
+        if "metadata" in meta and not isinstance(meta["metadata"], dict):
+            issues.append(issue(ERROR, "'metadata' must be a mapping", "metadata"))
+        return sorted(issues, key=_by_line)
+
+    if kind != MAIN and not (
+        isinstance(meta.get("description"), str) and meta["description"].strip()
+    ):
+        issues.append(issue(ERROR, "missing required field 'description'"))
+    paths = meta.get("paths")
+    if paths is not None:
+        patterns = [paths] if isinstance(paths, str) else paths
+        if not isinstance(patterns, list) or not all(
+            isinstance(p, str) for p in patterns
+        ):
+            issues.append(
+                issue(ERROR, "'paths' must be a glob or a list of globs", "paths")
+            )
+        elif not any(p.strip() for p in patterns):
+            issues.append(
+                issue(WARNING, "'paths' is empty, so the rule always applies", "paths")
+            )
+    return sorted(issues, key=_by_line)
+
+
+def _by_line(issue: Issue) -> int:
+    return issue.line or 0
+
+
+def _lint_args(args: tuple[str, str, str, str]) -> list[Issue]:
+    return lint_source(*args)
+
+
+class LintCache:
+    """Issues keyed by ``kind:name:hash``, read from and saved to ``LINT_FILE``."""
+
+    def __init__(self, path: Path, entries: dict):
+        self.path = path
+        self.entries = entries
+        self.used: dict[str, list] = {}
+
+    @classmethod
+    def load(cls, ap_dir: Path) -> "LintCache":
+        path = ap_dir / LINT_FILE
+        entries: dict = {}
+        try:
+            text = path.read_text()
+            record_read(len(text))
+            data = json.loads(text)
+            if data.get("version") == LINT_VERSION:
+                entries = data.get("results", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return cls(path, entries)
+
+    @staticmethod
+    def key(artifact: Artifact) -> str:
+        return f"{artifact.kind}:{artifact.name}:{artifact.hash}"
+
+    def save(self) -> None:
+        """Keep the results of the files linted by this run, if any changed."""
+        if self.used == self.entries:
+            return
+        data = {"version": LINT_VERSION, "results": self.used}
+        text = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+        try:
+            write_atomic(self.path, text.encode("utf-8"))
+        except OSError:
+            pass
+
+
+def lint_artifacts(
+    ap_dir: Path, artifacts: ArtifactSet, jobs: Optional[int] = None
+) -> LintResult:
+    """Lint every artifact, reusing cached results for unchanged files.
+
+    Files missing from the cache are linted on up to ``jobs`` worker processes
+    (default: CPU count) when there are enough of them to pay for the workers.
+    """
+    cache = LintCache.load(ap_dir)
+    result = LintResult()
+    todo = []
+    for artifact in artifacts:
+        result.checked += 1
+        key = cache.key(artifact)
+        if key in cache.entries:
+            cache.used[key] = cache.entries[key]
+            result.cached += 1
+        else:
+            todo.append(artifact)
+
+    args = [(a.kind, a.name, a.source_rel, a.text) for a in todo]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(args) >= MIN_PARALLEL:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(jobs, len(args) // (MIN_PARALLEL // 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            linted = list(pool.map(_lint_args, args, chunksize=16))
+    else:
+        linted = [_lint_args(a) for a in args]
+    for artifact, issues in zip(todo, linted):
+        cache.used[cache.key(artifact)] = [asdict(i) for i in issues]
+
+    for artifact in artifacts:
+        result.issues += [Issue(**i) for i in cache.used[cache.key(artifact)]]
+    cache.save()
+    return result
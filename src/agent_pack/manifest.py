@@ -0,0 +1,183 @@
+"""Generation manifest: hashes of the sources read and outputs written by `generate`."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.filesync import write_atomic
+from agent_pack.timings import record_read
+
+STATE_FILE = ".state.json"
+STATE_VERSION = 2
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(content: str) -> str:
+    return hash_bytes(content.encode("utf-8"))
+
+
+def tree_listing(directory: Path) -> dict[str, list]:
+    """Map the relative path of every file under ``directory`` to ``[size, mtime_ns]``.
+
+    Only stat calls are made, so listings stay cheap for large asset trees.
+    """
+    listing = {}
+    for f in sorted(directory.rglob("*")):
+        if f.is_file():
+            st = f.stat()
+            listing[f.relative_to(directory).as_posix()] = [st.st_size, st.st_mtime_ns]
+    return listing
+
+
+def tree_signature(directory: Path) -> str:
+    """Hash of relative path, size and mtime of every file under ``directory``."""
+    h = hashlib.sha256()
+    for rel, (size, mtime_ns) in tree_listing(directory).items():
+        h.update(f"{rel}\0{size}\0{mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _stat_key(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def matches_stat(path: Path, size: Optional[int], mtime_ns: Optional[int]) -> bool:
+    """Return True if ``path`` still has the size and mtime it was recorded with."""
+    key = _stat_key(path)
+    return key is not None and list(key) == [size, mtime_ns]
+
+
+class Manifest:
+    """State of the previous `generate` run plus what the current run produces.
+
+    ``outputs`` maps root-relative output paths to the hash of the generated content
+    and the stat key of the file as written, so an unchanged output is recognised
+    without rewriting it. ``dirs`` does the same for copied supplementary directories
+    and lists every file copied into them. Together they form the ledger of files
+    agentpack owns, which drives stale-output cleanup.
+    """
+
+    def __init__(self, path: Path, previous: dict):
+        self.path = path
+        self.previous = previous
+        self.sources: dict[str, str] = {}
+        self.outputs: dict[str, dict] = {}
+        self.dirs: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, ap_dir: Path) -> "Manifest":
+        path = ap_dir / STATE_FILE
+        previous: dict = {}
+        try:
+            text = path.read_text()
+            record_read(len(text))
+            data = json.loads(text)
+            if isinstance(data, dict) and data.get("version") == STATE_VERSION:
+                previous = data
+        except (OSError, ValueError):
+            pass
+        return cls(path, previous)
+
+    @property
+    def has_ledger(self) -> bool:
+        """True if a previous run's manifest was loaded."""
+        return bool(self.previous)
+
+    def add_source(self, source_rel: str, digest: str) -> None:
+        self.sources[source_rel] = digest
+
+    # -- Generated files ----------------------------------------------------
+
+    def is_current(self, rel: str, digest: str, out: Path) -> bool:
+        """Return True if ``out`` already holds content hashing to ``digest``."""
+        prev = self.previous.get("outputs", {}).get(rel)
+        if not prev or prev.get("hash") != digest:
+            return False
+        if not out.exists():
+            return False
+        if matches_stat(out, prev.get("size"), prev.get("mtime_ns")):
+            return True
+        # Touched but possibly unmodified: fall back to comparing content.
+        try:
+            data = out.read_bytes()
+        except OSError:
+            return False
+        record_read(len(data))
+        return hash_bytes(data) == digest
+
+    def record(self, rel: str, source_rel: str, digest: str, out: Path) -> None:
+        size, mtime_ns = _stat_key(out) or (None, None)
+        self.outputs[rel] = {
+            "source": source_rel,
+            "hash": digest,
+            "size": size,
+            "mtime_ns": mtime_ns,
+        }
+
+    # -- Supplementary directories -----------------------------------------
+
+    def dir_is_current(
+        self, rel: str, source_sig: str, dest: Path, mode: str = "copy"
+    ) -> bool:
+        prev = self.previous.get("dirs", {}).get(rel)
+        if not prev or prev.get("source_sig") != source_sig or not dest.is_dir():
+            return False
+        if prev.get("mode", "copy") != mode:
+            return False
+        return tree_listing(dest) == prev.get("files")
+
+    def record_dir(
+        self,
+        rel: str,
+        source_rel: str,
+        source_sig: str,
+        dest: Path,
+        mode: str = "copy",
+    ) -> None:
+        self.dirs[rel] = {
+            "source": source_rel,
+            "source_sig": source_sig,
+            "mode": mode,
+            "files": tree_listing(dest),
+        }
+
+    # -- Ledger -------------------------------------------------------------
+
+    def stale_outputs(self) -> list[tuple[str, dict]]:
+        """Outputs owned by the previous run that the current run did not produce."""
+        prev = self.previous.get("outputs", {})
+        return [(rel, e) for rel, e in sorted(prev.items()) if rel not in self.outputs]
+
+    def stale_dirs(self) -> list[tuple[str, dict]]:
+        """Supplementary directories owned by the previous run but not this one."""
+        prev = self.previous.get("dirs", {})
+        return [(rel, e) for rel, e in sorted(prev.items()) if rel not in self.dirs]
+
+    # -- Persistence --------------------------------------------------------
+
+    def save(self) -> bool:
+        """Write the manifest if its content changed. Returns True if written."""
+        data = {
+            "version": STATE_VERSION,
+            "sources": self.sources,
+            "outputs": self.outputs,
+            "dirs": self.dirs,
+        }
+        text = json.dumps(data, indent=2, sort_keys=True) + "\n"
+        try:
+            previous = self.path.read_text()
+            record_read(len(previous))
+            if previous == text:
+                return False
+        except OSError:
+            pass
+        write_atomic(self.path, text.encode("utf-8"))
+        return True
@@ -0,0 +1,119 @@
+"""Recursive mode: discover every `.agentpack/` under a directory and generate them."""
+
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.api import AgentpackError, GenerateResult, generate
+from agent_pack.artifacts import AGENTPACK_DIR
+
+# Vendored, generated and tool directories that never hold packages of their own.
+SKIP_DIRS = frozenset(
+    {
+        "node_modules",
+        "vendor",
+        "third_party",
+        "third-party",
+        "site-packages",
+        "venv",
+        "__pycache__",
+        "build",
+        "dist",
+    }
+)
+
+
+@dataclass
+class RootResult:
+    """Outcome of generating one `.agentpack/` root: its result, or the error
+    that stopped it.
+    """
+
+    root: Path
+    result: Optional[GenerateResult] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _git_ignored_dirs(base: Path) -> set[Path]:
+    """Directories under ``base`` ignored by git; empty outside a work tree."""
+    try:
+        proc = subprocess.run(
+            [
+                "git",
+                "ls-files",
+                "--others",
+                "--ignored",
+                "--exclude-standard",
+                "--directory",
+                "-z",
+            ],
+            cwd=base,
+            capture_output=True,
+            check=False,
+        )
+    except OSError:
+        return set()
+    if proc.returncode != 0:
+        return set()
+    return {
+        (base / entry).resolve()
+        for entry in os.fsdecode(proc.stdout).split("\0")
+        if entry.endswith("/")
+    }
+
+
+def discover_roots(base: Path) -> list[Path]:
+    """Return every directory under ``base`` containing a `.agentpack/`, sorted.
+
+    Hidden directories, well-known vendored trees and directories ignored by git
+    are not descended into.
+    """
+    ignored = _git_ignored_dirs(base)
+    roots = []
+    stack = [base]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name == AGENTPACK_DIR:
+                roots.append(Path(current))
+                continue
+            if entry.name.startswith(".") or entry.name in SKIP_DIRS:
+                continue
+            path = Path(entry.path)
+            if path in ignored:
+                continue
+            stack.append(path)
+    return sorted(roots)
+
+
+def generate_root(root: Path, force: bool) -> RootResult:
+    """Generate a single root. Errors are returned, never raised, so one failing
+    root does not abort the batch.
+    """
+    try:
+        return RootResult(root, generate(root, force=force, jobs=1))
+    except AgentpackError as exc:
+        return RootResult(root, error=str(exc))
+    except Exception as exc:
+        return RootResult(root, error=f"{type(exc).__name__}: {exc}")
+
+
+def generate_roots(roots: list[Path], force: bool, jobs: int) -> list[RootResult]:
+    """Generate ``roots`` on up to ``jobs`` worker processes, in input order."""
+    if jobs <= 1 or len(roots) <= 1:
+        return [generate_root(root, force) for root in roots]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(roots))) as pool:
+        return list(pool.map(generate_root, roots, [force] * len(roots)))
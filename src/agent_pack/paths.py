@@ -0,0 +1,322 @@
+"""Path-scoped rules: compile `paths:` globs into an index queried by `which`.
+
+Globs follow the rule format of the agents: patterns are relative to the project
+root, ``*`` and ``?`` stay within one path segment, ``**`` spans any number of
+directories, ``[...]`` is a character class and ``{a,b}`` lists alternatives.
+``*.md`` therefore matches Markdown files in the root only; use ``**/*.md`` for
+every directory.
+
+Patterns are grouped by their literal directory prefix and by the extension of
+their last segment. A lookup visits one group per ancestor directory of the file
+and tests only the patterns filed under the file's extension or under no fixed
+extension, so its cost does not grow with the number of unrelated patterns.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from agent_pack.artifacts import SKILL, Artifact, ArtifactSet
+from agent_pack.filesync import write_atomic
+from agent_pack.timings import record_read
+
+INDEX_FILE = ".paths.json"
+INDEX_VERSION = 1
+
+_GLOB_CHARS = frozenset("*?[{")
+
+
+def rule_patterns(artifact: Artifact) -> list[str]:
+    """The `paths:` globs of a rule; a single string counts as one pattern."""
+    paths = artifact.frontmatter.get("paths")
+    if isinstance(paths, str):
+        paths = [paths]
+    if not isinstance(paths, list):
+        return []
+    return [str(p) for p in paths if str(p).strip()]
+
+
+def expand_braces(pattern: str) -> list[str]:
+    """Expand ``{a,b}`` alternatives, innermost first: ``*.{ts,tsx}`` → two globs."""
+    match = re.search(r"\{([^{}]*)\}", pattern)
+    if not match:
+        return [pattern]
+    head, tail = pattern[: match.start()], pattern[match.end() :]
+    expanded = []
+    for option in match.group(1).split(","):
+        expanded += expand_braces(head + option + tail)
+    return expanded
+
+
+def _segment_regex(segment: str) -> str:
+    out = []
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and "]" in segment[i + 2 :]:
+            end = segment.index("]", i + 2)
+            body = segment[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def glob_regex(pattern: str) -> str:
+    """Regular expression matching the root-relative paths ``pattern`` selects.
+
+    ``pattern`` must not contain braces; see :func:`expand_braces`.
+    """
+    segments = pattern.split("/")
+    out = []
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            out.append(".*" if last else "(?:[^/]+/)*")
+        else:
+            out.append(_segment_regex(segment) + ("" if last else "/"))
+    return "".join(out)
+
+
+def _normalize(pattern: str) -> str:
+    pattern = pattern.strip()
+    while pattern.startswith("./"):
+        pattern = pattern[2:]
+    return pattern.lstrip("/")
+
+
+def _extension(name: str) -> Optional[str]:
+    """Group key of a final path segment: its extension, or None if not literal."""
+    tail = name.rsplit(".", 1)[1] if "." in name else ""
+    if "." not in name and _GLOB_CHARS & set(name):
+        return None
+    if _GLOB_CHARS & set(tail):
+        return None
+    return tail
+
+
+def _group_key(pattern: str) -> tuple[str, Optional[str]]:
+    """Literal directory prefix and extension key of a brace-free pattern."""
+    *dirs, name = pattern.split("/")
+    prefix = []
+    for segment in dirs:
+        if _GLOB_CHARS & set(segment):
+            break
+        prefix.append(segment)
+    return "/".join(prefix), None if name == "**" else _extension(name)
+
+
+@dataclass(frozen=True)
+class IndexedRule:
+    """A rule known to the index. Rules without patterns are ``always`` loaded."""
+
+    name: str
+    source: str
+    always: bool
+    patterns: tuple[str, ...]
+
+
+class PathIndex:
+    """Rules and their globs, grouped for lookups by path.
+
+    ``groups`` maps ``(prefix, extension)`` to ``(glob, rule number)`` pairs, where
+    ``glob`` is brace-expanded and an extension of None accepts any file name.
+    """
+
+    def __init__(self, rules: list[IndexedRule], groups: dict):
+        self.rules = rules
+        self.groups = groups
+        self._regexes: dict[str, re.Pattern] = {}
+
+    @classmethod
+    def build(cls, artifacts: ArtifactSet) -> "PathIndex":
+        rules = []
+        if artifacts.main:
+            rules.append(
+                IndexedRule(artifacts.main.name, artifacts.main.source_rel, True, ())
+            )
+        for rule in artifacts.rules:
+            patterns = tuple(rule_patterns(rule))
+            always = bool(rule.frontmatter.get("alwaysApply")) or not patterns
+            rules.append(IndexedRule(rule.name, rule.source_rel, always, patterns))
+
+        groups: dict[tuple[str, Optional[str]], list[tuple[str, int]]] = {}
+        for number, rule in enumerate(rules):
+            if rule.always:
+                continue
+            for pattern in rule.patterns:
+                for glob in expand_braces(_normalize(pattern)):
+                    groups.setdefault(_group_key(glob), []).append((glob, number))
+        return cls(rules, groups)
+
+    @property
+    def always(self) -> list[IndexedRule]:
+        return [rule for rule in self.rules if rule.always]
+
+    def _regex(self, glob: str) -> re.Pattern:
+        regex = self._regexes.get(glob)
+        if regex is None:
+            regex = self._regexes[glob] = re.compile(glob_regex(glob))
+        return regex
+
+    def match(self, path: str) -> list[tuple[IndexedRule, str]]:
+        """Path-scoped rules matching the root-relative ``path``, with the glob."""
+        *dirs, name = path.split("/")
+        extension = _extension(name)
+        prefixes = [""]
+        for i in range(len(dirs)):
+            prefixes.append("/".join(dirs[: i + 1]))
+
+        matched: dict[int, str] = {}
+        for prefix in prefixes:
+            for key in ((prefix, extension), (prefix, None)):
+                for glob, number in self.groups.get(key, ()):
+                    if number not in matched and self._regex(glob).fullmatch(path):
+                        matched[number] = glob
+        return [(self.rules[n], glob) for n, glob in sorted(matched.items())]
+
+    # -- Persistence --------------------------------------------------------
+
+    def to_json(self) -> dict:
+        return {
+            "rules": [
+                {
+                    "name": r.name,
+                    "source": r.source,
+                    "always": r.always,
+                    "patterns": list(r.patterns),
+                }
+                for r in self.rules
+            ],
+            "groups": [
+                [prefix, extension, [list(entry) for entry in entries]]
+                for (prefix, extension), entries in sorted(
+                    self.groups.items(), key=lambda item: (item[0][0], item[0][1] or "")
+                )
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "PathIndex":
+        rules = [
+            IndexedRule(r["name"], r["source"], r["always"], tuple(r["patterns"]))
+            for r in data["rules"]
+        ]
+        groups = {
+            (prefix, extension): [(glob, number) for glob, number in entries]
+            for prefix, extension, entries in data["groups"]
+        }
+        return cls(rules, groups)
+
+
+# ---------------------------------------------------------------------------
+# The index file
+# ---------------------------------------------------------------------------
+
+
+def _stat_key(path: Path) -> Optional[list[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _watched(ap_dir: Path, artifacts: ArtifactSet, packs: Iterable[Path]) -> list[Path]:
+    """Files and directories whose change makes a saved index stale.
+
+    Every pack's ``rules/`` is included, so a rule added to a level that has no
+    winning rule yet is noticed too.
+    """
+    sources = [a.source for a in artifacts if a.kind != SKILL]
+    dirs = {source.parent for source in sources} | {ap_dir / "rules"}
+    dirs |= {pack / "rules" for pack in packs}
+    return sorted({ap_dir / "agentpack.yaml", *sources, *dirs})
+
+
+def save_index(
+    ap_dir: Path, artifacts: ArtifactSet, packs: Iterable[Path] = ()
+) -> PathIndex:
+    """Write the index of ``artifacts`` next to the manifest if it changed.
+
+    ``packs`` are the pack directories ``artifacts`` were resolved from. The
+    rules' frontmatter is only parsed when a rule source changed since the saved
+    index was built.
+    """
+    sources = {a.source_rel: a.hash for a in artifacts if a.kind != SKILL}
+    path = ap_dir / INDEX_FILE
+    previous = _read(path)
+    if previous and previous.get("sources") == sources:
+        index = PathIndex.from_json(previous["index"])
+    else:
+        index = PathIndex.build(artifacts)
+    data = {
+        "version": INDEX_VERSION,
+        "sources": sources,
+        "stats": {str(p): _stat_key(p) for p in _watched(ap_dir, artifacts, packs)},
+        "index": index.to_json(),
+    }
+    text = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+    try:
+        if path.read_text() == text:
+            return index
+    except OSError:
+        pass
+    write_atomic(path, text.encode("utf-8"))
+    return index
+
+
+def _read(path: Path) -> Optional[dict]:
+    try:
+        text = path.read_text()
+    except OSError:
+        return None
+    record_read(len(text))
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    return data
+
+
+def load_index(ap_dir: Path) -> Optional[PathIndex]:
+    """The saved index, if none of the files it was built from changed since.
+
+    Only stat calls are made, so a fresh index is used without reading any rule.
+    """
+    data = _read(ap_dir / INDEX_FILE)
+    if not data:
+        return None
+    for path, key in data.get("stats", {}).items():
+        if _stat_key(Path(path)) != key:
+            return None
+    return PathIndex.from_json(data["index"])
+
+
+def relative_paths(root: Path, files: Iterable[str]) -> list[tuple[str, Optional[str]]]:
+    """Pair each of ``files`` with its root-relative POSIX path, or None if outside.
+
+    Relative names are taken relative to the working directory, as on the command
+    line; the files need not exist.
+    """
+    pairs = []
+    for name in files:
+        path = Path(os.path.abspath(name))
+        try:
+            pairs.append((name, path.relative_to(root).as_posix()))
+        except ValueError:
+            pairs.append((name, None))
+    return pairs
@@ -0,0 +1,668 @@
+"""Remote sync: cached shared rule repositories merged into `.agentpack/`."""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from agent_pack.artifacts import AGENTPACK_DIR, pack_files
+from agent_pack.bundle import BUNDLE_SUFFIX, Bundle, BundleError, is_bundle, materialize
+from agent_pack.filesync import copy_file, write_atomic
+from agent_pack.manifest import hash_bytes, hash_text
+
+SYNC_FILE = ".sync.json"
+SYNC_VERSION = 1
+
+ADDED = "added"
+UPDATED = "updated"
+REMOVED = "removed"
+KEPT = "kept"
+
+# A file offered by a remote pack: its content hash and a function placing a copy
+# of it at a given path.
+Source = tuple[str, Callable[[Path], None]]
+
+# Seconds a cached checkout may go unused before a sync of the same URL prunes it.
+CHECKOUT_TTL = 30 * 24 * 3600
+
+
+class GitError(Exception):
+    """A git command failed."""
+
+
+class LockTimeout(Exception):
+    """Another process held a cache lock for longer than the timeout."""
+
+
+@dataclass(frozen=True)
+class Remote:
+    """A named remote repository holding a shared rule pack.
+
+    ``path`` is the pack's directory inside the repository (empty for the root) and
+    ``ref`` the branch, tag or commit to sync (empty for the remote's HEAD). A URL
+    or path ending in ``.agentpack.zip`` is a bundle rather than a git repository.
+    """
+
+    name: str
+    url: str
+    path: str = ""
+    ref: str = ""
+
+    @property
+    def is_bundle(self) -> bool:
+        return is_bundle(self.url)
+
+
+@dataclass
+class FetchResult:
+    """Outcome of cloning or updating one remote's cache."""
+
+    remote: Remote
+    ok: bool
+    path: Optional[Path] = None
+    revision: str = ""
+    error: str = ""
+    skipped: bool = False
+    changes: list[tuple[str, str]] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Cache and remote resolution
+# ---------------------------------------------------------------------------
+
+
+def cache_root() -> Path:
+    """Root of agentpack's cache: ``$AGENTPACK_CACHE_DIR`` or ``~/.cache/agentpack``."""
+    override = os.environ.get("AGENTPACK_CACHE_DIR")
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".cache") / "agentpack"
+
+
+def repo_dir(url: str) -> Path:
+    """The bare repository caching ``url``'s objects for every project and ref."""
+    return cache_root() / "remotes" / f"{_name_for_url(url)}.git"
+
+
+def bundle_cache_dir() -> Path:
+    """Content-addressed store of fetched bundles and their extracted trees."""
+    return cache_root() / "bundles"
+
+
+def remote_checkout(remote: Remote, revision: str) -> Path:
+    """The cached tree of ``remote`` at ``revision``.
+
+    That is a worktree named by commit, or an extracted bundle named by its hash.
+    """
+    if remote.is_bundle:
+        return bundle_cache_dir() / revision
+    return checkout_dir(remote.url, revision, remote.path)
+
+
+def checkout_dir(url: str, revision: str, path: str = "") -> Path:
+    """The worktree holding ``revision`` of ``url``, sparse to ``path`` if given.
+
+    Checkouts are keyed by commit, so once created they never change.
+    """
+    name = f"{revision}-{hash_text(path)[:8]}" if path else revision
+    return repo_dir(url).with_suffix(".checkouts") / name
+
+
+def _name_for_url(url: str) -> str:
+    base = url.rstrip("/").rsplit("/", 1)[-1].rsplit(":", 1)[-1]
+    base = base.removesuffix(".git") or "remote"
+    return f"{base}-{hashlib.sha256(url.encode()).hexdigest()[:8]}"
+
+
+def _configured_remote(name: str, entry) -> Remote:
+    """Build a remote from an ``agentpack.yaml`` entry: a URL or a mapping."""
+    if not isinstance(entry, dict):
+        return Remote(name, str(entry))
+    if not entry.get("url"):
+        raise ValueError(f"remote '{name}' has no url")
+    path = str(entry.get("path") or "").strip("/")
+    if ".." in Path(path).parts:
+        raise ValueError(f"remote '{name}' path must stay inside the repository")
+    remote = Remote(name, str(entry["url"]), path, str(entry.get("ref") or ""))
+    if remote.is_bundle and (remote.path or remote.ref):
+        raise ValueError(f"remote '{name}' is a bundle; path and ref do not apply")
+    return remote
+
+
+def resolve_remotes(config: dict, remote: Optional[str]) -> list[Remote]:
+    """Return the remotes to sync: all configured ones, a named one, or a URL.
+
+    Raises KeyError when ``remote`` is neither a configured name nor a URL, and
+    ValueError for a malformed remote entry.
+    """
+    configured = config.get("remotes") or {}
+    if remote is None:
+        return [_configured_remote(name, e) for name, e in configured.items()]
+    if remote in configured:
+        return [_configured_remote(remote, configured[remote])]
+    if "://" in remote or "@" in remote or remote.endswith(".git") or is_bundle(remote):
+        return [Remote(_name_for_url(remote), remote)]
+    raise KeyError(remote)
+
+
+# ---------------------------------------------------------------------------
+# Fetching
+# ---------------------------------------------------------------------------
+
+
+def _git(args: list[str], cwd: Optional[Path] = None, timeout: float = 300) -> str:
+    """Run git, raising GitError on failure and TimeoutExpired after ``timeout``.
+
+    git runs in its own session so that a timeout also kills the transport helpers
+    (ssh, remote-https) it spawned, which would otherwise keep its pipes open.
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    with subprocess.Popen(
+        ["git", *args],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True,
+    ) as proc:
+        try:
+            out, err = proc.communicate(timeout=max(timeout, 0.001))
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.communicate()
+            raise
+    if proc.returncode != 0:
+        raise GitError(err.strip() or f"git {args[0]} failed")
+    return out
+
+
+def _is_commit(ref: str) -> bool:
+    return re.fullmatch(r"[0-9a-f]{40}|[0-9a-f]{64}", ref) is not None
+
+
+def ls_remote(url: str, ref: str = "", timeout: float = 300) -> Optional[str]:
+    """Return the commit ``ref`` points at on the remote, without fetching.
+
+    An empty ``ref`` means the remote's HEAD. Annotated tags are peeled, and a full
+    commit id is returned as is.
+    """
+    if _is_commit(ref):
+        return ref
+    ref = ref or "HEAD"
+    out = _git(["ls-remote", url, ref, f"{ref}^{{}}"], timeout=timeout)
+    refs = {}
+    for line in out.splitlines():
+        sha, _, name = line.partition("\t")
+        refs[name] = sha
+    # The order git itself uses to disambiguate a short ref name.
+    for name in (ref, f"refs/{ref}", f"refs/tags/{ref}", f"refs/heads/{ref}"):
+        if name in refs:
+            return refs.get(f"{name}^{{}}", refs[name])
+    return None
+
+
+@contextlib.contextmanager
+def cache_lock(repo: Path, timeout: float) -> Iterator[None]:
+    """Hold an exclusive lock on a shared cache repository, across processes.
+
+    Waits up to ``timeout`` seconds, then raises LockTimeout. Without flock(2)
+    (non-POSIX platforms) concurrent syncs are not serialised.
+    """
+    repo.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout
+    with open(repo.with_suffix(".lock"), "a") as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(repo) from None
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _init_repo(url: str, repo: Path, timeout: float) -> None:
+    """Create the shared bare repository for ``url`` if it does not exist yet.
+
+    It is set up like ``git clone --bare --filter=blob:none``: blobs are only
+    downloaded when a checkout needs them, so sparse checkouts of large
+    repositories stay small.
+    """
+    if (repo / "HEAD").exists():
+        return
+    tmp = repo.with_name(f".{repo.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        _git(["init", "--quiet", "--bare", str(tmp)], timeout=timeout)
+        _git(["remote", "add", "origin", url], tmp, timeout)
+        _git(["config", "remote.origin.promisor", "true"], tmp, timeout)
+        _git(["config", "remote.origin.partialclonefilter", "blob:none"], tmp, timeout)
+        os.replace(tmp, repo)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _fetch_ref(remote: Remote, repo: Path, remaining: Callable[[], float]) -> str:
+    """Fetch the remote's ref at depth 1, without blobs, and return its commit."""
+    _git(
+        [
+            "fetch",
+            "--quiet",
+            "--depth",
+            "1",
+            "--filter=blob:none",
+            "origin",
+            remote.ref or "HEAD",
+        ],
+        repo,
+        remaining(),
+    )
+    return _git(["rev-parse", "--verify", "FETCH_HEAD^{commit}"], repo, remaining())
+
+
+def _prune_worktrees(repo: Path) -> None:
+    """Drop ``repo``'s records of worktrees whose directories are gone."""
+    try:
+        _git(["worktree", "prune"], repo, 60)
+    except (GitError, OSError, subprocess.TimeoutExpired):
+        pass
+
+
+def _remove_worktree(repo: Path, worktree: Path) -> None:
+    shutil.rmtree(worktree, ignore_errors=True)
+    _prune_worktrees(repo)
+
+
+def _add_checkout(
+    repo: Path,
+    revision: str,
+    path: str,
+    dest: Path,
+    remaining: Callable[[], float],
+) -> None:
+    """Check out ``revision`` as a worktree of ``repo`` at ``dest``.
+
+    The worktree is populated under a temporary name and moved into place, so an
+    existing ``dest`` is always complete.
+    """
+    if dest.exists():
+        os.utime(dest)
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp-{os.getpid()}")
+    _remove_worktree(repo, tmp)
+    try:
+        _git(
+            ["worktree", "add", "--quiet", "--detach", "--no-checkout"]
+            + [str(tmp), revision],
+            repo,
+            remaining(),
+        )
+        if path:
+            _git(["sparse-checkout", "set", path], tmp, remaining())
+        _git(["reset", "--hard", "--quiet"], tmp, remaining())
+        _git(["worktree", "move", str(tmp), str(dest)], repo, remaining())
+    except BaseException:
+        _remove_worktree(repo, tmp)
+        raise
+
+
+def _prune_checkouts(repo: Path, keep: Path) -> None:
+    """Remove checkouts unused for CHECKOUT_TTL and leftovers of aborted runs.
+
+    Must be called with the cache lock held, so no other run is creating one.
+    """
+    checkouts = keep.parent
+    cutoff = time.time() - CHECKOUT_TTL
+    removed = False
+    for d in checkouts.iterdir():
+        if d == keep:
+            continue
+        try:
+            stale = d.name.startswith(".") or d.stat().st_mtime < cutoff
+        except OSError:
+            continue
+        if stale:
+            shutil.rmtree(d, ignore_errors=True)
+            removed = True
+    if removed:
+        _prune_worktrees(repo)
+
+
+def _open_location(url: str, timeout: float) -> BinaryIO:
+    if url.startswith(("http://", "https://")):
+        import urllib.request
+
+        return urllib.request.urlopen(url, timeout=timeout)
+    if url.startswith("file://"):
+        from urllib.parse import urlparse
+        from urllib.request import url2pathname
+
+        url = url2pathname(urlparse(url).path)
+    return open(url, "rb")
+
+
+def _fetch_bundle(remote: Remote, timeout: float, known: Optional[str]) -> FetchResult:
+    """Copy or download a bundle into the cache, named by its sha256.
+
+    ``known`` works as for git remotes; a bundle is a single file, so it is always
+    read, but an unchanged bundle is neither stored nor merged again.
+    """
+    cache = bundle_cache_dir()
+    cache.mkdir(parents=True, exist_ok=True)
+    tmp = cache / f".fetch-{os.getpid()}-{threading.get_ident()}"
+    digest = hashlib.sha256()
+    try:
+        with _open_location(remote.url, timeout) as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+        revision = digest.hexdigest()
+        if revision == known:
+            return FetchResult(remote, True, revision=known, skipped=True)
+        dest = cache / f"{revision}{BUNDLE_SUFFIX}"
+        os.replace(tmp, dest)
+        Bundle(dest).close()
+    except TimeoutError:
+        return FetchResult(remote, False, error=f"timed out after {timeout:g}s")
+    except (OSError, BundleError) as exc:
+        return FetchResult(remote, False, error=str(exc))
+    finally:
+        tmp.unlink(missing_ok=True)
+    return FetchResult(remote, True, dest, revision)
+
+
+def fetch(
+    remote: Remote, timeout: float = 300, known: Optional[str] = None
+) -> FetchResult:
+    """Fetch ``remote`` into the shared cache and return a checkout of it.
+
+    Every URL has one bare repository, shared by all projects and refs and guarded
+    by a cross-process lock. Only the requested ref is fetched, at depth 1 and
+    without blobs; each commit is checked out once as a worktree, sparse to the
+    remote's ``path`` if it has one. A ``ref`` that is a full commit id already
+    checked out needs no network access. ``timeout`` bounds all of this for the
+    remote together. If ``known`` is the revision already merged, a single ref
+    query decides whether anything needs fetching; when the remote still points
+    there the result is marked ``skipped``.
+    """
+    if remote.is_bundle:
+        return _fetch_bundle(remote, timeout, known)
+    deadline = time.monotonic() + timeout
+    repo = repo_dir(remote.url)
+
+    def remaining() -> float:
+        return deadline - time.monotonic()
+
+    try:
+        if known and ls_remote(remote.url, remote.ref, remaining()) == known:
+            return FetchResult(remote, True, revision=known, skipped=True)
+        with cache_lock(repo, remaining()):
+            revision = remote.ref if _is_commit(remote.ref) else ""
+            dest = checkout_dir(remote.url, revision, remote.path) if revision else None
+            if dest is None or not dest.exists():
+                _init_repo(remote.url, repo, remaining())
+                revision = _fetch_ref(remote, repo, remaining).strip()
+                dest = checkout_dir(remote.url, revision, remote.path)
+            _add_checkout(repo, revision, remote.path, dest, remaining)
+            _prune_checkouts(repo, dest)
+    except subprocess.TimeoutExpired:
+        return FetchResult(remote, False, error=f"timed out after {timeout:g}s")
+    except LockTimeout:
+        return FetchResult(
+            remote, False, error=f"timed out after {timeout:g}s waiting for cache lock"
+        )
+    except (GitError, OSError) as exc:
+        return FetchResult(remote, False, error=str(exc))
+    if not (dest / remote.path).is_dir():
+        return FetchResult(remote, False, error=f"path not found: {remote.path}")
+    return FetchResult(remote, True, dest, revision)
+
+
+def fetch_all(
+    remotes: list[Remote],
+    jobs: int,
+    timeout: float,
+    known: Optional[dict[str, str]] = None,
+) -> list[FetchResult]:
+    """Fetch ``remotes`` on up to ``jobs`` threads, returning results in input order.
+
+    ``known`` maps remote names to revisions that are already merged and intact.
+    """
+    known = known or {}
+
+    def one(remote: Remote) -> FetchResult:
+        return fetch(remote, timeout, known.get(remote.name))
+
+    if jobs <= 1 or len(remotes) <= 1:
+        return [one(r) for r in remotes]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(jobs, len(remotes))) as pool:
+        return list(pool.map(one, remotes))
+
+
+# ---------------------------------------------------------------------------
+# Merging
+# ---------------------------------------------------------------------------
+
+
+def load_sync_state(ap_dir: Path) -> dict:
+    """Load the sync ledger: which files under ``ap_dir`` each remote provided."""
+    try:
+        data = json.loads((ap_dir / SYNC_FILE).read_text())
+        if isinstance(data, dict) and data.get("version") == SYNC_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": SYNC_VERSION, "remotes": {}}
+
+
+def save_sync_state(ap_dir: Path, state: dict) -> None:
+    text = json.dumps(state, indent=2, sort_keys=True) + "\n"
+    path = ap_dir / SYNC_FILE
+    try:
+        if path.read_text() == text:
+            return
+    except OSError:
+        pass
+    write_atomic(path, text.encode("utf-8"))
+
+
+def merged_digest(files: dict[str, str]) -> str:
+    """Hash of a remote's merged files: their paths and content hashes."""
+    return hash_text(json.dumps(files, sort_keys=True))
+
+
+def merged_revision(
+    remote: Remote, ap_dir: Path, state: dict, inherited: bool = False
+) -> Optional[str]:
+    """The revision of ``remote`` last merged, if its files are still intact.
+
+    ``inherited`` says whether the remote is now layered rather than merged; a
+    change of mode always requires a merge.
+
+    Returns None when the remote was never synced, its URL, path or ref changed,
+    any file it
+    provided has since been edited, removed or replaced locally, or an artifact
+    kept in preference to the remote's copy has disappeared.
+    """
+    entry = state["remotes"].get(remote.name)
+    if not entry or not entry.get("revision"):
+        return None
+    if entry.get("inherited", False) != inherited:
+        return None
+    if (entry.get("url"), entry.get("path", ""), entry.get("ref", "")) != (
+        remote.url,
+        remote.path,
+        remote.ref,
+    ):
+        return None
+    files = entry.get("files", {})
+    current = {rel: _file_digest(ap_dir / rel) for rel in files}
+    if merged_digest(current) != entry.get("merged"):
+        return None
+    if not all((ap_dir / rel).exists() for rel in entry.get("kept", [])):
+        return None
+    return entry["revision"]
+
+
+def pack_dir(clone: Path, path: str = "") -> Path:
+    """The directory in a clone holding ``rules/`` and ``skills/``.
+
+    That is ``path`` within the clone, or the `.agentpack/` directory inside it.
+    """
+    base = clone / path
+    nested = base / AGENTPACK_DIR
+    return nested if nested.is_dir() else base
+
+
+def dir_sources(pack: Path) -> dict[str, Source]:
+    """Sources for the shareable files of a pack directory."""
+    return {
+        rel: (_file_digest(f), partial(copy_file, f))
+        for rel, f in pack_files(pack).items()
+    }
+
+
+def _unit(rel: str) -> str:
+    """Conflict unit of a pack file: the rule file itself or the whole skill."""
+    parts = rel.split("/")
+    return "/".join(parts[:2])
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    try:
+        return hash_bytes(path.read_bytes())
+    except OSError:
+        return None
+
+
+def _prune_empty_parents(f: Path, stop: Path) -> None:
+    parent = f.parent
+    while parent != stop and parent.is_relative_to(stop):
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def apply_remote(
+    result: FetchResult, ap_dir: Path, state: dict, inherit: bool = False
+) -> list[tuple[str, str]]:
+    """Merge a fetched remote into ``ap_dir`` and return the changes.
+
+    With ``inherit`` the remote is layered by the hierarchy resolver instead: its
+    cached tree is made ready and nothing is copied into ``ap_dir``. Bundles are
+    merged straight from the archive, reading only files that differ.
+    """
+    remote = result.remote
+    if not remote.is_bundle:
+        sources = None if inherit else dir_sources(pack_dir(result.path, remote.path))
+        return merge_remote(remote, sources, ap_dir, state, result.revision)
+    if inherit:
+        materialize(result.path, remote_checkout(remote, result.revision))
+        return merge_remote(remote, None, ap_dir, state, result.revision)
+    with Bundle(result.path) as bundle:
+        return merge_remote(remote, bundle.sources(), ap_dir, state, result.revision)
+
+
+def merge_remote(
+    remote: Remote,
+    sources: Optional[dict[str, Source]],
+    ap_dir: Path,
+    state: dict,
+    revision: str = "",
+) -> list[tuple[str, str]]:
+    """Merge a fetched pack at ``revision`` into ``ap_dir`` and update ``state``.
+
+    ``sources`` maps the pack's file paths to their hashes and a function that
+    places the file, as returned by :func:`dir_sources` or a bundle.
+
+    Rules are keyed by filename and skills by directory name. Local artifacts, and
+    files edited locally since they were synced, override the remote's copy; an
+    artifact already provided by another remote is left to that remote. Files the
+    remote no longer provides are removed unless edited locally. Returns
+    ``(action, path)`` pairs describing the changes. With ``sources`` None only the
+    revision is recorded and previously merged files are removed.
+    """
+    remotes = state["remotes"]
+    entry = remotes.get(remote.name) or {}
+    prev: dict[str, str] = entry.get("files", {})
+    owned_units = {_unit(rel) for rel in prev}
+    other_units = {
+        _unit(rel)
+        for name, other in remotes.items()
+        if name != remote.name
+        for rel in other.get("files", {})
+    }
+
+    incoming = sources or {}
+    # Artifacts this remote has not provided before are only merged if nothing local
+    # or from another remote claims the same rule filename or skill name.
+    blocked = {
+        unit
+        for unit in map(_unit, incoming)
+        if unit not in owned_units and (unit in other_units or (ap_dir / unit).exists())
+    }
+    changes = [(KEPT, unit) for unit in sorted(blocked)]
+    files: dict[str, str] = {}
+    for rel, (digest, place) in sorted(incoming.items()):
+        if _unit(rel) in blocked:
+            continue
+        dest = ap_dir / rel
+        current = _file_digest(dest)
+        if current is not None and current != prev.get(rel):
+            if current != digest:
+                changes.append((KEPT, rel))
+            # Locally authored or edited: the local copy wins and is no longer ours.
+            continue
+        if current != digest:
+            place(dest)
+            changes.append((UPDATED if current else ADDED, rel))
+        files[rel] = digest
+
+    for rel, digest in sorted(prev.items()):
+        if rel in files or _unit(rel) in blocked:
+            continue
+        dest = ap_dir / rel
+        if _file_digest(dest) == digest:
+            dest.unlink()
+            _prune_empty_parents(dest, ap_dir)
+            changes.append((REMOVED, rel))
+
+    remotes[remote.name] = {
+        "url": remote.url,
+        "path": remote.path,
+        "ref": remote.ref,
+        "revision": revision,
+        "merged": merged_digest(files),
+        "files": files,
+        "kept": sorted(rel for action, rel in changes if action == KEPT),
+        "inherited": sources is None,
+    }
+    return changes
@@ -0,0 +1,245 @@
+"""`agentpack serve`: a per-user daemon answering commands over a Unix socket.
+
+The daemon keeps each root's parsed sources, and with them the hashes of their
+outputs, in memory (see :func:`agent_pack.api.caching`), so a request only pays
+for sources whose stat changed. :func:`delegate` is the client side: the console
+entry point calls it before importing the CLI, and when a daemon is listening it
+relays the command and prints the daemon's output, so `generate`, `check` and
+`which` answer without importing typer or PyYAML or re-reading `.agentpack/`.
+
+The protocol is one JSON line per request and per response. A request carries
+``argv``, the client's working directory, its version and the environment
+variables that influence the result; the daemon answers with ``exit``,
+``stdout`` and ``stderr``, or with ``fallback`` when the client should run the
+command itself, e.g. because the environments differ.
+
+Requests are run one at a time, because commands run in the daemon's working
+directory and print to its redirected streams.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Optional
+
+from agent_pack import __version__
+
+SOCKET_NAME = "agentpack.sock"
+
+# Commands relayed to a running daemon, and flags that make them run locally.
+SERVED = frozenset({"generate", "check", "which"})
+LOCAL_FLAGS = frozenset({"--recursive", "-r", "--timings", "--profile", "--help"})
+
+# Variables that change what a command does; the daemon only answers clients
+# whose values match its own.
+ENV_KEYS = (
+    "HOME",
+    "XDG_CONFIG_HOME",
+    "XDG_CACHE_HOME",
+    "AGENTPACK_CONFIG_DIR",
+    "AGENTPACK_CACHE_DIR",
+)
+
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path() -> Path:
+    """``$AGENTPACK_SOCKET``, else ``agentpack.sock`` in the user's runtime
+    directory, falling back to the agentpack cache directory.
+    """
+    explicit = os.environ.get("AGENTPACK_SOCKET")
+    if explicit:
+        return Path(explicit)
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / SOCKET_NAME
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(cache) / "agentpack" / SOCKET_NAME
+
+
+def _environment() -> dict:
+    return {key: os.environ.get(key) for key in ENV_KEYS}
+
+
+def _exchange(path: Path, request: dict, timeout: Optional[float]) -> dict:
+    """Send ``request`` to the daemon at ``path`` and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(path))
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+    return json.loads(b"".join(chunks))
+
+
+def delegate(argv: list[str]) -> Optional[int]:
+    """Run ``argv`` on a running daemon and return its exit code.
+
+    Returns None, having printed nothing, when the command should run in this
+    process: it is not served, ``AGENTPACK_NO_DAEMON`` is set, no daemon answers,
+    or the daemon asks for a fallback.
+    """
+    if not argv or argv[0] not in SERVED or LOCAL_FLAGS & set(argv):
+        return None
+    if os.environ.get("AGENTPACK_NO_DAEMON"):
+        return None
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": _environment(),
+        "version": __version__,
+    }
+    try:
+        response = _exchange(socket_path(), request, None)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(response, dict) or "exit" not in response:
+        return None
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stdout.flush()
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response["exit"])
+
+
+def ping(path: Optional[Path] = None) -> Optional[dict]:
+    """Status of the daemon listening at ``path``, or None if none answers."""
+    try:
+        response = _exchange(path or socket_path(), {"command": "ping"}, 5)
+    except (OSError, ValueError):
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def stop(path: Optional[Path] = None) -> bool:
+    """Ask the daemon at ``path`` to exit; False if none was running."""
+    try:
+        _exchange(path or socket_path(), {"command": "stop"}, 5)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+def run_command(argv: list[str], cwd: str) -> dict:
+    """Run the CLI with ``argv`` in ``cwd`` and capture its output and exit code.
+
+    Changes the process-wide working directory and standard streams, so calls
+    must not overlap.
+    """
+    import io
+    import traceback
+
+    from agent_pack.cli import app
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    previous = os.getcwd()
+    code = 0
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                app(argv, prog_name="agentpack")
+            except SystemExit as exc:
+                code = exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    except OSError as exc:
+        stderr.write(f"{exc}\n")
+        code = 1
+    finally:
+        os.chdir(previous)
+    return {"exit": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def handle(request: dict) -> dict:
+    """Response to one relayed command."""
+    argv = request.get("argv")
+    if request.get("version") != __version__:
+        return {"fallback": "version mismatch"}
+    if request.get("env") != _environment():
+        return {"fallback": "environment differs"}
+    if not isinstance(argv, list) or not argv or argv[0] not in SERVED:
+        return {"fallback": "command not served"}
+    return run_command(argv, request.get("cwd") or os.getcwd())
+
+
+def serve(path: Path, idle_timeout: Optional[float] = None) -> None:
+    """Answer requests on the Unix socket ``path`` until stopped.
+
+    Exits after ``idle_timeout`` seconds without a request, if given. Raises
+    RuntimeError when another daemon already listens on ``path``.
+    """
+    import socketserver
+    import threading
+    import time
+
+    from agent_pack import api
+
+    if path.exists():
+        if ping(path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {path}")
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    lock = threading.Lock()
+    last = [time.monotonic()]
+    started = time.time()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+            command = request.get("command") if isinstance(request, dict) else None
+            if command == "ping":
+                response = {"pid": os.getpid(), "version": __version__}
+                response["uptime"] = round(time.time() - started, 3)
+            elif command == "stop":
+                response = {"stopping": True}
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            else:
+                with lock:
+                    response = handle(request if isinstance(request, dict) else {})
+                    last[0] = time.monotonic()
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o177)
+    try:
+        server = Server(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+
+    def watch_idle() -> None:
+        while True:
+            time.sleep(min(idle_timeout, 1.0))
+            if not lock.locked() and time.monotonic() - last[0] > idle_timeout:
+                server.shutdown()
+                return
+
+    if idle_timeout:
+        threading.Thread(target=watch_idle, daemon=True).start()
+    try:
+        with api.caching(), server:
+            server.serve_forever(poll_interval=0.2)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
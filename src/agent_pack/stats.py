@@ -0,0 +1,209 @@
+"""Context-size statistics: approximate token counts of generated outputs.
+
+Counts are estimated without a tokenizer: a run of ASCII letters costs one token
+per eight characters or part thereof, digits one per three, any other non-space
+character one, and letters outside ASCII one each. That is close enough to BPE
+tokenizers for comparing rules and watching budgets, and needs no dependency.
+
+Counting is cached per source hash in ``.agentpack/.stats.json``, together with
+the frontmatter facts the report needs, so a run over unchanged sources neither
+tokenizes nor parses YAML.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from agent_pack.artifacts import MAIN, MARKER_PREFIX, SKILL, Artifact, add_html_marker
+from agent_pack.filesync import write_atomic
+from agent_pack.paths import rule_patterns
+from agent_pack.timings import record_read
+
+STATS_FILE = ".stats.json"
+STATS_VERSION = 1
+
+ALWAYS = "always"
+PATHS = "paths"
+SKILL_SCOPE = "skill"
+
+BUDGET_KEYS = ("always", "output")
+
+_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens a language model sees for ``text``."""
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif piece.isalpha():
+            tokens += 1 + (len(piece) - 1) // 8 if piece.isascii() else len(piece)
+        else:
+            tokens += 1
+    return tokens
+
+
+@dataclass(frozen=True)
+class OutputStats:
+    """One generated output of an agent.
+
+    ``tokens`` is the size of the whole file; ``loaded`` is the part in context on
+    every turn: all of an always-applied file, nothing of a path-scoped rule and
+    the name and description of a skill.
+    """
+
+    path: str
+    source: str
+    scope: str
+    tokens: int
+    loaded: int
+
+
+@dataclass
+class AgentStats:
+    agent: str
+    outputs: list[OutputStats] = field(default_factory=list)
+
+    @property
+    def always(self) -> int:
+        """Tokens loaded into every conversation with this agent."""
+        return sum(o.loaded for o in self.outputs)
+
+
+@dataclass
+class StatsResult:
+    """Per-agent statistics and the budget violations found, as messages."""
+
+    agents: list[AgentStats] = field(default_factory=list)
+    budget: dict = field(default_factory=dict)
+    over: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.over
+
+
+def parse_budget(value) -> dict:
+    """The ``budget`` setting as ``{"always": n, "output": n}``, keys optional.
+
+    A bare number limits the always-loaded total. Raises ValueError when invalid.
+    """
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        value = {"always": value}
+    budget = {}
+    for key, limit in value.items():
+        if key not in BUDGET_KEYS:
+            raise ValueError(f"unknown key {key!r}")
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
+            raise ValueError(f"{key} must be a positive number of tokens")
+        budget[key] = limit
+    return budget
+
+
+def _measure(artifact: Artifact) -> dict:
+    """The counts and scope of one source, as stored in the cache."""
+    entry = {"tokens": estimate_tokens(_counted_text(artifact))}
+    if artifact.kind == SKILL:
+        meta = artifact.frontmatter
+        entry["loaded"] = estimate_tokens(
+            f"{meta.get('name', artifact.name)}: {meta.get('description', '')}"
+        )
+        entry["scope"] = SKILL_SCOPE
+    elif artifact.kind == MAIN or artifact.frontmatter.get("alwaysApply"):
+        entry["scope"] = ALWAYS
+    else:
+        entry["scope"] = PATHS if rule_patterns(artifact) else ALWAYS
+    return entry
+
+
+def _counted_text(artifact: Artifact) -> str:
+    return artifact.body if artifact.kind == MAIN else artifact.text
+
+
+def _marker_tokens(artifact: Artifact) -> int:
+    if artifact.kind == MAIN:
+        return estimate_tokens(add_html_marker("", artifact.source_rel))
+    return estimate_tokens(f"# {MARKER_PREFIX} Source: {artifact.source_rel}")
+
+
+class StatsCache:
+    """Measurements keyed by source hash, read from and saved to ``STATS_FILE``."""
+
+    def __init__(self, path: Path, entries: dict):
+        self.path = path
+        self.entries = entries
+        self.used: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, ap_dir: Path) -> "StatsCache":
+        path = ap_dir / STATS_FILE
+        entries: dict = {}
+        try:
+            text = path.read_text()
+            record_read(len(text))
+            data = json.loads(text)
+            if data.get("version") == STATS_VERSION:
+                entries = data.get("sources", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return cls(path, entries)
+
+    def get(self, artifact: Artifact) -> dict:
+        entry = self.used.get(artifact.hash) or self.entries.get(artifact.hash)
+        if entry is None:
+            entry = _measure(artifact)
+        self.used[artifact.hash] = entry
+        return entry
+
+    def save(self) -> None:
+        """Keep the entries of the sources measured by this run, if any changed."""
+        if self.used == self.entries:
+            return
+        data = {"version": STATS_VERSION, "sources": self.used}
+        text = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+        try:
+            write_atomic(self.path, text.encode("utf-8"))
+        except OSError:
+            pass
+
+
+def output_stats(rel: str, artifact: Artifact, cache: StatsCache) -> OutputStats:
+    entry = cache.get(artifact)
+    tokens = entry["tokens"] + _marker_tokens(artifact)
+    if entry["scope"] == SKILL_SCOPE:
+        loaded = entry["loaded"]
+    else:
+        loaded = tokens if entry["scope"] == ALWAYS else 0
+    return OutputStats(rel, artifact.source_rel, entry["scope"], tokens, loaded)
+
+
+def over_budget(agents: list[AgentStats], budget: dict) -> list[str]:
+    """Messages for every agent and output exceeding ``budget``.
+
+    An output read by several agents is reported once.
+    """
+    over = []
+    seen = set()
+    for stats in agents:
+        limit: Optional[int] = budget.get("always")
+        if limit is not None and stats.always > limit:
+            over.append(
+                f"{stats.agent}: {stats.always} always-loaded tokens "
+                f"exceed the budget of {limit}"
+            )
+        limit = budget.get("output")
+        if limit is None:
+            continue
+        for o in stats.outputs:
+            if o.tokens > limit and o.path not in seen:
+                seen.add(o.path)
+                over.append(
+                    f"{stats.agent}: {o.path} has {o.tokens} tokens, "
+                    f"over the budget of {limit}"
+                )
+    return over
@@ -0,0 +1,222 @@
+"""Phase timings and trace profiles for `generate --timings` and `--profile`.
+
+Phases are marked with :func:`span` or :func:`traced`, and file I/O is reported
+with :func:`record_read` and :func:`record_written`. All of them are no-ops until
+:func:`tracing` installs a :class:`Tracer`, so instrumented code costs one global
+lookup per call when nobody is measuring.
+
+I/O is attributed to the innermost open span of the calling thread; worker threads
+without a span of their own count towards the innermost span of the thread that
+started tracing.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class PhaseStats:
+    """Totals of every span with the same name."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    files_read: int = 0
+    bytes_read: int = 0
+    files_written: int = 0
+    bytes_written: int = 0
+
+
+class _Span:
+    __slots__ = ("name", "start_ns", "stats")
+
+    def __init__(self, name: str, start_ns: int):
+        self.name = name
+        self.start_ns = start_ns
+        self.stats = PhaseStats(calls=1)
+
+
+class Tracer:
+    """Collects spans as Chrome trace events and aggregates them per phase."""
+
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        self.events: list[dict] = []
+        self.phases: dict[str, PhaseStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main = self._stack()
+        self._tids: dict[int, int] = {}
+
+    def _stack(self) -> list[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        tid = self._tids.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._tids.setdefault(ident, len(self._tids) + 1)
+        return tid
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        current = _Span(name, time.perf_counter_ns())
+        with self._lock:
+            self.phases.setdefault(name, PhaseStats())
+        stack.append(current)
+        try:
+            yield
+        finally:
+            stack.pop()
+            end_ns = time.perf_counter_ns()
+            stats = current.stats
+            stats.seconds = (end_ns - current.start_ns) / 1e9
+            event = {
+                "name": name,
+                "cat": "agentpack",
+                "ph": "X",
+                "ts": (current.start_ns - self.origin_ns) / 1000,
+                "dur": (end_ns - current.start_ns) / 1000,
+                "pid": os.getpid(),
+                "tid": self._tid(),
+                "args": {
+                    "files_read": stats.files_read,
+                    "bytes_read": stats.bytes_read,
+                    "files_written": stats.files_written,
+                    "bytes_written": stats.bytes_written,
+                },
+            }
+            with self._lock:
+                self.events.append(event)
+                total = self.phases[name]
+                total.calls += 1
+                total.seconds += stats.seconds
+                total.files_read += stats.files_read
+                total.bytes_read += stats.bytes_read
+                total.files_written += stats.files_written
+                total.bytes_written += stats.bytes_written
+
+    def _target(self) -> Optional[_Span]:
+        stack = self._stack() or self._main
+        return stack[-1] if stack else None
+
+    def add(self, read: Optional[int] = None, written: Optional[int] = None) -> None:
+        target = self._target()
+        if target is None:
+            return
+        with self._lock:
+            if read is not None:
+                target.stats.files_read += 1
+                target.stats.bytes_read += read
+            if written is not None:
+                target.stats.files_written += 1
+                target.stats.bytes_written += written
+
+    def trace(self) -> dict:
+        """The collected spans in Chrome trace event format."""
+        pid = os.getpid()
+        meta = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": "main" if tid == 1 else f"worker-{tid - 1}"},
+            }
+            for tid in sorted(self._tids.values())
+        ]
+        events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: Path) -> None:
+        path.write_text(json.dumps(self.trace()) + "\n")
+
+    def summary(self) -> list[str]:
+        """Aligned lines with the wall time and I/O of every phase.
+
+        Times of nested phases are included in their parents; I/O is not. Phases
+        running on several threads report the sum over all of them.
+        """
+        width = max((len(name) for name in self.phases), default=5)
+        lines = [
+            f"  {'phase':<{width}}  {'calls':>5}  {'ms':>9}  "
+            f"{'read':>17}  {'written':>17}"
+        ]
+        for name, s in self.phases.items():
+            read = f"{s.files_read} ({_size(s.bytes_read)})"
+            written = f"{s.files_written} ({_size(s.bytes_written)})"
+            lines.append(
+                f"  {name:<{width}}  {s.calls:>5}  {s.seconds * 1000:>9.2f}  "
+                f"{read:>17}  {written:>17}"
+            )
+        return lines
+
+
+def _size(nbytes: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if nbytes < 1024 or unit == "MiB":
+            return f"{nbytes} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GiB"
+
+
+_tracer: Optional[Tracer] = None
+_NULL = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def tracing() -> Iterator[Tracer]:
+    """Install a fresh tracer for the duration of the block."""
+    global _tracer
+    previous, _tracer = _tracer, Tracer()
+    try:
+        yield _tracer
+    finally:
+        _tracer = previous
+
+
+def span(name: str) -> contextlib.AbstractContextManager:
+    """Mark a phase named ``name`` while tracing."""
+    tracer = _tracer
+    return tracer.span(name) if tracer is not None else _NULL
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator marking every call of the function as a phase named ``name``."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def record_read(nbytes: int) -> None:
+    """Count one file of ``nbytes`` read in the current phase."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add(read=nbytes)
+
+
+def record_written(nbytes: int) -> None:
+    """Count one file of ``nbytes`` written in the current phase."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add(written=nbytes)
@@ -0,0 +1,205 @@
+"""Source watchers for `agentpack watch`: inotify on Linux, stat polling elsewhere."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+WATCHED_NAMES = ("agentpack.yaml", "rules", "skills")
+
+# inotify(7) event masks.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _source_dirs(ap_dir: Path) -> list[Path]:
+    """``rules/`` and ``skills/`` plus every directory below them."""
+    dirs = []
+    for name in ("rules", "skills"):
+        top = ap_dir / name
+        if top.is_dir():
+            dirs.append(top)
+            dirs.extend(d for d in top.rglob("*") if d.is_dir())
+    return dirs
+
+
+def snapshot(ap_dir: Path) -> dict[str, tuple]:
+    """Map every watched source path to its ``(size, mtime_ns)``."""
+    state = {}
+    config = ap_dir / "agentpack.yaml"
+    if config.exists():
+        st = config.stat()
+        state["agentpack.yaml"] = (st.st_size, st.st_mtime_ns)
+    for d in _source_dirs(ap_dir):
+        for f in d.iterdir():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            state[f.relative_to(ap_dir).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return state
+
+
+class PollingWatcher:
+    """Detect changes by comparing stat snapshots every ``interval`` seconds."""
+
+    name = "polling"
+
+    def __init__(self, ap_dir: Path, interval: float = 0.5):
+        self.ap_dir = ap_dir
+        self.interval = interval
+        self._state = snapshot(ap_dir)
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds; return True if any source changed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            state = snapshot(self.ap_dir)
+            if state != self._state:
+                self._state = state
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detect changes through Linux inotify, watching every source directory."""
+
+    name = "inotify"
+
+    def __init__(self, ap_dir: Path):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.ap_dir = ap_dir
+        self._fd = fd
+        self._wds: dict[int, Path] = {}
+        self._add(ap_dir)
+        self._add_source_dirs()
+
+    def _add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._wds[wd] = directory
+
+    def _add_source_dirs(self) -> None:
+        watched = set(self._wds.values())
+        for d in _source_dirs(self.ap_dir):
+            if d not in watched:
+                self._add(d)
+
+    def _drain(self) -> bool:
+        """Read pending events; return True if any concerns a watched source."""
+        relevant = False
+        new_dirs = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    relevant = new_dirs = True
+                    continue
+                # Only config and source trees count in the .agentpack/ directory
+                # itself; the state manifest written by generate lives there too.
+                if self._wds.get(wd) == self.ap_dir and name not in WATCHED_NAMES:
+                    continue
+                relevant = True
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    new_dirs = True
+        if new_dirs:
+            self._add_source_dirs()
+        return relevant
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds; return True if any source changed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready and self._drain():
+                return True
+            if not ready:
+                return False
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(ap_dir: Path, interval: float = 0.5, poll: bool = False):
+    """Return an inotify watcher where available, otherwise a polling watcher."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(ap_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(ap_dir, interval)
+
+
+def watch(
+    watcher,
+    on_change: Callable[[], None],
+    debounce: float = 0.2,
+    stop: Optional[threading.Event] = None,
+    tick: float = 0.5,
+) -> None:
+    """Call ``on_change`` after each burst of source changes until ``stop`` is set.
+
+    A burst ends once no further change arrives for ``debounce`` seconds, so a save
+    that touches several files triggers a single regeneration.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        if not watcher.wait(tick):
+            continue
+        while not stop.is_set() and watcher.wait(debounce):
+            pass
+        if not stop.is_set():
+            on_change()
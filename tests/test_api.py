@@ -0,0 +1,127 @@
+"""Tests for the in-process Python API."""
+
+import subprocess
+
+import pytest
+
+from agent_pack import api
+from agent_pack.api import AgentpackError
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    api.init(root)
+    ap_dir = root / ".agentpack"
+    (ap_dir / "agentpack.yaml").write_text("agents: [claude, cursor]\n")
+    (ap_dir / "rules" / "coding.md").write_text("---\ndescription: Coding\n---\n# C\n")
+    return root
+
+
+def test_init_reports_created_files(tmp_path):
+    result = api.init(tmp_path)
+
+    assert result.written == [".agentpack/agentpack.yaml", ".agentpack/rules/CLAUDE.md"]
+    with pytest.raises(AgentpackError, match="Already initialized"):
+        api.init(tmp_path)
+
+
+def test_commands_require_init(tmp_path):
+    for command in (api.generate, api.check, api.sync):
+        with pytest.raises(AgentpackError, match="Not initialized"):
+            command(tmp_path)
+
+
+def test_generate_returns_results_without_printing(project, capsys):
+    result = api.generate(project, jobs=1)
+
+    assert capsys.readouterr() == ("", "")
+    assert result.agents == ["claude", "cursor"]
+    assert result.written == [
+        "CLAUDE.md",
+        ".claude/rules/coding.md",
+        ".cursor/rules/coding.md",
+    ]
+    assert [(o.agent, o.path) for o in result.outputs][0] == ("claude", "CLAUDE.md")
+    assert result.outputs[1].source == ".agentpack/rules/coding.md"
+    assert ".claude/" in result.gitignore
+
+    again = api.generate(project)
+    assert again.written == [] and len(again.unchanged) == 3
+    assert again.gitignore == []
+
+
+def test_generate_reports_skipped_and_deleted(project):
+    api.generate(project)
+    (project / ".agentpack" / "rules" / "coding.md").unlink()
+    (project / "CLAUDE.md").write_text("# Mine\n")
+
+    result = api.generate(project)
+
+    assert result.skipped == ["CLAUDE.md"]
+    assert sorted(result.deleted) == [
+        ".claude/rules/coding.md",
+        ".cursor/rules/coding.md",
+    ]
+
+
+def test_generate_config_errors_raise(project):
+    (project / ".agentpack" / "agentpack.yaml").write_text("agents: []\n")
+    with pytest.raises(AgentpackError, match="No agents configured"):
+        api.generate(project)
+
+
+def test_check_returns_problems(project):
+    api.generate(project)
+    assert api.check(project).ok
+
+    (project / ".cursor" / "rules" / "coding.md").unlink()
+    assert api.check(project).problems == [("missing", ".cursor/rules/coding.md")]
+
+
+def test_sync_returns_merged_files(project, tmp_path, monkeypatch):
+    monkeypatch.setenv("AGENTPACK_CACHE_DIR", str(tmp_path / "cache"))
+    work = tmp_path / "shared"
+    (work / "rules").mkdir(parents=True)
+    (work / "rules" / "security.md").write_text("# Security\n")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@example.com"]
+    subprocess.run([*git, "init", "-q", str(work)], check=True)
+    subprocess.run([*git, "-C", str(work), "add", "-A"], check=True)
+    subprocess.run([*git, "-C", str(work), "commit", "-qm", "init"], check=True)
+    config = project / ".agentpack" / "agentpack.yaml"
+    config.write_text(f"agents: [claude]\nremotes:\n  shared: file://{work}\n")
+
+    result = api.sync(project)
+
+    assert not result.failed
+    assert result.written == [".agentpack/rules/security.md"]
+    assert result.remotes[0].remote.name == "shared"
+    with pytest.raises(AgentpackError, match="Unknown remote"):
+        api.sync(project, "nope")
+
+
+def test_pack_and_unpack_return_results(project, tmp_path):
+    packed = api.pack(project, tmp_path / "team.agentpack.zip")
+
+    assert packed.bundle == tmp_path / "team.agentpack.zip"
+    assert [e.path for e in packed.entries] == ["rules/CLAUDE.md", "rules/coding.md"]
+    assert len(packed.sha256) == 64
+    assert [e.path for e in api.bundle_index(packed.bundle)] == [
+        "rules/CLAUDE.md",
+        "rules/coding.md",
+    ]
+
+    other = tmp_path / "other"
+    other.mkdir()
+    api.init(other)
+    (other / ".agentpack" / "rules" / "CLAUDE.md").write_text("# Mine\n")
+    result = api.unpack(other, packed.bundle)
+    assert result.written == [".agentpack/rules/coding.md"]
+    assert result.skipped == [".agentpack/rules/CLAUDE.md"]
+    forced = api.unpack(other, packed.bundle, force=True)
+    assert forced.written == [".agentpack/rules/CLAUDE.md"]
+    assert forced.unchanged == [".agentpack/rules/coding.md"]
+
+    with pytest.raises(AgentpackError, match="Invalid bundle"):
+        api.unpack(other, project / ".agentpack" / "agentpack.yaml")
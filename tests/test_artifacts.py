@@ -0,0 +1,135 @@
+"""Tests for the canonical artifact loader."""
+
+import os
+from pathlib import Path
+
+from agent_pack.artifacts import MAIN, RULE, SKILL, index_pack, load_artifacts
+from agent_pack.manifest import hash_text
+
+
+def _make_pack(tmp_path):
+    ap_dir = tmp_path / ".agentpack"
+    (ap_dir / "rules").mkdir(parents=True)
+    (ap_dir / "rules" / "CLAUDE.md").write_text(
+        "---\ndescription: Main\nalwaysApply: true\n---\n\n# Main\n"
+    )
+    (ap_dir / "rules" / "coding.md").write_text(
+        "---\ndescription: Coding\npaths: ['src/**']\n---\n\n# Coding\n"
+    )
+    skill_dir = ap_dir / "skills" / "deploy"
+    (skill_dir / "scripts").mkdir(parents=True)
+    (skill_dir / "skill.md").write_text("---\nname: deploy\n---\n\n# Deploy\n")
+    (ap_dir / "skills" / "empty").mkdir()
+    return ap_dir
+
+
+def test_load_artifacts_kinds_and_order(tmp_path):
+    artifacts = load_artifacts(_make_pack(tmp_path))
+    assert [(a.kind, a.name) for a in artifacts] == [
+        (MAIN, "CLAUDE.md"),
+        (RULE, "coding.md"),
+        (SKILL, "deploy"),
+    ]
+
+
+def test_load_artifacts_skips_skill_dirs_without_skill_md(tmp_path):
+    artifacts = load_artifacts(_make_pack(tmp_path))
+    assert [s.name for s in artifacts.skills] == ["deploy"]
+
+
+def test_artifact_frontmatter_and_body(tmp_path):
+    artifacts = load_artifacts(_make_pack(tmp_path))
+    rule = artifacts.rules[0]
+    assert rule.frontmatter == {"description": "Coding", "paths": ["src/**"]}
+    assert rule.body == "\n# Coding\n"
+    assert rule.hash == hash_text(rule.text)
+
+
+def test_artifact_broken_frontmatter_is_empty(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    (ap_dir / "rules" / "broken.md").write_text("---\ndescription: [oops\n---\n")
+    broken = load_artifacts(ap_dir).rules[0]
+    assert broken.name == "broken.md"
+    assert broken.frontmatter == {}
+
+
+def test_artifact_rendered_markers(tmp_path):
+    artifacts = load_artifacts(_make_pack(tmp_path))
+    assert artifacts.main.rendered.startswith(
+        "<!-- GENERATED BY agentpack. Source: .agentpack/rules/CLAUDE.md -->\n"
+    )
+    assert "alwaysApply" not in artifacts.main.rendered
+    skill = artifacts.skills[0]
+    assert skill.source_rel == ".agentpack/skills/deploy/SKILL.md"
+    assert skill.rendered.startswith(
+        "---\n# GENERATED BY agentpack. Source: .agentpack/skills/deploy/SKILL.md\n"
+    )
+    assert skill.supplementary == (skill.source.parent / "scripts",)
+
+
+def test_load_artifacts_reads_each_source_once(tmp_path, monkeypatch):
+    ap_dir = _make_pack(tmp_path)
+    reads = []
+    original = Path.read_text
+
+    def counting_read_text(self, *args, **kwargs):
+        reads.append(self.name)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting_read_text)
+    artifacts = load_artifacts(ap_dir)
+    for artifact in artifacts:
+        artifact.rendered
+        artifact.rendered
+
+    assert sorted(reads) == ["CLAUDE.md", "coding.md", "skill.md"]
+
+
+def _age(ap_dir):
+    """Backdate the pack's directories so their index can be memoized."""
+    for d in [ap_dir / "rules", ap_dir / "skills", *(ap_dir / "skills").iterdir()]:
+        os.utime(d, (0, 0))
+
+
+def test_index_pack_is_memoized_on_directory_stats(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    _age(ap_dir)
+    assert index_pack(ap_dir) is index_pack(ap_dir)
+
+
+def test_index_pack_sees_new_rule_and_new_skill_md(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    _age(ap_dir)
+    first = index_pack(ap_dir)
+
+    (ap_dir / "rules" / "new.md").write_text("# New\n")
+    (ap_dir / "skills" / "empty" / "SKILL.md").write_text("# Empty\n")
+    second = index_pack(ap_dir)
+
+    assert second is not first
+    assert [f.name for f in second.rules] == ["coding.md", "new.md"]
+    assert [name for name, _, _ in second.skills] == ["deploy", "empty"]
+
+
+def test_recent_index_is_not_memoized(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    assert index_pack(ap_dir) is not index_pack(ap_dir)
+
+
+def test_cached_sources_are_reused_only_once_settled(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    coding = ap_dir / "rules" / "coding.md"
+    cache: dict = {}
+    first = load_artifacts(ap_dir, cache).rules[0]
+    assert coding not in cache
+
+    # A same-size edit keeping the mtime is only missed once the file settled.
+    st = coding.stat()
+    coding.write_text(coding.read_text().replace("Coding", "Ciding"))
+    os.utime(coding, ns=(st.st_atime_ns, st.st_mtime_ns))
+    second = load_artifacts(ap_dir, cache).rules[0]
+    assert second.hash != first.hash
+
+    os.utime(coding, (0, 0))
+    third = load_artifacts(ap_dir, cache).rules[0]
+    assert load_artifacts(ap_dir, cache).rules[0] is third
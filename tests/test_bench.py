@@ -0,0 +1,63 @@
+"""Smoke tests for the benchmark harness."""
+
+import json
+
+from typer.testing import CliRunner
+
+from agent_pack.bench import PackSpec, run_benchmarks, synthesize
+
+SPEC = PackSpec(rules=4, skills=2, files=5, min_bytes=8, max_bytes=64, seed=1)
+
+
+def test_synthesize_is_deterministic(tmp_path):
+    synthesize(tmp_path / "a", SPEC)
+    synthesize(tmp_path / "b", SPEC)
+
+    a = {
+        p.relative_to(tmp_path / "a"): p.read_bytes()
+        for p in (tmp_path / "a").rglob("*")
+        if p.is_file()
+    }
+    b = {
+        p.relative_to(tmp_path / "b"): p.read_bytes()
+        for p in (tmp_path / "b").rglob("*")
+        if p.is_file()
+    }
+    assert a == b
+    assert len(list((tmp_path / "a" / "rules").glob("rule-*.md"))) == 4
+    assert len(list((tmp_path / "a" / "skills").iterdir())) == 2
+
+
+def test_run_benchmarks_reports_every_scenario():
+    report = run_benchmarks(SPEC, repeat=1, remotes=1)
+
+    assert set(report["results"]) == {
+        "generate_cold",
+        "copy_supplementary_cold_total",
+        "generate_warm",
+        "generate_noop",
+        "generate_after_removal",
+        "cleanup_stale_generated",
+        "sync_cold",
+        "sync_noop",
+    }
+    assert report["spec"]["rules"] == 4
+    assert len(report["results"]["generate_cold"]["runs"]) == 1
+    json.dumps(report)
+
+
+def test_main_writes_json(tmp_path):
+    import typer
+
+    from agent_pack.bench import main
+
+    app = typer.Typer()
+    app.command()(main)
+    out = tmp_path / "bench.json"
+    result = CliRunner().invoke(
+        app,
+        ["--rules", "2", "--skills", "1", "--repeat", "1", "--no-sync", "-o", str(out)],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "generate_noop" in json.loads(out.read_text())["results"]
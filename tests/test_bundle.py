@@ -0,0 +1,225 @@
+"""Tests for single-file pack bundles."""
+
+import json
+import zipfile
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack.bundle import INDEX_NAME, Bundle, BundleError, write_bundle
+from agent_pack.cli import app
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("AGENTPACK_CACHE_DIR", str(cache))
+    return cache
+
+
+def _make_pack(root):
+    ap_dir = root / ".agentpack"
+    (ap_dir / "rules").mkdir(parents=True)
+    (ap_dir / "agentpack.yaml").write_text("agents: [claude]\n")
+    (ap_dir / "rules" / "style.md").write_text(
+        "---\ndescription: Style guide\npaths: ['src/**']\n---\n\n# Style\n"
+    )
+    skill = ap_dir / "skills" / "deploy"
+    (skill / "scripts").mkdir(parents=True)
+    (skill / "SKILL.md").write_text("---\nname: deploy\n---\n\n# Deploy\n")
+    script = skill / "scripts" / "run.sh"
+    script.write_text("#!/bin/sh\necho deploy\n")
+    script.chmod(0o755)
+    return ap_dir
+
+
+def _project(tmp_path, name="project"):
+    root = tmp_path / name
+    root.mkdir()
+    runner.invoke(app, ["init", str(root)])
+    return root
+
+
+def test_bundle_index_leads_and_describes_files(tmp_path):
+    ap_dir = _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    write_bundle(ap_dir, out)
+
+    with zipfile.ZipFile(out) as zf:
+        first = zf.infolist()[0]
+        assert first.filename == INDEX_NAME
+        assert first.compress_type == zipfile.ZIP_STORED
+        index = json.loads(zf.read(INDEX_NAME))
+    files = {f["path"]: f for f in index["files"]}
+    assert sorted(files) == [
+        "rules/style.md",
+        "skills/deploy/SKILL.md",
+        "skills/deploy/scripts/run.sh",
+    ]
+    assert files["rules/style.md"]["frontmatter"] == {
+        "description": "Style guide",
+        "paths": ["src/**"],
+    }
+    assert files["skills/deploy/scripts/run.sh"]["mode"] == 0o755
+
+
+def test_bundles_are_reproducible(tmp_path):
+    ap_dir = _make_pack(tmp_path / "src")
+    write_bundle(ap_dir, tmp_path / "a.agentpack.zip")
+    (ap_dir / "rules" / "style.md").touch()
+    write_bundle(ap_dir, tmp_path / "b.agentpack.zip")
+    a = (tmp_path / "a.agentpack.zip").read_bytes()
+    assert a == (tmp_path / "b.agentpack.zip").read_bytes()
+
+
+def test_bundle_reads_are_verified(tmp_path):
+    ap_dir = _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    write_bundle(ap_dir, out)
+    with zipfile.ZipFile(out) as zf:
+        members = [(i, zf.read(i.filename)) for i in zf.infolist()]
+    with zipfile.ZipFile(out, "w") as zf:
+        for info, data in members:
+            if info.filename == "rules/style.md":
+                data = b"tampered"
+            zf.writestr(info, data)
+
+    with Bundle(out) as bundle:
+        assert bundle.read("skills/deploy/SKILL.md").startswith(b"---")
+        with pytest.raises(BundleError, match="does not match the index"):
+            bundle.read("rules/style.md")
+
+
+def test_non_bundle_zip_is_rejected(tmp_path):
+    out = tmp_path / "other.agentpack.zip"
+    with zipfile.ZipFile(out, "w") as zf:
+        zf.writestr("rules/x.md", "x")
+    with pytest.raises(BundleError, match="not an agentpack bundle"):
+        Bundle(out)
+
+
+def test_pack_and_unpack_round_trip(tmp_path):
+    _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    result = runner.invoke(app, ["pack", str(tmp_path / "src"), "-o", str(out)])
+    assert result.exit_code == 0, result.output
+    assert "Packed 3 files" in result.output
+
+    project = _project(tmp_path)
+    result = runner.invoke(app, ["unpack", str(out), str(project)])
+
+    assert result.exit_code == 0, result.output
+    script = project / ".agentpack" / "skills" / "deploy" / "scripts" / "run.sh"
+    assert script.stat().st_mode & 0o777 == 0o755
+    assert "Done: 3 written, 0 unchanged, 0 skipped." in result.output
+    again = runner.invoke(app, ["unpack", str(out), str(project)])
+    assert "Done: 0 written, 3 unchanged, 0 skipped." in again.output
+
+
+def test_unpack_keeps_differing_files_without_force(tmp_path):
+    _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    runner.invoke(app, ["pack", str(tmp_path / "src"), "-o", str(out)])
+    project = _project(tmp_path)
+    style = project / ".agentpack" / "rules" / "style.md"
+    style.write_text("# Mine\n")
+
+    result = runner.invoke(app, ["unpack", str(out), str(project)])
+    assert "differs from the bundle" in result.output
+    assert style.read_text() == "# Mine\n"
+
+    runner.invoke(app, ["unpack", str(out), str(project), "--force"])
+    assert style.read_text().endswith("# Style\n")
+
+
+def test_unpack_list_prints_index(tmp_path):
+    _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    runner.invoke(app, ["pack", str(tmp_path / "src"), "-o", str(out)])
+
+    result = runner.invoke(app, ["unpack", str(out), "--list"])
+
+    assert result.exit_code == 0
+    assert "rules/style.md  Style guide" in result.output
+
+
+def _bundle_remote(tmp_path, project):
+    _make_pack(tmp_path / "src")
+    out = tmp_path / "org.agentpack.zip"
+    runner.invoke(app, ["pack", str(tmp_path / "src"), "-o", str(out)])
+    config = project / ".agentpack" / "agentpack.yaml"
+    config.write_text(f"agents: [claude]\nremotes:\n  org: {out}\n")
+    return out
+
+
+def test_sync_merges_bundle_remote(tmp_path):
+    project = _project(tmp_path)
+    _bundle_remote(tmp_path, project)
+
+    result = runner.invoke(app, ["sync", "--path", str(project)])
+
+    assert result.exit_code == 0, result.output
+    assert "added rules/style.md" in result.output
+    assert (project / ".agentpack" / "skills" / "deploy" / "SKILL.md").exists()
+    again = runner.invoke(app, ["sync", "--path", str(project)])
+    assert "(up to date)" in again.output
+
+
+def test_inherited_bundle_is_layered_by_generate(tmp_path, cache_dir):
+    project = _project(tmp_path)
+    _bundle_remote(tmp_path, project)
+    config = project / ".agentpack" / "agentpack.yaml"
+    config.write_text(config.read_text() + "inherit: true\n")
+
+    assert runner.invoke(app, ["sync", "--path", str(project)]).exit_code == 0
+    assert not (project / ".agentpack" / "rules" / "style.md").exists()
+    result = runner.invoke(app, ["generate", str(project)])
+
+    assert result.exit_code == 0, result.output
+    assert (project / ".claude" / "rules" / "style.md").exists()
+    run = project / ".claude" / "skills" / "deploy" / "scripts" / "run.sh"
+    assert run.exists()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "agentpack.yaml",
+        "rules/notes.txt",
+        "rules/sub/x.md",
+        "skills/SKILL.md",
+        "skills/deploy/.hidden",
+        "other/x.md",
+        "rules/../agentpack.yaml",
+        "/etc/passwd",
+    ],
+)
+def test_bundle_rejects_paths_outside_rules_and_skills(tmp_path, path):
+    out = tmp_path / "evil.agentpack.zip"
+    entry = {"path": path, "hash": "0", "size": 1, "mode": 0o644, "frontmatter": {}}
+    with zipfile.ZipFile(out, "w") as zf:
+        zf.writestr(INDEX_NAME, json.dumps({"version": 1, "files": [entry]}))
+        zf.writestr(path.lstrip("/"), "x")
+
+    with pytest.raises(BundleError, match="unsafe path"):
+        Bundle(out)
+
+
+def test_unpack_of_crafted_bundle_leaves_config_alone(tmp_path):
+    project = _project(tmp_path)
+    config = project / ".agentpack" / "agentpack.yaml"
+    before = config.read_text()
+    out = tmp_path / "evil.agentpack.zip"
+    entry = {"path": "agentpack.yaml", "hash": "0", "size": 1, "mode": 0o644}
+    entry["frontmatter"] = {}
+    with zipfile.ZipFile(out, "w") as zf:
+        zf.writestr(INDEX_NAME, json.dumps({"version": 1, "files": [entry]}))
+        zf.writestr("agentpack.yaml", "agents: []\n")
+
+    result = runner.invoke(app, ["unpack", str(out), str(project), "--force"])
+
+    assert result.exit_code == 1
+    assert "unsafe path 'agentpack.yaml'" in result.output
+    assert config.read_text() == before
@@ -0,0 +1,124 @@
+"""Tests for the read-only `check` command."""
+
+import os
+
+from typer.testing import CliRunner
+
+from agent_pack.cli import app
+
+runner = CliRunner()
+
+
+def _generated(tmp_path, agents="[claude, cursor]"):
+    runner.invoke(app, ["init", str(tmp_path)])
+    ap_dir = tmp_path / ".agentpack"
+    (ap_dir / "agentpack.yaml").write_text(f"agents: {agents}\n")
+    (ap_dir / "rules" / "coding.md").write_text(
+        "---\ndescription: Coding standards\n---\n\n# Coding\n"
+    )
+    skill_dir = ap_dir / "skills" / "deploy"
+    (skill_dir / "scripts").mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text("---\nname: deploy\n---\n\n# Deploy\n")
+    (skill_dir / "scripts" / "run.sh").write_text("echo deploy\n")
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    return tmp_path
+
+
+def _check(root):
+    return runner.invoke(app, ["check", str(root)])
+
+
+def _snapshot(root):
+    return {
+        p.relative_to(root).as_posix(): (p.stat().st_mtime_ns, p.read_bytes())
+        for p in root.rglob("*")
+        if p.is_file()
+    }
+
+
+def test_check_passes_after_generate(tmp_path):
+    root = _generated(tmp_path)
+    before = _snapshot(root)
+
+    result = _check(root)
+
+    assert result.exit_code == 0, result.output
+    assert "Up to date: 4 outputs checked." in result.output
+    assert _snapshot(root) == before
+
+
+def test_check_reports_missing_output(tmp_path):
+    root = _generated(tmp_path)
+    (root / ".cursor" / "rules" / "coding.md").unlink()
+
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "missing   .cursor/rules/coding.md" in result.output
+
+
+def test_check_reports_stale_output_after_source_edit(tmp_path):
+    root = _generated(tmp_path)
+    (root / ".agentpack" / "rules" / "coding.md").write_text("# Changed\n")
+
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "stale     .claude/rules/coding.md" in result.output
+    assert "stale     .cursor/rules/coding.md" in result.output
+
+
+def test_check_reports_hand_modified_output(tmp_path):
+    root = _generated(tmp_path)
+    (root / "CLAUDE.md").write_text("# Edited by hand\n")
+
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "modified  CLAUDE.md" in result.output
+
+
+def test_check_reports_outputs_generate_would_remove(tmp_path):
+    root = _generated(tmp_path)
+    (root / ".agentpack" / "rules" / "coding.md").unlink()
+
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "stale     .claude/rules/coding.md" in result.output
+
+
+def test_check_reports_supplementary_files(tmp_path):
+    root = _generated(tmp_path)
+    script = root / ".agentpack" / "skills" / "deploy" / "scripts" / "run.sh"
+    script.write_text("echo changed\n")
+    (script.parent / "new.sh").write_text("echo new\n")
+
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "stale     .claude/skills/deploy/scripts/run.sh" in result.output
+    assert "missing   .claude/skills/deploy/scripts/new.sh" in result.output
+
+
+def test_check_accepts_touched_but_identical_outputs(tmp_path):
+    root = _generated(tmp_path)
+    out = root / ".claude" / "rules" / "coding.md"
+    st = out.stat()
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+
+    assert _check(root).exit_code == 0
+
+
+def test_check_without_manifest_compares_content(tmp_path):
+    root = _generated(tmp_path)
+    (root / ".agentpack" / ".state.json").unlink()
+    assert _check(root).exit_code == 0
+
+    (root / ".agentpack" / "rules" / "coding.md").unlink()
+    result = _check(root)
+
+    assert result.exit_code == 1
+    assert "stale     .claude/rules/coding.md" in result.output
+    assert not (root / ".agentpack" / ".state.json").exists()
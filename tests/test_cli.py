@@ -1,5 +1,8 @@
 """Tests for the CLI."""
 
+import json
+import shutil
+
 from typer.testing import CliRunner
 
 from agent_pack.cli import app
@@ -422,6 +425,54 @@ def test_generate_copies_supplementary_dirs_cursor_only(tmp_path):
     assert out.exists()
 
 
+def test_generate_supplementary_delta_copy(tmp_path):
+    """Editing one supplementary file leaves its unchanged siblings untouched."""
+    _init_with_rules(tmp_path)
+    assets = tmp_path / ".agentpack" / "skills" / "deploy" / "assets"
+    assets.mkdir()
+    (assets / "a.txt").write_text("a")
+    (assets / "b.txt").write_text("b")
+    runner.invoke(app, ["generate", str(tmp_path)])
+    out = tmp_path / ".claude" / "skills" / "deploy" / "assets"
+    inode_b = (out / "b.txt").stat().st_ino
+
+    (assets / "a.txt").write_text("a2")
+    (assets / "c.txt").write_text("c")
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert (out / "a.txt").read_text() == "a2"
+    assert (out / "c.txt").read_text() == "c"
+    assert (out / "b.txt").stat().st_ino == inode_b
+
+
+def test_generate_assets_symlink_mode(tmp_path):
+    _init_with_rules(tmp_path, agents="[claude]")
+    (tmp_path / ".agentpack" / "agentpack.yaml").write_text(
+        "agents: [claude]\nassets: symlink\n"
+    )
+    assets = tmp_path / ".agentpack" / "skills" / "deploy" / "assets"
+    assets.mkdir()
+    (assets / "logo.png").write_bytes(b"png")
+    runner.invoke(app, ["generate", str(tmp_path)])
+    out = tmp_path / ".claude" / "skills" / "deploy" / "assets" / "logo.png"
+    assert out.is_symlink()
+    assert out.read_bytes() == b"png"
+
+    (assets / "logo.png").unlink()
+    runner.invoke(app, ["generate", str(tmp_path)])
+    assert not out.is_symlink()
+
+
+def test_generate_rejects_unknown_assets_mode(tmp_path):
+    _init_with_rules(tmp_path)
+    (tmp_path / ".agentpack" / "agentpack.yaml").write_text(
+        "agents: [claude]\nassets: teleport\n"
+    )
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "Invalid assets mode" in result.output
+
+
 # ---------------------------------------------------------------------------
 # Cleanup of stale generated files
 # ---------------------------------------------------------------------------
@@ -500,13 +551,265 @@ def test_generate_cleanup_removes_deleted_source_rule(tmp_path):
     assert not generated.exists()
 
 
+# ---------------------------------------------------------------------------
+# Incremental generation
+# ---------------------------------------------------------------------------
+
+
+def _snapshot(root):
+    """Map every file under ``root`` to its mtime_ns."""
+    return {
+        f.relative_to(root).as_posix(): f.stat().st_mtime_ns
+        for f in root.rglob("*")
+        if f.is_file()
+    }
+
+
+def test_generate_writes_state_manifest(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    state = json.loads((tmp_path / ".agentpack" / ".state.json").read_text())
+    assert "CLAUDE.md" in state["outputs"]
+    assert ".agentpack/rules/coding.md" in state["sources"]
+
+
+def test_generate_noop_rerun_writes_nothing(tmp_path):
+    _init_with_rules(tmp_path)
+    scripts_dir = tmp_path / ".agentpack" / "skills" / "deploy" / "scripts"
+    scripts_dir.mkdir()
+    (scripts_dir / "run.sh").write_text("echo deploy")
+    runner.invoke(app, ["generate", str(tmp_path)])
+    before = _snapshot(tmp_path)
+
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert _snapshot(tmp_path) == before
+
+
+def test_generate_one_file_edit_rewrites_only_its_outputs(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    before = _snapshot(tmp_path)
+
+    (tmp_path / ".agentpack" / "rules" / "coding.md").write_text(
+        "---\ndescription: Coding standards\n---\n\n# Coding v2\n"
+    )
+    runner.invoke(app, ["generate", str(tmp_path)])
+    after = _snapshot(tmp_path)
+
+    changed = {k for k in after if before.get(k) != after[k]}
+    assert changed == {
+        ".agentpack/rules/coding.md",
+        ".agentpack/.state.json",
+        ".agentpack/.paths.json",
+        ".claude/rules/coding.md",
+        ".cursor/rules/coding.md",
+    }
+    assert "Coding v2" in (tmp_path / ".claude" / "rules" / "coding.md").read_text()
+
+
+def test_generate_restores_deleted_output(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    (tmp_path / ".claude" / "rules" / "coding.md").unlink()
+
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert (tmp_path / ".claude" / "rules" / "coding.md").exists()
+
+
+def test_generate_gitignore_state_file(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    assert ".agentpack/.state.json" in (tmp_path / ".gitignore").read_text()
+
+
+def test_generate_skips_identical_outputs_without_manifest(tmp_path):
+    """Byte-identical outputs are not rewritten even when the manifest is gone."""
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    (tmp_path / ".agentpack" / ".state.json").unlink()
+    before = _snapshot(tmp_path)
+
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+
+    after = _snapshot(tmp_path)
+    changed = {k for k in after if before.get(k) != after[k]}
+    assert changed == {".agentpack/.state.json"}
+    assert "0 written" in result.output
+
+
+def test_generate_summary_counts(tmp_path):
+    _init_with_rules(tmp_path)
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+    assert "Done: 4 written, 0 unchanged, 0 skipped, 0 removed." in result.output
+
+    (tmp_path / ".agentpack" / "rules" / "coding.md").unlink()
+    (tmp_path / "CLAUDE.md").write_text("# mine\n")
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+    assert "Done: 0 written, 1 unchanged, 1 skipped, 2 removed." in result.output
+
+
+def test_generate_leaves_no_temporary_files(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    (tmp_path / ".agentpack" / "rules" / "coding.md").write_text("# v2\n")
+    runner.invoke(app, ["generate", str(tmp_path)])
+    assert not [f for f in tmp_path.rglob("*") if "agentpack-tmp" in f.name]
+
+
+# ---------------------------------------------------------------------------
+# Ledger-based cleanup
+# ---------------------------------------------------------------------------
+
+
+def test_generate_ledger_cleanup_does_not_read_content(tmp_path, monkeypatch):
+    """Stale outputs listed in the ledger are deleted without scanning for markers."""
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    (tmp_path / ".agentpack" / "rules" / "coding.md").unlink()
+
+    def fail(f):
+        raise AssertionError(f"read {f}")
+
+    monkeypatch.setattr("agent_pack.api._file_has_marker", fail)
+    result = runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert not (tmp_path / ".claude" / "rules" / "coding.md").exists()
+    assert not (tmp_path / ".cursor" / "rules" / "coding.md").exists()
+
+
+def test_generate_ledger_removes_stale_supplementary_files(tmp_path):
+    _init_with_rules(tmp_path)
+    scripts_dir = tmp_path / ".agentpack" / "skills" / "deploy" / "scripts"
+    scripts_dir.mkdir()
+    (scripts_dir / "run.sh").write_text("echo deploy")
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    (tmp_path / ".agentpack" / "skills" / "deploy").rename(
+        tmp_path / ".agentpack" / "skills" / "deploy-v2"
+    )
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert not (tmp_path / ".claude" / "skills" / "deploy").exists()
+    out = tmp_path / ".claude" / "skills" / "deploy-v2" / "scripts" / "run.sh"
+    assert out.exists()
+
+
+def test_generate_ledger_keeps_modified_supplementary_files(tmp_path):
+    _init_with_rules(tmp_path)
+    scripts_dir = tmp_path / ".agentpack" / "skills" / "deploy" / "scripts"
+    scripts_dir.mkdir()
+    (scripts_dir / "run.sh").write_text("echo deploy")
+    runner.invoke(app, ["generate", str(tmp_path)])
+    copied = tmp_path / ".claude" / "skills" / "deploy" / "scripts" / "run.sh"
+    copied.write_text("echo my local tweak")
+
+    shutil.rmtree(scripts_dir)
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert copied.read_text() == "echo my local tweak"
+
+
+def test_generate_falls_back_to_marker_scan_without_ledger(tmp_path):
+    _init_with_rules(tmp_path)
+    runner.invoke(app, ["generate", str(tmp_path)])
+    (tmp_path / ".agentpack" / ".state.json").unlink()
+    (tmp_path / ".agentpack" / "rules" / "coding.md").unlink()
+
+    runner.invoke(app, ["generate", str(tmp_path)])
+
+    assert not (tmp_path / ".claude" / "rules" / "coding.md").exists()
+
+
+# ---------------------------------------------------------------------------
+# Parallel generation
+# ---------------------------------------------------------------------------
+
+
+def _add_many_skills(tmp_path, count=12):
+    for i in range(count):
+        skill_dir = tmp_path / ".agentpack" / "skills" / f"skill-{i:02d}"
+        (skill_dir / "assets").mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(f"---\nname: skill-{i:02d}\n---\n")
+        (skill_dir / "assets" / "data.txt").write_text(f"asset {i}\n")
+
+
+def test_generate_parallel_writes_all_outputs(tmp_path):
+    _init_with_rules(tmp_path)
+    _add_many_skills(tmp_path)
+    result = runner.invoke(app, ["generate", "--jobs", "8", str(tmp_path)])
+    assert result.exit_code == 0
+    for i in range(12):
+        skill_out = tmp_path / ".claude" / "skills" / f"skill-{i:02d}"
+        assert (skill_out / "SKILL.md").exists()
+        assert (skill_out / "assets" / "data.txt").read_text() == f"asset {i}\n"
+
+
+def test_generate_parallel_output_is_deterministic(tmp_path):
+    outputs = []
+    for jobs in ("1", "8"):
+        root = tmp_path / f"j{jobs}"
+        root.mkdir()
+        _init_with_rules(root)
+        _add_many_skills(root)
+        (root / ".claude" / "rules").mkdir(parents=True)
+        (root / ".claude" / "rules" / "coding.md").write_text("# mine\n")
+        result = runner.invoke(app, ["generate", "-j", jobs, str(root)])
+        outputs.append(result.output.replace(str(root), "<root>"))
+    assert outputs[0] == outputs[1]
+    assert "WARN: .claude/rules/coding.md already exists" in outputs[0]
+
+
+def test_generate_jobs_must_be_positive(tmp_path):
+    _init_with_rules(tmp_path)
+    result = runner.invoke(app, ["generate", "--jobs", "0", str(tmp_path)])
+    assert result.exit_code != 0
+
+
+# ---------------------------------------------------------------------------
+# Recursive generation
+# ---------------------------------------------------------------------------
+
+
+def test_generate_recursive_generates_every_root(tmp_path):
+    for name in ("pkg-a", "libs/pkg-b"):
+        _init_with_rules(tmp_path / name)
+    result = runner.invoke(app, ["generate", "--recursive", "-j", "2", str(tmp_path)])
+    assert result.exit_code == 0
+    assert (tmp_path / "pkg-a" / "CLAUDE.md").exists()
+    assert (tmp_path / "libs" / "pkg-b" / ".claude" / "rules" / "coding.md").exists()
+    assert "pkg-a: ok (4 written, 0 skipped, 0 removed)" in result.output
+    assert "2 succeeded, 0 failed" in result.output
+
+
+def test_generate_recursive_reports_failures_per_root(tmp_path):
+    _init_with_rules(tmp_path / "good")
+    _init_with_rules(tmp_path / "bad")
+    (tmp_path / "bad" / ".agentpack" / "agentpack.yaml").write_text("agents: []\n")
+    result = runner.invoke(app, ["generate", "-r", "-j", "1", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "bad: FAILED" in result.output
+    assert "No agents configured" in result.output
+    assert "1 succeeded, 1 failed" in result.output
+    assert (tmp_path / "good" / "CLAUDE.md").exists()
+
+
+def test_generate_recursive_without_roots_fails(tmp_path):
+    result = runner.invoke(app, ["generate", "--recursive", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "No .agentpack/ directories found" in result.output
+
+
 # ---------------------------------------------------------------------------
 # Misc
 # ---------------------------------------------------------------------------
 
 
 def test_generate_case_insensitive_skill_md(tmp_path):
-    """_find_skill_md matches skill.md case-insensitively."""
+    """find_skill_md matches skill.md case-insensitively."""
     _init_with_rules(tmp_path)
     skill_dir = tmp_path / ".agentpack" / "skills" / "review"
     skill_dir.mkdir(parents=True)
@@ -515,8 +818,3 @@ def test_generate_case_insensitive_skill_md(tmp_path):
     )
     runner.invoke(app, ["generate", str(tmp_path)])
     assert (tmp_path / ".claude" / "skills" / "review" / "SKILL.md").exists()
-
-
-def test_sync_stub():
-    result = runner.invoke(app, ["sync"])
-    assert result.exit_code == 0
@@ -0,0 +1,130 @@
+"""Tests for near-duplicate detection and `agentpack dedupe`."""
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack import api, dedupe
+from agent_pack.api import AgentpackError
+from agent_pack.artifacts import load_artifacts
+from agent_pack.cli import app
+
+runner = CliRunner()
+
+TESTS = (
+    "Always write unit tests for new functions and keep them close to the code "
+    "they cover, using pytest fixtures instead of setup methods."
+)
+ERRORS = (
+    "Raise specific exception types and never swallow errors silently; log the "
+    "context needed to reproduce the failure before re-raising it."
+)
+
+
+def _rule(ap_dir, name, body, paths=None):
+    scope = f"paths: {paths}\n" if paths else ""
+    (ap_dir / "rules" / name).write_text(
+        f"---\ndescription: {name}\n{scope}---\n# {name}\n\n{body}\n"
+    )
+
+
+@pytest.fixture
+def ap_dir(tmp_path):
+    runner.invoke(app, ["init", str(tmp_path)])
+    return tmp_path / ".agentpack"
+
+
+def test_split_blocks_keeps_fences_and_line_numbers(ap_dir):
+    _rule(ap_dir, "a.md", "First para\nstill first.\n\n```\ncode\n\nmore code\n```")
+    (rule,) = load_artifacts(ap_dir).rules
+
+    blocks = dedupe.split_blocks(rule)
+
+    assert [(b.lines, b.text.split("\n")[0]) for b in blocks] == [
+        ((4, 4), "# a.md"),
+        ((6, 7), "First para"),
+        ((9, 13), "```"),
+    ]
+
+
+def test_finds_near_duplicates_across_rules_and_skills(ap_dir):
+    _rule(ap_dir, "a.md", f"{TESTS}\n\n{ERRORS}")
+    _rule(ap_dir, "b.md", TESTS.replace("Always", "Please always"))
+    _rule(
+        ap_dir, "c.md", "Unrelated guidance about naming database tables in snake case."
+    )
+    skill = ap_dir / "skills" / "review"
+    skill.mkdir()
+    (skill / "SKILL.md").write_text(f"---\nname: review\n---\n{ERRORS}\n")
+
+    groups = dedupe.find_duplicates(load_artifacts(ap_dir))
+
+    assert sorted([b.location for b in g.blocks] for g in groups) == [
+        [".agentpack/rules/a.md:6", ".agentpack/rules/b.md:6"],
+        [".agentpack/rules/a.md:8", ".agentpack/skills/review/SKILL.md:4"],
+    ]
+    assert all(0.8 <= g.similarity <= 1 for g in groups)
+    assert all(g.saved == g.tokens for g in groups)
+
+
+def test_repeats_within_one_file_and_short_blocks_are_ignored(ap_dir):
+    _rule(ap_dir, "a.md", f"{TESTS}\n\n{TESTS}\n\nKeep it short.")
+    _rule(ap_dir, "b.md", "Keep it short.")
+    assert dedupe.find_duplicates(load_artifacts(ap_dir)) == []
+
+
+def test_collapse_moves_copies_into_shared_rules_by_scope(ap_dir):
+    _rule(ap_dir, "a.md", TESTS, paths="['src/**']")
+    _rule(ap_dir, "b.md", f"{TESTS}\n\n{ERRORS}", paths="['lib/**']")
+    _rule(ap_dir, "c.md", ERRORS)
+    root = ap_dir.parent
+
+    result = api.dedupe(root, collapse=True)
+
+    assert sorted(result.written) == [
+        ".agentpack/rules/a.md",
+        ".agentpack/rules/b.md",
+        ".agentpack/rules/c.md",
+        ".agentpack/rules/shared-1.md",
+        ".agentpack/rules/shared.md",
+    ]
+    rules = ap_dir / "rules"
+    assert (
+        rules / "a.md"
+    ).read_text() == "---\ndescription: a.md\npaths: ['src/**']\n---\n# a.md\n"
+    assert (rules / "shared.md").read_text() == (
+        f"---\ndescription: Guidance shared by several rules\n---\n\n{ERRORS}\n"
+    )
+    assert (rules / "shared-1.md").read_text() == (
+        "---\ndescription: Guidance shared by several rules\n"
+        f'paths: ["lib/**", "src/**"]\n---\n\n{TESTS}\n'
+    )
+    assert api.dedupe(root).groups == []
+
+
+def test_collapse_leaves_skills_alone(ap_dir):
+    _rule(ap_dir, "a.md", TESTS)
+    skill = ap_dir / "skills" / "review"
+    skill.mkdir()
+    (skill / "SKILL.md").write_text(f"---\nname: review\n---\n{TESTS}\n")
+
+    result = api.dedupe(ap_dir.parent, collapse=True)
+
+    assert len(result.groups) == 1
+    assert result.written == []
+
+
+def test_dedupe_command_reports_groups(ap_dir):
+    _rule(ap_dir, "a.md", TESTS)
+    _rule(ap_dir, "b.md", TESTS)
+
+    result = runner.invoke(app, ["dedupe", str(ap_dir.parent)])
+
+    assert result.exit_code == 0
+    assert "2 copies" in result.output
+    assert "  .agentpack/rules/a.md:6\n  .agentpack/rules/b.md:6\n" in result.output
+    assert "Found 1 duplicated paragraph(s)" in result.output
+
+
+def test_dedupe_rejects_bad_threshold(ap_dir):
+    with pytest.raises(AgentpackError, match="threshold"):
+        api.dedupe(ap_dir.parent, threshold=1.5)
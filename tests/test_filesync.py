@@ -0,0 +1,186 @@
+"""Tests for delta synchronisation of supplementary directories."""
+
+import errno
+import os
+import threading
+
+from agent_pack.filesync import (
+    COPY,
+    HARDLINK,
+    REFLINK,
+    SYMLINK,
+    copy_file,
+    sync_tree,
+    write_atomic,
+)
+
+
+def _tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.txt").write_text("alpha")
+    (src / "sub" / "b.bin").write_bytes(os.urandom(3 * 1024 * 1024))
+    return src
+
+
+def test_sync_tree_initial_copy(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    stats = sync_tree(src, dest)
+    assert (stats.copied, stats.deleted, stats.unchanged) == (2, 0, 0)
+    assert (dest / "a.txt").read_text() == "alpha"
+    assert (dest / "sub" / "b.bin").read_bytes() == (src / "sub" / "b.bin").read_bytes()
+
+
+def test_sync_tree_skips_unchanged_files(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest)
+    inode = (dest / "sub" / "b.bin").stat().st_ino
+
+    (src / "a.txt").write_text("alpha v2")
+    stats = sync_tree(src, dest)
+
+    assert (stats.copied, stats.unchanged) == (1, 1)
+    assert (dest / "a.txt").read_text() == "alpha v2"
+    assert (dest / "sub" / "b.bin").stat().st_ino == inode
+
+
+def test_sync_tree_touched_identical_file_is_not_rewritten(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest)
+    inode = (dest / "a.txt").stat().st_ino
+    os.utime(src / "a.txt", ns=(1, 1_000_000_000))
+
+    stats = sync_tree(src, dest)
+
+    assert stats.copied == 0
+    assert (dest / "a.txt").stat().st_ino == inode
+    assert (dest / "a.txt").stat().st_mtime_ns == 1_000_000_000
+
+
+def test_sync_tree_deletes_removed_files(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest)
+    (src / "sub" / "b.bin").unlink()
+
+    stats = sync_tree(src, dest)
+
+    assert stats.deleted == 1
+    assert not (dest / "sub").exists()
+    assert (dest / "a.txt").exists()
+
+
+def test_copy_file_preserves_mode_and_mtime(tmp_path):
+    src = tmp_path / "run.sh"
+    src.write_text("#!/bin/sh\n")
+    src.chmod(0o755)
+    dst = tmp_path / "out" / "run.sh"
+    copy_file(src, dst)
+    assert dst.read_text() == "#!/bin/sh\n"
+    assert dst.stat().st_mode & 0o777 == 0o755
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+
+def test_copy_file_completes_a_kernel_copy_that_stops_early(tmp_path, monkeypatch):
+    src = tmp_path / "data.bin"
+    src.write_bytes(os.urandom(3 * 1024 * 1024))
+    calls = []
+
+    def short_copy(infd, outfd, count):
+        # Copies one chunk, then reports end of file before ``count`` bytes.
+        calls.append(count)
+        return os.write(outfd, os.read(infd, 4096)) if len(calls) == 1 else 0
+
+    monkeypatch.setattr(os, "copy_file_range", short_copy, raising=False)
+    monkeypatch.delattr(os, "sendfile", raising=False)
+    dst = tmp_path / "out" / "data.bin"
+    copy_file(src, dst)
+    assert len(calls) == 2
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_write_atomic_keeps_the_mode_of_the_replaced_file(tmp_path):
+    path = tmp_path / "AGENTS.md"
+    write_atomic(path, b"v1\n")
+    path.chmod(0o444)
+    write_atomic(path, b"v2\n")
+    assert path.read_bytes() == b"v2\n"
+    assert path.stat().st_mode & 0o777 == 0o444
+
+
+def test_concurrent_writes_of_one_output_do_not_collide(tmp_path):
+    path = tmp_path / "CLAUDE.md"
+    errors = []
+
+    def writer(data):
+        try:
+            for _ in range(200):
+                write_atomic(path, data)
+        except OSError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(b"%d\n" % i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert path.read_bytes() in {b"%d\n" % i for i in range(4)}
+    assert [f.name for f in tmp_path.iterdir()] == ["CLAUDE.md"]
+
+
+def test_sync_tree_hardlink_mode_shares_inodes(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest, HARDLINK)
+    assert (dest / "a.txt").stat().st_ino == (src / "a.txt").stat().st_ino
+    assert sync_tree(src, dest, HARDLINK).unchanged == 2
+
+
+def test_sync_tree_symlink_mode_links_to_source(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest, SYMLINK)
+    link = dest / "sub" / "b.bin"
+    assert link.is_symlink()
+    assert not os.path.isabs(os.readlink(link))
+    assert link.resolve() == (src / "sub" / "b.bin").resolve()
+    assert sync_tree(src, dest, SYMLINK).unchanged == 2
+
+
+def test_sync_tree_reflink_mode_produces_identical_files(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest, REFLINK)
+    assert not (dest / "a.txt").is_symlink()
+    assert (dest / "sub" / "b.bin").read_bytes() == (src / "sub" / "b.bin").read_bytes()
+
+
+def test_sync_tree_hardlink_falls_back_to_copy(tmp_path, monkeypatch):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+
+    def cross_device(*args, **kwargs):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+    sync_tree(src, dest, HARDLINK)
+
+    assert (dest / "a.txt").read_text() == "alpha"
+    assert (dest / "a.txt").stat().st_ino != (src / "a.txt").stat().st_ino
+
+
+def test_sync_tree_switching_modes_replaces_links(tmp_path):
+    src = _tree(tmp_path)
+    dest = tmp_path / "dest"
+    sync_tree(src, dest, SYMLINK)
+    sync_tree(src, dest, COPY)
+    assert not (dest / "a.txt").is_symlink()
+
+    sync_tree(src, dest, HARDLINK)
+    sync_tree(src, dest, COPY)
+    assert (dest / "a.txt").stat().st_ino != (src / "a.txt").stat().st_ino
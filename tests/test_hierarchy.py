@@ -0,0 +1,128 @@
+"""Tests for hierarchy resolution across user, parent-project and repo packs."""
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack.artifacts import AGENTPACK_DIR
+from agent_pack.cli import app
+from agent_pack.hierarchy import (
+    PROJECT,
+    REPO,
+    USER,
+    project_levels,
+    resolve_artifacts,
+    resolve_levels,
+)
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def user_dir(tmp_path, monkeypatch):
+    user = tmp_path / "home" / ".config" / "agentpack"
+    monkeypatch.setenv("AGENTPACK_CONFIG_DIR", str(user))
+    monkeypatch.setenv("AGENTPACK_CACHE_DIR", str(tmp_path / "cache"))
+    return user
+
+
+def _pack(pack, rules=(), skills=(), main=None):
+    (pack / "rules").mkdir(parents=True, exist_ok=True)
+    for name in rules:
+        (pack / "rules" / name).write_text(f"# {name} from {pack.parent.name}\n")
+    for name in skills:
+        skill = pack / "skills" / name
+        skill.mkdir(parents=True)
+        (skill / "SKILL.md").write_text(f"---\nname: {name}\n---\n")
+    if main:
+        (pack / "rules" / "CLAUDE.md").write_text(main)
+    return pack
+
+
+def _repo(tmp_path, **kwargs):
+    root = tmp_path / "org" / "repo"
+    ap_dir = _pack(root / AGENTPACK_DIR, **kwargs)
+    (ap_dir / "agentpack.yaml").write_text("agents: [claude]\ninherit: true\n")
+    return root, ap_dir
+
+
+def _resolve(root, ap_dir):
+    levels, _ = resolve_levels(root, ap_dir, {})
+    return resolve_artifacts(levels)
+
+
+def test_levels_are_ordered_by_precedence(tmp_path, user_dir):
+    _pack(tmp_path / AGENTPACK_DIR)
+    _pack(tmp_path / "org" / AGENTPACK_DIR)
+    _pack(user_dir)
+    root, ap_dir = _repo(tmp_path)
+
+    levels, _ = resolve_levels(root, ap_dir, {})
+
+    assert [(lvl.kind, lvl.label) for lvl in levels] == [
+        (PROJECT, "../../.agentpack"),
+        (PROJECT, "../.agentpack"),
+        (REPO, ".agentpack"),
+        (USER, user_dir.as_posix()),
+    ]
+
+
+def test_overrides_are_keyed_by_rule_filename_and_skill_name(tmp_path, user_dir):
+    _pack(tmp_path / AGENTPACK_DIR, rules=["a.md", "b.md", "c.md"], skills=["s"])
+    _pack(tmp_path / "org" / AGENTPACK_DIR, rules=["b.md"], skills=["s", "t"])
+    _pack(user_dir, rules=["c.md"])
+    root, ap_dir = _repo(tmp_path, rules=["a.md"])
+
+    artifacts = _resolve(root, ap_dir)
+
+    assert {r.name: r.source_rel for r in artifacts.rules} == {
+        "a.md": ".agentpack/rules/a.md",
+        "b.md": "../.agentpack/rules/b.md",
+        "c.md": f"{user_dir.as_posix()}/rules/c.md",
+    }
+    assert {s.name: s.source_rel for s in artifacts.skills} == {
+        "s": "../.agentpack/skills/s/SKILL.md",
+        "t": "../.agentpack/skills/t/SKILL.md",
+    }
+
+
+def test_main_comes_from_repo_then_nearest_parent(tmp_path, user_dir):
+    _pack(tmp_path / AGENTPACK_DIR, main="# Top\n")
+    _pack(tmp_path / "org" / AGENTPACK_DIR, main="# Org\n")
+    _pack(user_dir, main="# User\n")
+    root, ap_dir = _repo(tmp_path)
+    assert _resolve(root, ap_dir).main.text == "# Org\n"
+
+    (ap_dir / "rules" / "CLAUDE.md").write_text("# Repo\n")
+    assert _resolve(root, ap_dir).main.text == "# Repo\n"
+
+
+def test_project_levels_ignore_root_itself(tmp_path):
+    root, _ = _repo(tmp_path)
+    assert project_levels(root) == []
+
+
+def test_generate_inherits_when_enabled(tmp_path):
+    _pack(tmp_path / "org" / AGENTPACK_DIR, rules=["shared.md"])
+    root, ap_dir = _repo(tmp_path, main="# Repo\n")
+
+    result = runner.invoke(app, ["generate", str(root)])
+
+    assert result.exit_code == 0, result.output
+    out = (root / ".claude" / "rules" / "shared.md").read_text()
+    assert "Source: ../.agentpack/rules/shared.md" in out
+
+    (ap_dir / "agentpack.yaml").write_text("agents: [claude]\n")
+    runner.invoke(app, ["generate", str(root)])
+    assert not (root / ".claude" / "rules" / "shared.md").exists()
+
+
+def test_generate_copies_inherited_skill_assets(tmp_path, user_dir):
+    _pack(user_dir, skills=["tool"])
+    (user_dir / "skills" / "tool" / "scripts").mkdir()
+    (user_dir / "skills" / "tool" / "scripts" / "run.sh").write_text("echo\n")
+    root, _ = _repo(tmp_path, main="# Repo\n")
+
+    result = runner.invoke(app, ["generate", str(root)])
+
+    assert result.exit_code == 0, result.output
+    assert (root / ".claude" / "skills" / "tool" / "scripts" / "run.sh").exists()
@@ -0,0 +1,162 @@
+"""Tests for frontmatter validation and `agentpack lint`."""
+
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack import api, lint
+from agent_pack.artifacts import MAIN, RULE, SKILL
+from agent_pack.cli import app
+from agent_pack.lint import ERROR, LINT_FILE, WARNING, lint_source
+
+runner = CliRunner()
+
+
+def _issues(kind, name, text):
+    return [
+        (i.line, i.severity, i.message) for i in lint_source(kind, name, "f.md", text)
+    ]
+
+
+def test_valid_sources_have_no_issues():
+    assert _issues(RULE, "a.md", "---\ndescription: A\npaths: ['src/**']\n---\n") == []
+    assert _issues(RULE, "a.md", "---\ndescription: A\nalwaysApply: true\n---\n") == []
+    assert _issues(MAIN, "CLAUDE.md", "# Just instructions\n") == []
+    skill = (
+        "---\nname: deploy-2\ndescription: D\ncontext: fork\nagent: Explore\n"
+        "metadata: {owner: ops}\nlicense: MIT\n---\n"
+    )
+    assert _issues(SKILL, "deploy-2", skill) == []
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("# no frontmatter\n", [(None, ERROR, "missing frontmatter")]),
+        ("---\ndescription: A\n", [(1, ERROR, "frontmatter is not closed with '---'")]),
+        ("---\n- a\n---\n", [(2, ERROR, "frontmatter must be a mapping of fields")]),
+        (
+            "---\npaths: ['a']\n---\n",
+            [(None, ERROR, "missing required field 'description'")],
+        ),
+        (
+            "---\ndescription: A\npaths: {a: 1}\nalwaysApply: 'yes'\nglobs: x\n---\n",
+            [
+                (3, ERROR, "'paths' must be a glob or a list of globs"),
+                (4, ERROR, "'alwaysApply' must be true or false"),
+                (5, WARNING, "unknown field 'globs'"),
+            ],
+        ),
+        (
+            "---\ndescription: A\npaths: ['']\n---\n",
+            [(3, WARNING, "'paths' is empty, so the rule always applies")],
+        ),
+    ],
+)
+def test_rule_issues(text, expected):
+    assert _issues(RULE, "a.md", text) == expected
+
+
+def test_broken_yaml_is_an_error_with_its_line():
+    (issue,) = _issues(RULE, "a.md", "---\ndescription: A\npaths: [a, b\n---\n")
+    assert issue[1] == ERROR
+    assert issue[2].startswith("invalid YAML in frontmatter")
+    assert issue[0] >= 3
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            "---\ndescription: D\n---\n",
+            [(None, ERROR, "missing required field 'name'")],
+        ),
+        (
+            "---\nname: other\n---\n",
+            [(2, ERROR, "name 'other' does not match directory 'deploy'")],
+        ),
+        (
+            "---\nname: Deploy_It\n---\n",
+            [
+                (
+                    2,
+                    ERROR,
+                    "name 'Deploy_It' must use lowercase letters, numbers and hyphens",
+                )
+            ],
+        ),
+        (
+            "---\nname: deploy\ncontext: main\nagent: x\n"
+            "user-invocable: no thanks\n---\n",
+            [
+                (3, ERROR, "'context' must be 'fork'"),
+                (4, WARNING, "'agent' has no effect without context: fork"),
+                (5, ERROR, "'user-invocable' must be true or false"),
+            ],
+        ),
+    ],
+)
+def test_skill_issues(text, expected):
+    assert _issues(SKILL, "deploy", text) == expected
+
+
+def _project(tmp_path):
+    runner.invoke(app, ["init", str(tmp_path)])
+    rules = tmp_path / ".agentpack" / "rules"
+    (rules / "good.md").write_text("---\ndescription: Good\n---\n")
+    (rules / "bad.md").write_text("---\npaths: [src]\n---\n")
+    skill = tmp_path / ".agentpack" / "skills" / "deploy"
+    skill.mkdir()
+    (skill / "SKILL.md").write_text("---\nname: ship\n---\n")
+    return tmp_path
+
+
+def test_lint_command_reports_and_fails_on_errors(tmp_path):
+    root = _project(tmp_path)
+
+    result = runner.invoke(app, ["lint", str(root)])
+
+    assert result.exit_code == 1
+    assert ".agentpack/rules/bad.md: error: missing required field 'description'" in (
+        result.output
+    )
+    assert (
+        ".agentpack/skills/deploy/SKILL.md:2: error: name 'ship' does not match "
+        "directory 'deploy'" in result.output
+    )
+    assert "Checked 4 files: 2 error(s), 0 warning(s)." in result.output
+
+
+def test_lint_caches_results_by_file_hash(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    first = api.lint(root)
+    assert first.cached == 0
+    cache = json.loads((root / ".agentpack" / LINT_FILE).read_text())
+    assert len(cache["results"]) == 4
+
+    calls = []
+    original = lint.lint_source
+    monkeypatch.setattr(lint, "lint_source", lambda *a: calls.append(a) or original(*a))
+    second = api.lint(root)
+    assert (second.cached, second.issues, calls) == (4, first.issues, [])
+
+    (root / ".agentpack" / "rules" / "bad.md").write_text("---\ndescription: Ok\n---\n")
+    third = api.lint(root)
+    assert [c[1] for c in calls] == ["bad.md"]
+    assert third.cached == 3
+    assert [i.path for i in third.issues] == [".agentpack/skills/deploy/SKILL.md"]
+
+
+def test_lint_on_worker_processes(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    rules = root / ".agentpack" / "rules"
+    for i in range(20):
+        (rules / f"r{i}.md").write_text(f"---\ndescription: R{i}\nextra: {i}\n---\n")
+    monkeypatch.setattr(lint, "MIN_PARALLEL", 4)
+
+    result = api.lint(root, jobs=2)
+
+    assert result.checked == 24
+    assert len(result.errors) == 2
+    assert sum(i.message == "unknown field 'extra'" for i in result.issues) == 20
@@ -0,0 +1,35 @@
+"""Tests for recursive `.agentpack/` discovery."""
+
+import subprocess
+
+from agent_pack.monorepo import discover_roots
+
+
+def _pack(path):
+    (path / ".agentpack").mkdir(parents=True)
+
+
+def test_discover_roots_finds_nested_packs(tmp_path):
+    for rel in ("a", "a/nested", "b/c"):
+        _pack(tmp_path / rel)
+    assert discover_roots(tmp_path) == [
+        tmp_path / "a",
+        tmp_path / "a" / "nested",
+        tmp_path / "b" / "c",
+    ]
+
+
+def test_discover_roots_skips_vendored_and_hidden_trees(tmp_path):
+    _pack(tmp_path / "app")
+    _pack(tmp_path / "node_modules" / "dep")
+    _pack(tmp_path / "vendor" / "lib")
+    _pack(tmp_path / ".cache" / "thing")
+    assert discover_roots(tmp_path) == [tmp_path / "app"]
+
+
+def test_discover_roots_skips_git_ignored_dirs(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    (tmp_path / ".gitignore").write_text("generated/\n")
+    _pack(tmp_path / "app")
+    _pack(tmp_path / "generated" / "copy")
+    assert discover_roots(tmp_path) == [tmp_path / "app"]
@@ -0,0 +1,157 @@
+"""Tests for the path-scoped rule index and `agentpack which`."""
+
+import json
+import re
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack.cli import app
+from agent_pack.paths import INDEX_FILE, expand_braces, glob_regex
+
+runner = CliRunner()
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("*.md", "README.md", True),
+        ("*.md", "docs/README.md", False),
+        ("**/*.md", "README.md", True),
+        ("**/*.md", "docs/a/README.md", True),
+        ("src/**", "src/a/b.py", True),
+        ("src/**", "srcx/a.py", False),
+        ("src/*/x.py", "src/a/x.py", True),
+        ("src/*/x.py", "src/a/b/x.py", False),
+        ("src/**/test_?.py", "src/test_1.py", True),
+        ("file[0-9].txt", "file7.txt", True),
+        ("file[!0-9].txt", "file7.txt", False),
+        ("a+b.txt", "a+b.txt", True),
+    ],
+)
+def test_glob_semantics(pattern, path, expected):
+    assert bool(re.fullmatch(glob_regex(pattern), path)) is expected
+
+
+def test_expand_braces():
+    assert expand_braces("src/{a,b}/*.{ts,tsx}") == [
+        "src/a/*.ts",
+        "src/a/*.tsx",
+        "src/b/*.ts",
+        "src/b/*.tsx",
+    ]
+
+
+def _project(tmp_path):
+    runner.invoke(app, ["init", str(tmp_path)])
+    rules = tmp_path / ".agentpack" / "rules"
+    (rules / "api.md").write_text(
+        "---\ndescription: API\npaths: ['src/api/**/*.{ts,tsx}', 'openapi.yaml']\n"
+        "---\n# API\n"
+    )
+    (rules / "python.md").write_text(
+        "---\ndescription: Python\npaths: '**/*.py'\n---\n# Python\n"
+    )
+    (rules / "style.md").write_text("---\ndescription: Style\n---\n# Style\n")
+    (rules / "forced.md").write_text(
+        "---\ndescription: Forced\npaths: ['docs/**']\nalwaysApply: true\n---\n"
+    )
+    return tmp_path
+
+
+def _which(root, *files):
+    result = runner.invoke(app, ["which", "--json", "--path", str(root), *files])
+    assert result.exit_code == 0, result.output
+    return {
+        name: [(m["rule"], m["glob"]) for m in found]
+        for name, found in json.loads(result.output).items()
+    }
+
+
+def test_which_reports_always_and_scoped_rules(tmp_path):
+    root = _project(tmp_path)
+    runner.invoke(app, ["generate", str(root)])
+    always = [("CLAUDE.md", None), ("forced.md", None), ("style.md", None)]
+
+    found = _which(
+        root,
+        str(root / "src/api/v1/users.tsx"),
+        str(root / "openapi.yaml"),
+        str(root / "tools/gen.py"),
+        str(root / "src/web/app.ts"),
+    )
+
+    assert found == {
+        str(root / "src/api/v1/users.tsx"): always + [("api.md", "src/api/**/*.tsx")],
+        str(root / "openapi.yaml"): always + [("api.md", "openapi.yaml")],
+        str(root / "tools/gen.py"): always + [("python.md", "**/*.py")],
+        str(root / "src/web/app.ts"): always,
+    }
+
+
+def test_generate_saves_grouped_index(tmp_path):
+    root = _project(tmp_path)
+    runner.invoke(app, ["generate", str(root)])
+
+    data = json.loads((root / ".agentpack" / INDEX_FILE).read_text())
+    groups = {
+        (prefix, ext): entries for prefix, ext, entries in data["index"]["groups"]
+    }
+    assert set(groups) == {
+        ("src/api", "ts"),
+        ("src/api", "tsx"),
+        ("", "yaml"),
+        ("", "py"),
+    }
+    assert ".agentpack/.paths.json" in (root / ".gitignore").read_text()
+
+
+def test_which_rebuilds_a_stale_index_without_writing(tmp_path):
+    root = _project(tmp_path)
+    runner.invoke(app, ["generate", str(root)])
+    index = root / ".agentpack" / INDEX_FILE
+    before = index.read_bytes()
+    (root / ".agentpack" / "rules" / "go.md").write_text(
+        "---\ndescription: Go\npaths: ['**/*.go']\n---\n"
+    )
+
+    found = _which(root, str(root / "cmd/main.go"))
+
+    assert ("go.md", "**/*.go") in found[str(root / "cmd/main.go")]
+    assert index.read_bytes() == before
+
+
+def test_which_notices_new_rules_in_inherited_packs(tmp_path, monkeypatch):
+    user = tmp_path / "user"
+    (user / "rules").mkdir(parents=True)
+    monkeypatch.setenv("AGENTPACK_CONFIG_DIR", str(user))
+    root = _project(tmp_path / "repo")
+    config = root / ".agentpack" / "agentpack.yaml"
+    config.write_text(config.read_text() + "inherit: true\n")
+    runner.invoke(app, ["generate", str(root)])
+
+    (user / "rules" / "go.md").write_text(
+        "---\ndescription: Go\npaths: ['**/*.go']\n---\n"
+    )
+
+    found = _which(root, str(root / "cmd/main.go"))
+    assert ("go.md", "**/*.go") in found[str(root / "cmd/main.go")]
+
+
+def test_which_without_generate(tmp_path):
+    root = _project(tmp_path)
+    found = _which(root, str(root / "a.py"))
+    assert ("python.md", "**/*.py") in found[str(root / "a.py")]
+    assert not (root / ".agentpack" / INDEX_FILE).exists()
+
+
+def test_which_text_output_and_outside_files(tmp_path):
+    root = _project(tmp_path)
+
+    result = runner.invoke(
+        app, ["which", "--path", str(root), str(root / "x.py"), "/elsewhere/y.py"]
+    )
+
+    assert result.exit_code == 0
+    assert "  python.md  **/*.py" in result.output
+    assert "WARN: /elsewhere/y.py is outside" in result.output
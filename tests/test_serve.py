@@ -0,0 +1,177 @@
+"""Tests for the `agentpack serve` daemon and the client relaying to it."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack import api, serve
+from agent_pack.cli import app
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def sock(monkeypatch):
+    # Unix socket paths are limited to about 100 bytes, so stay out of tmp_path.
+    base = Path(tempfile.mkdtemp(prefix="ap-"))
+    path = base / "agentpack.sock"
+    monkeypatch.setenv("AGENTPACK_SOCKET", str(path))
+    monkeypatch.delenv("AGENTPACK_NO_DAEMON", raising=False)
+    yield path
+    shutil.rmtree(base, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(sock):
+    thread = threading.Thread(target=serve.serve, args=(sock,), daemon=True)
+    thread.start()
+    for _ in range(200):
+        if serve.ping(sock):
+            break
+        threading.Event().wait(0.01)
+    yield sock
+    serve.stop(sock)
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    runner.invoke(app, ["init", str(tmp_path)])
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_delegate_without_daemon_runs_locally(sock, capsys):
+    assert serve.delegate(["check"]) is None
+    assert capsys.readouterr() == ("", "")
+
+
+def test_commands_are_relayed_to_the_daemon(daemon, project, capsys):
+    assert serve.delegate(["generate"]) == 0
+    out = capsys.readouterr().out
+    assert "Done: 1 written" in out
+    assert (project / "CLAUDE.md").exists()
+
+    assert serve.delegate(["check"]) == 0
+    assert capsys.readouterr().out == "Up to date: 1 outputs checked.\n"
+
+    (project / "CLAUDE.md").unlink()
+    assert serve.delegate(["check"]) == 1
+    captured = capsys.readouterr()
+    assert "  missing   CLAUDE.md" in captured.out
+    assert "Out of date: 1 path(s)" in captured.err
+
+    assert serve.delegate(["which", "src/a.py"]) == 0
+    assert capsys.readouterr().out == "src/a.py\n  CLAUDE.md  (always)\n"
+
+
+def test_daemon_keeps_sources_in_memory_per_root(daemon, project, capsys):
+    source = project / ".agentpack" / "rules" / "CLAUDE.md"
+    os.utime(source, (0, 0))  # sources are only kept once settled
+    serve.delegate(["generate"])
+    assert project in api._caches
+    cached = api._caches[project]
+    first = cached[source][1]
+
+    serve.delegate(["check"])
+    assert api._caches[project][source][1] is first
+    capsys.readouterr()
+
+
+def test_errors_and_usage_are_reported_like_the_cli(daemon, tmp_path, capsys):
+    assert serve.delegate(["check", str(tmp_path / "missing")]) == 1
+    assert "Not initialized" in capsys.readouterr().err
+    assert serve.delegate(["check", "--bogus"]) == 2
+
+
+def test_local_only_invocations_are_not_relayed(daemon, project):
+    assert serve.delegate(["init"]) is None
+    assert serve.delegate(["generate", "--timings"]) is None
+    assert serve.delegate(["check", "--help"]) is None
+
+
+def test_opt_out_and_mismatched_clients_fall_back(daemon, project, monkeypatch):
+    request = {"argv": ["check"], "cwd": str(project), "env": serve._environment()}
+    assert serve.handle({**request, "version": "0.0.0"}) == {
+        "fallback": "version mismatch"
+    }
+    env = {**request["env"], "HOME": "/elsewhere"}
+    assert "fallback" in serve.handle(
+        {**request, "env": env, "version": serve.__version__}
+    )
+    monkeypatch.setenv("AGENTPACK_NO_DAEMON", "1")
+    assert serve.delegate(["check"]) is None
+
+
+def test_serve_command_status_stop_and_single_instance(daemon):
+    result = runner.invoke(app, ["serve", "--status"])
+    assert result.exit_code == 0
+    assert f"on {daemon}: pid " in result.output
+
+    result = runner.invoke(app, ["serve"])
+    assert result.exit_code == 1
+    assert "already listening" in result.output
+
+    result = runner.invoke(app, ["serve", "--stop"])
+    assert result.exit_code == 0
+    for _ in range(200):
+        if not daemon.exists():
+            break
+        threading.Event().wait(0.01)
+    assert not daemon.exists()
+    assert runner.invoke(app, ["serve", "--status"]).exit_code == 1
+
+
+def test_stale_socket_is_replaced(sock):
+    sock.touch()
+    thread = threading.Thread(
+        target=serve.serve, args=(sock,), kwargs={"idle_timeout": 1}, daemon=True
+    )
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert not sock.exists()
+
+
+def test_client_with_another_user_pack_runs_locally(
+    sock, project, tmp_path, monkeypatch
+):
+    # The daemon runs in its own process, so its environment differs from ours.
+    daemon_env = {**os.environ, "AGENTPACK_CONFIG_DIR": str(tmp_path / "daemon")}
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from pathlib import Path; "
+            "from agent_pack import serve; serve.serve(Path(sys.argv[1]))",
+            str(sock),
+        ],
+        env=daemon_env,
+    )
+    try:
+        for _ in range(500):
+            if serve.ping(sock):
+                break
+            threading.Event().wait(0.01)
+        assert serve.ping(sock)
+        user = tmp_path / "user"
+        (user / "rules").mkdir(parents=True)
+        (user / "rules" / "personal.md").write_text("# Personal\n")
+        monkeypatch.setenv("AGENTPACK_CONFIG_DIR", str(user))
+        config = project / ".agentpack" / "agentpack.yaml"
+        config.write_text(config.read_text() + "inherit: true\n")
+
+        assert serve.delegate(["generate"]) is None
+        assert runner.invoke(app, ["generate"]).exit_code == 0
+        assert (project / ".claude" / "rules" / "personal.md").exists()
+    finally:
+        serve.stop(sock)
+        proc.wait(10)
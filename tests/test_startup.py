@@ -0,0 +1,67 @@
+"""Startup-cost regression tests: agentpack runs from git hooks on every commit."""
+
+import os
+import subprocess
+import sys
+
+# Cumulative import time allowed for agent_pack.cli, in milliseconds. Generous
+# enough for slow CI machines; override with AGENTPACK_IMPORT_BUDGET_MS.
+IMPORT_BUDGET_MS = float(os.environ.get("AGENTPACK_IMPORT_BUDGET_MS", "400"))
+
+
+def _python(code, *args):
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_version_does_not_import_cli():
+    proc = _python(
+        "import sys; sys.argv = ['agentpack', '--version']\n"
+        "import agent_pack; agent_pack.main()\n"
+        "mods = ('agent_pack.cli', 'typer', 'yaml')\n"
+        "print(sorted(m for m in mods if m in sys.modules))"
+    )
+    assert proc.stdout.splitlines() == ["agentpack 0.1.0", "[]"]
+
+
+def test_cli_import_defers_heavy_modules():
+    proc = _python(
+        "import sys, agent_pack.cli\n"
+        "heavy = ('yaml', 'concurrent.futures', 'agent_pack.watch',\n"
+        "         'agent_pack.monorepo')\n"
+        "print(sorted(m for m in heavy if m in sys.modules))"
+    )
+    assert proc.stdout.strip() == "[]"
+
+
+def test_cli_import_time_budget():
+    proc = _python("import agent_pack.cli", "-X", "importtime")
+    # The last -X importtime line is the top-level import with its cumulative time.
+    last = proc.stderr.strip().splitlines()[-1]
+    cumulative_us = int(last.split("|")[1])
+    assert "agent_pack.cli" in last
+    assert cumulative_us / 1000 < IMPORT_BUDGET_MS
+
+
+def test_yaml_uses_c_loader_when_available():
+    import yaml
+
+    from agent_pack.artifacts import load_yaml
+
+    assert load_yaml("agents: [claude]\n") == {"agents": ["claude"]}
+    if hasattr(yaml, "CSafeLoader"):
+        proc = _python(
+            "import yaml\n"
+            "calls = []\n"
+            "orig = yaml.CSafeLoader.__init__\n"
+            "def init(self, stream): calls.append(1); orig(self, stream)\n"
+            "yaml.CSafeLoader.__init__ = init\n"
+            "from agent_pack.artifacts import load_yaml\n"
+            "load_yaml('a: 1')\n"
+            "print(len(calls))"
+        )
+        assert proc.stdout.strip() == "1"
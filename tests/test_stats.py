@@ -0,0 +1,120 @@
+"""Tests for `agentpack stats` and the token budget."""
+
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack import api, stats
+from agent_pack.api import AgentpackError
+from agent_pack.cli import app
+from agent_pack.stats import STATS_FILE, estimate_tokens
+
+runner = CliRunner()
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("The quick brown fox.") == 5
+    assert estimate_tokens("internationalization") == 3
+    assert estimate_tokens("version 2026") == 3
+    assert estimate_tokens("日本語") == 3
+
+
+def _project(tmp_path, budget=""):
+    runner.invoke(app, ["init", str(tmp_path)])
+    ap_dir = tmp_path / ".agentpack"
+    (ap_dir / "agentpack.yaml").write_text(f"agents: [claude, cursor]\n{budget}")
+    rules = ap_dir / "rules"
+    (rules / "style.md").write_text("---\ndescription: Style\n---\n" + "word " * 100)
+    (rules / "api.md").write_text(
+        "---\ndescription: API\npaths: ['src/**']\n---\n" + "word " * 300
+    )
+    skill = ap_dir / "skills" / "deploy"
+    skill.mkdir()
+    (skill / "SKILL.md").write_text(
+        "---\nname: deploy\ndescription: Deploy it\n---\n" + "word " * 50
+    )
+    return tmp_path
+
+
+def test_stats_counts_always_loaded_context_per_agent(tmp_path):
+    root = _project(tmp_path)
+
+    result = api.stats(root)
+
+    assert [s.agent for s in result.agents] == ["claude", "cursor"]
+    claude, cursor = result.agents
+    by_path = {o.path: o for o in claude.outputs}
+    assert (
+        by_path[".claude/rules/style.md"].loaded
+        == by_path[".claude/rules/style.md"].tokens
+    )
+    assert by_path[".claude/rules/api.md"].scope == "paths"
+    assert by_path[".claude/rules/api.md"].loaded == 0
+    assert by_path[".claude/rules/api.md"].tokens > 300
+    skill = by_path[".claude/skills/deploy/SKILL.md"]
+    assert (skill.scope, skill.loaded) == (
+        "skill",
+        estimate_tokens("deploy: Deploy it"),
+    )
+    assert claude.always == sum(o.loaded for o in claude.outputs)
+    # Cursor reads CLAUDE.md and Claude's skills when both agents are configured.
+    assert [o.path for o in cursor.outputs] == [
+        "CLAUDE.md",
+        ".cursor/rules/api.md",
+        ".cursor/rules/style.md",
+        ".claude/skills/deploy/SKILL.md",
+    ]
+    assert cursor.always == claude.always
+    assert result.ok
+
+
+def test_stats_are_cached_per_source_hash(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    first = api.stats(root)
+    cache = root / ".agentpack" / STATS_FILE
+    assert len(json.loads(cache.read_text())["sources"]) == 4
+
+    calls = []
+    measure = stats._measure
+    monkeypatch.setattr(stats, "_measure", lambda a: calls.append(a) or measure(a))
+    assert api.stats(root).agents == first.agents
+    assert calls == []
+
+    (root / ".agentpack" / "rules" / "style.md").write_text("# Short\n")
+    api.stats(root)
+    assert [a.name for a in calls] == ["style.md"]
+    assert len(json.loads(cache.read_text())["sources"]) == 4
+
+
+def test_stats_command_fails_over_budget(tmp_path):
+    root = _project(tmp_path, "budget:\n  always: 150\n  output: 250\n")
+
+    result = runner.invoke(app, ["stats", str(root)])
+
+    assert result.exit_code == 1
+    assert (
+        "claude: " in result.output and " of 150 tokens always loaded" in result.output
+    )
+    assert "Over budget: claude:" in result.output
+    assert result.output.count(".claude/rules/api.md has") == 1
+
+
+def test_stats_command_json_within_budget(tmp_path):
+    root = _project(tmp_path, "budget: 100000\n")
+
+    result = runner.invoke(app, ["stats", "--json", str(root)])
+
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert data["budget"] == {"always": 100000}
+    assert data["over"] == []
+    assert data["agents"]["claude"]["always"] > 0
+
+
+@pytest.mark.parametrize("budget", ["budget: -1\n", "budget: {files: 3}\n"])
+def test_stats_rejects_invalid_budget(tmp_path, budget):
+    root = _project(tmp_path, budget)
+    with pytest.raises(AgentpackError, match="Invalid budget"):
+        api.stats(root)
@@ -0,0 +1,505 @@
+"""Tests for `agentpack sync` against local bare repositories."""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from typer.testing import CliRunner
+
+from agent_pack.cli import app
+from agent_pack.remotes import (
+    Remote,
+    cache_lock,
+    checkout_dir,
+    fetch,
+    fetch_all,
+    repo_dir,
+)
+
+runner = CliRunner()
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("AGENTPACK_CACHE_DIR", str(cache))
+    for key, value in GIT_ENV.items():
+        monkeypatch.setenv(key, value)
+    return cache
+
+
+def _git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _make_remote(tmp_path, name, files):
+    """Create a bare repo holding ``files`` and return its file:// URL."""
+    bare = tmp_path / "remotes" / f"{name}.git"
+    work = tmp_path / "work" / name
+    _git("init", "-q", "--bare", str(bare))
+    _git("clone", "-q", str(bare), str(work))
+    _commit(work, files)
+    return f"file://{bare}"
+
+
+def _commit(work, files):
+    for rel, content in files.items():
+        f = work / rel
+        if content is None:
+            f.unlink()
+            continue
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(content)
+    _git("add", "-A", cwd=work)
+    _git("commit", "-q", "-m", "update", cwd=work)
+    _git("push", "-q", "origin", "HEAD", cwd=work)
+
+
+def _init(tmp_path, remotes):
+    project = tmp_path / "project"
+    project.mkdir(parents=True)
+    runner.invoke(app, ["init", str(project)])
+    config = project / ".agentpack" / "agentpack.yaml"
+    lines = ["agents: [claude]", "remotes:"]
+    lines += [f"  {name}: {url}" for name, url in remotes.items()]
+    config.write_text("\n".join(lines) + "\n")
+    return project
+
+
+def _sync(project, *args):
+    return runner.invoke(app, ["sync", "--path", str(project), *args])
+
+
+def test_sync_clones_and_merges_rules_and_skills(tmp_path, cache_dir):
+    url = _make_remote(
+        tmp_path,
+        "community",
+        {
+            ".agentpack/rules/style.md": "# Style\n",
+            ".agentpack/skills/deploy/SKILL.md": "---\nname: deploy\n---\n",
+            ".agentpack/skills/deploy/scripts/run.sh": "echo hi\n",
+            ".agentpack/agentpack.yaml": "agents: [cursor]\n",
+        },
+    )
+    project = _init(tmp_path, {"community": url})
+
+    result = _sync(project)
+
+    assert result.exit_code == 0, result.output
+    ap = project / ".agentpack"
+    assert (ap / "rules" / "style.md").read_text() == "# Style\n"
+    assert (ap / "skills" / "deploy" / "scripts" / "run.sh").exists()
+    assert "agents: [claude]" in (ap / "agentpack.yaml").read_text()
+    assert (repo_dir(url) / "HEAD").exists()
+    assert "added rules/style.md" in result.output
+
+
+def test_sync_reads_pack_from_repo_root(tmp_path):
+    url = _make_remote(tmp_path, "flat", {"rules/flat.md": "# Flat\n"})
+    project = _init(tmp_path, {"flat": url})
+    assert _sync(project).exit_code == 0
+    assert (project / ".agentpack" / "rules" / "flat.md").exists()
+
+
+def test_sync_pulls_updates_and_removals(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n", "rules/b.md": "# B\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+
+    _commit(tmp_path / "work" / "org", {"rules/a.md": "# A v2\n", "rules/b.md": None})
+    result = _sync(project)
+
+    rules = project / ".agentpack" / "rules"
+    assert result.exit_code == 0, result.output
+    assert (rules / "a.md").read_text() == "# A v2\n"
+    assert not (rules / "b.md").exists()
+    assert "updated rules/a.md" in result.output
+    assert "removed rules/b.md" in result.output
+
+
+def test_local_rules_override_remote_rules(tmp_path):
+    url = _make_remote(
+        tmp_path,
+        "org",
+        {"rules/CLAUDE.md": "# Remote main\n", "rules/shared.md": "# Shared\n"},
+    )
+    project = _init(tmp_path, {"org": url})
+    main = project / ".agentpack" / "rules" / "CLAUDE.md"
+    local = main.read_text()
+
+    result = _sync(project)
+
+    assert main.read_text() == local
+    assert "kept rules/CLAUDE.md (local override)" in result.output
+    assert (project / ".agentpack" / "rules" / "shared.md").exists()
+
+
+def test_locally_edited_synced_rule_is_kept(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/shared.md": "# Shared\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+    shared = project / ".agentpack" / "rules" / "shared.md"
+    shared.write_text("# Mine\n")
+
+    _commit(tmp_path / "work" / "org", {"rules/shared.md": "# Shared v2\n"})
+    _sync(project)
+    assert shared.read_text() == "# Mine\n"
+
+    _commit(tmp_path / "work" / "org", {"rules/shared.md": None})
+    _sync(project)
+    assert shared.read_text() == "# Mine\n"
+
+
+def test_first_remote_wins_between_remotes(tmp_path):
+    first = _make_remote(tmp_path, "first", {"rules/x.md": "# First\n"})
+    second = _make_remote(tmp_path, "second", {"rules/x.md": "# Second\n"})
+    project = _init(tmp_path, {"first": first, "second": second})
+
+    assert _sync(project).exit_code == 0
+    assert _sync(project).exit_code == 0
+    assert (project / ".agentpack" / "rules" / "x.md").read_text() == "# First\n"
+
+
+def test_sync_named_remote_and_url(tmp_path, cache_dir):
+    one = _make_remote(tmp_path, "one", {"rules/one.md": "# One\n"})
+    two = _make_remote(tmp_path, "two", {"rules/two.md": "# Two\n"})
+    project = _init(tmp_path, {"one": one})
+    rules = project / ".agentpack" / "rules"
+
+    assert _sync(project, "one").exit_code == 0
+    assert (rules / "one.md").exists()
+
+    assert _sync(project, two).exit_code == 0
+    assert (rules / "two.md").exists()
+    assert any(d.name.startswith("two-") for d in (cache_dir / "remotes").iterdir())
+
+
+def test_sync_unknown_remote(tmp_path):
+    project = _init(tmp_path, {})
+    result = _sync(project, "nope")
+    assert result.exit_code == 1
+    assert "Unknown remote: nope" in result.output
+
+
+def test_sync_not_initialized(tmp_path):
+    result = _sync(tmp_path)
+    assert result.exit_code == 1
+    assert "Not initialized" in result.output
+
+
+def test_failed_remote_does_not_block_others(tmp_path):
+    good = _make_remote(tmp_path, "good", {"rules/good.md": "# Good\n"})
+    missing = f"file://{tmp_path / 'missing.git'}"
+    project = _init(tmp_path, {"bad": missing, "good": good})
+
+    result = _sync(project)
+
+    assert result.exit_code == 1
+    assert "bad: FAILED" in result.output
+    assert (project / ".agentpack" / "rules" / "good.md").exists()
+    assert "Done: 1 synced, 1 failed." in result.output
+
+
+def test_fetch_times_out(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIT_ALLOW_PROTOCOL", "file:ext")
+    url = _make_remote(tmp_path, "slow", {"rules/a.md": "# A\n"})
+    hook = tmp_path / "slow-git"
+    hook.write_text('#!/bin/sh\nsleep 30\nexec git "$@"\n')
+    hook.chmod(0o755)
+    result = fetch(
+        Remote("slow", url.replace("file://", f"ext::{hook} %s ")), timeout=0.5
+    )
+    assert not result.ok
+    assert "timed out" in result.error
+    assert not repo_dir(result.remote.url).with_suffix(".checkouts").exists()
+
+
+def test_fetch_all_preserves_order(tmp_path):
+    remotes = [
+        Remote(n, _make_remote(tmp_path, n, {f"rules/{n}.md": "x\n"}))
+        for n in ("a", "b", "c")
+    ]
+    results = fetch_all(remotes, jobs=3, timeout=60)
+    assert [r.remote.name for r in results] == ["a", "b", "c"]
+    assert all(r.ok and len(r.revision) == 40 for r in results)
+    assert os.path.exists(results[0].path / ".git")
+
+
+def test_unchanged_remote_is_skipped_without_fetching(tmp_path, cache_dir):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+    state = json.loads((project / ".agentpack" / ".sync.json").read_text())
+    assert len(state["remotes"]["org"]["revision"]) == 40
+
+    # Without a cache the remote could only be merged again by cloning it.
+    shutil.rmtree(cache_dir)
+    result = _sync(project)
+
+    assert result.exit_code == 0, result.output
+    assert "(up to date)" in result.output
+    assert not cache_dir.exists()
+
+
+def test_upstream_change_is_fetched(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+
+    _commit(tmp_path / "work" / "org", {"rules/a.md": "# A v2\n"})
+    result = _sync(project)
+
+    assert "(up to date)" not in result.output
+    assert (project / ".agentpack" / "rules" / "a.md").read_text() == "# A v2\n"
+
+
+def test_deleted_merged_file_forces_merge(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+    merged = project / ".agentpack" / "rules" / "a.md"
+    merged.unlink()
+
+    result = _sync(project)
+
+    assert "(up to date)" not in result.output
+    assert merged.read_text() == "# A\n"
+
+
+def test_removed_local_override_forces_merge(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# Remote\n"})
+    project = _init(tmp_path, {"org": url})
+    local = project / ".agentpack" / "rules" / "a.md"
+    local.write_text("# Local\n")
+    _sync(project)
+    assert local.read_text() == "# Local\n"
+
+    local.unlink()
+    _sync(project)
+    assert local.read_text() == "# Remote\n"
+
+
+def _make_monorepo(tmp_path):
+    """A bare repo allowing partial clones, with the pack under teams/shared/."""
+    url = _make_remote(
+        tmp_path,
+        "mono",
+        {
+            "teams/shared/.agentpack/rules/shared.md": "# Shared v1\n",
+            "services/api/blob.bin": "x" * 100_000,
+            "README.md": "# Mono\n",
+        },
+    )
+    _git("config", "uploadpack.allowFilter", "true", cwd=url.removeprefix("file://"))
+    work = tmp_path / "work" / "mono"
+    _git("tag", "-a", "v1", "-m", "v1", cwd=work)
+    _git("push", "-q", "origin", "v1", cwd=work)
+    _commit(work, {"teams/shared/.agentpack/rules/shared.md": "# Shared v2\n"})
+    return url
+
+
+def _config_remote(project, **entry):
+    config = project / ".agentpack" / "agentpack.yaml"
+    lines = ["agents: [claude]", "remotes:", "  mono:"]
+    lines += [f"    {key}: {value}" for key, value in entry.items()]
+    config.write_text("\n".join(lines) + "\n")
+
+
+def test_subdirectory_remote_uses_sparse_partial_clone(tmp_path, cache_dir):
+    url = _make_monorepo(tmp_path)
+    project = _init(tmp_path, {})
+    _config_remote(project, url=url, path="teams/shared")
+
+    result = _sync(project)
+
+    assert result.exit_code == 0, result.output
+    shared = project / ".agentpack" / "rules" / "shared.md"
+    assert shared.read_text() == "# Shared v2\n"
+    (checkout,) = repo_dir(url).with_suffix(".checkouts").iterdir()
+    assert not (checkout / "services").exists()
+    missing = subprocess.run(
+        ["git", "rev-list", "--objects", "--missing=print", "HEAD"],
+        cwd=checkout,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert any(line.startswith("?") for line in missing.splitlines())
+
+
+def test_remote_ref_pins_revision(tmp_path):
+    url = _make_monorepo(tmp_path)
+    project = _init(tmp_path, {})
+    _config_remote(project, url=url, path="teams/shared", ref="v1")
+
+    assert _sync(project).exit_code == 0
+    shared = project / ".agentpack" / "rules" / "shared.md"
+    assert shared.read_text() == "# Shared v1\n"
+    assert "(up to date)" in _sync(project).output
+
+    _config_remote(project, url=url, path="teams/shared")
+    result = _sync(project)
+    assert "(up to date)" not in result.output
+    assert shared.read_text() == "# Shared v2\n"
+
+
+def test_missing_remote_path_fails_without_removing_files(tmp_path):
+    url = _make_monorepo(tmp_path)
+    project = _init(tmp_path, {})
+    _config_remote(project, url=url, path="teams/shared")
+    _sync(project)
+
+    _config_remote(project, url=url, path="teams/gone")
+    result = _sync(project)
+
+    assert result.exit_code == 1
+    assert "path not found: teams/gone" in result.output
+    assert (project / ".agentpack" / "rules" / "shared.md").exists()
+
+
+def test_remote_entry_without_url_is_rejected(tmp_path):
+    project = _init(tmp_path, {})
+    _config_remote(project, path="teams/shared")
+    result = _sync(project)
+    assert result.exit_code == 1
+    assert "remote 'mono' has no url" in result.output
+
+
+def _revision(tmp_path, name, ref="HEAD"):
+    return subprocess.run(
+        ["git", "rev-parse", f"{ref}^{{commit}}"],
+        cwd=tmp_path / "work" / name,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+def test_projects_share_one_repository_per_url(tmp_path, cache_dir):
+    url = _make_monorepo(tmp_path)
+    first = _init(tmp_path / "a", {})
+    second = _init(tmp_path / "b", {})
+    _config_remote(first, url=url, path="teams/shared", ref="v1")
+    _config_remote(second, url=url, path="teams/shared")
+
+    assert _sync(first).exit_code == 0
+    assert _sync(second).exit_code == 0
+
+    assert [d.name for d in (cache_dir / "remotes").glob("*.git")] == [
+        repo_dir(url).name
+    ]
+    checkouts = repo_dir(url).with_suffix(".checkouts")
+    assert sorted(d.name for d in checkouts.iterdir()) == sorted(
+        checkout_dir(url, _revision(tmp_path, "mono", ref), "teams/shared").name
+        for ref in ("v1", "HEAD")
+    )
+    shared = ".agentpack/rules/shared.md"
+    assert (first / shared).read_text() == "# Shared v1\n"
+    assert (second / shared).read_text() == "# Shared v2\n"
+
+
+def test_pinned_commit_reuses_checkout_without_network(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    sha = _revision(tmp_path, "org")
+    first = _init(tmp_path / "a", {})
+    second = _init(tmp_path / "b", {})
+    for project in (first, second):
+        config = project / ".agentpack" / "agentpack.yaml"
+        config.write_text(
+            f"agents: [claude]\nremotes:\n  org:\n    url: {url}\n    ref: {sha}\n"
+        )
+
+    assert _sync(first).exit_code == 0
+    bare = tmp_path / "remotes" / "org.git"
+    bare.rename(bare.with_name("moved.git"))
+    result = _sync(second)
+
+    assert result.exit_code == 0, result.output
+    assert (second / ".agentpack" / "rules" / "a.md").exists()
+
+
+def test_fetch_waits_for_cache_lock(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    with cache_lock(repo_dir(url), 1):
+        result = fetch(Remote("org", url), timeout=0.3)
+    assert not result.ok
+    assert "cache lock" in result.error
+    assert fetch(Remote("org", url), timeout=60).ok
+
+
+def test_concurrent_fetches_of_one_url(tmp_path):
+    url = _make_monorepo(tmp_path)
+    remotes = [
+        Remote("pinned", url, "teams/shared", "v1"),
+        Remote("head", url, "teams/shared"),
+        Remote("root", url),
+    ]
+    results = fetch_all(remotes, jobs=3, timeout=60)
+    assert all(r.ok for r in results), [r.error for r in results]
+    assert len({r.path for r in results}) == 3
+    assert (results[2].path / "services" / "api" / "blob.bin").exists()
+
+
+def test_unused_checkouts_are_pruned(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/a.md": "# A\n"})
+    old = fetch(Remote("org", url), timeout=60).path
+    os.utime(old, (0, 0))
+    _commit(tmp_path / "work" / "org", {"rules/a.md": "# A v2\n"})
+
+    new = fetch(Remote("org", url), timeout=60).path
+
+    assert new.exists() and not old.exists()
+    worktrees = subprocess.run(
+        ["git", "worktree", "list"],
+        cwd=repo_dir(url),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert str(old) not in worktrees
+
+
+def test_inherited_remotes_are_layered_instead_of_merged(tmp_path):
+    url = _make_remote(tmp_path, "org", {"rules/org.md": "# Org\n"})
+    project = _init(tmp_path, {"org": url})
+    _sync(project)
+    merged = project / ".agentpack" / "rules" / "org.md"
+    assert merged.exists()
+
+    config = project / ".agentpack" / "agentpack.yaml"
+    config.write_text(config.read_text() + "inherit: true\n")
+    result = _sync(project)
+
+    assert "(inherited)" in result.output
+    assert "removed rules/org.md" in result.output
+    assert not merged.exists()
+    runner.invoke(app, ["generate", str(project)])
+    out = project / ".claude" / "rules" / "org.md"
+    assert "Source: remote:org/rules/org.md" in out.read_text()
+    assert "(up to date)" in _sync(project).output
+
+
+def test_inherited_remote_missing_from_cache(tmp_path, cache_dir):
+    url = _make_remote(tmp_path, "org", {"rules/org.md": "# Org\n"})
+    project = _init(tmp_path, {"org": url})
+    config = project / ".agentpack" / "agentpack.yaml"
+    config.write_text(config.read_text() + "inherit: true\n")
+    _sync(project)
+    shutil.rmtree(cache_dir)
+
+    result = runner.invoke(app, ["generate", str(project)])
+    assert "WARN: remote 'org' is not in the cache" in result.output
+
+    result = _sync(project)
+    assert "(up to date)" not in result.output
+    runner.invoke(app, ["generate", str(project)])
+    assert (project / ".claude" / "rules" / "org.md").exists()
@@ -0,0 +1,91 @@
+"""Tests for phase timings and trace profiles."""
+
+import json
+import threading
+
+from typer.testing import CliRunner
+
+from agent_pack.cli import app
+from agent_pack.timings import record_read, record_written, span, tracing
+
+runner = CliRunner()
+
+
+def test_instrumentation_is_a_no_op_without_tracer():
+    with span("idle"):
+        record_read(10)
+        record_written(10)
+
+
+def test_io_is_attributed_to_the_innermost_span():
+    with tracing() as tracer:
+        with span("outer"):
+            record_read(100)
+            with span("inner"):
+                record_written(7)
+                record_written(3)
+
+    assert tracer.phases["outer"].files_read == 1
+    assert tracer.phases["outer"].bytes_read == 100
+    assert tracer.phases["outer"].files_written == 0
+    assert tracer.phases["inner"].files_written == 2
+    assert tracer.phases["inner"].bytes_written == 10
+
+
+def test_worker_threads_count_towards_the_main_span():
+    with tracing() as tracer:
+        with span("pool"):
+            worker = threading.Thread(target=record_read, args=(5,))
+            worker.start()
+            worker.join()
+
+    assert tracer.phases["pool"].bytes_read == 5
+
+
+def _project(tmp_path):
+    runner.invoke(app, ["init", str(tmp_path)])
+    skill = tmp_path / ".agentpack" / "skills" / "deploy"
+    (skill / "scripts").mkdir(parents=True)
+    (skill / "SKILL.md").write_text("---\nname: deploy\n---\n\n# Deploy\n")
+    (skill / "scripts" / "run.sh").write_text("echo deploy\n")
+    return tmp_path
+
+
+def test_generate_timings_lists_phases(tmp_path):
+    root = _project(tmp_path)
+
+    result = runner.invoke(app, ["generate", str(root), "--timings"])
+
+    assert result.exit_code == 0, result.output
+    lines = result.output.split("Timings:\n")[1].splitlines()
+    phases = {line.split()[0] + " " + line.split()[1] for line in lines[1:]}
+    assert {"load config", "copy supplementary", "update gitignore"} <= phases
+    copy = next(line for line in lines if line.split()[0] == "copy")
+    assert "1 (12 B)" in copy
+
+
+def test_generate_profile_writes_chrome_trace(tmp_path):
+    root = _project(tmp_path)
+    out = tmp_path / "trace.json"
+
+    result = runner.invoke(app, ["generate", str(root), "--profile", str(out)])
+
+    assert result.exit_code == 0, result.output
+    trace = json.loads(out.read_text())
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in spans} >= {
+        "generate",
+        "load config",
+        "cleanup",
+        "plan claude",
+        "plan cursor",
+        "update gitignore",
+    }
+    for event in spans:
+        assert event["dur"] >= 0 and "tid" in event and "bytes_read" in event["args"]
+    assert "Timings:" not in result.output
+
+
+def test_timings_need_a_single_root(tmp_path):
+    result = runner.invoke(app, ["generate", str(tmp_path), "-r", "--timings"])
+    assert result.exit_code == 1
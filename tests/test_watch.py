@@ -0,0 +1,146 @@
+"""Tests for source watchers used by `agentpack watch`."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from agent_pack import api
+from agent_pack.watch import InotifyWatcher, PollingWatcher, watch
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+
+def _make_pack(tmp_path):
+    ap_dir = tmp_path / ".agentpack"
+    (ap_dir / "rules").mkdir(parents=True)
+    (ap_dir / "skills").mkdir()
+    (ap_dir / "agentpack.yaml").write_text("agents: [claude]\ngitignore: false\n")
+    (ap_dir / "rules" / "coding.md").write_text("---\ndescription: Coding\n---\n")
+    return ap_dir
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_polling_watcher_detects_rule_edit(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = PollingWatcher(ap_dir, interval=0.01)
+    assert not watcher.wait(0.05)
+    (ap_dir / "rules" / "coding.md").write_text("changed, and longer than before")
+    assert watcher.wait(1.0)
+
+
+def test_polling_watcher_ignores_state_file(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = PollingWatcher(ap_dir, interval=0.01)
+    (ap_dir / ".state.json").write_text("{}")
+    assert not watcher.wait(0.1)
+
+
+@linux_only
+def test_inotify_watcher_detects_config_and_ignores_state_file(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = InotifyWatcher(ap_dir)
+    try:
+        (ap_dir / ".state.json").write_text("{}")
+        assert not watcher.wait(0.1)
+        (ap_dir / "agentpack.yaml").write_text("agents: [cursor]\n")
+        assert watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+
+@linux_only
+def test_inotify_watcher_follows_new_skill_dirs(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = InotifyWatcher(ap_dir)
+    try:
+        skill_dir = ap_dir / "skills" / "deploy"
+        skill_dir.mkdir()
+        assert watcher.wait(1.0)
+        while watcher.wait(0.05):
+            pass
+        (skill_dir / "SKILL.md").write_text("---\nname: deploy\n---\n")
+        assert watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+
+@linux_only
+def test_inotify_watcher_accepts_undecodable_names(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = InotifyWatcher(ap_dir)
+    try:
+        with open(os.fsencode(ap_dir / "rules") + b"/\xff.md", "w"):
+            pass
+        assert watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+
+def test_watch_debounces_bursts(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    watcher = PollingWatcher(ap_dir, interval=0.01)
+    calls = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch, args=(watcher, lambda: calls.append(1), 0.2, stop, 0.05)
+    )
+    thread.start()
+    try:
+        for i in range(5):
+            (ap_dir / "rules" / f"r{i}.md").write_text("x" * i)
+            time.sleep(0.02)
+        assert _wait_for(lambda: calls)
+        time.sleep(0.3)
+        assert calls == [1]
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_watch_regenerates_changed_rule(tmp_path):
+    ap_dir = _make_pack(tmp_path)
+    out = tmp_path / ".claude" / "rules" / "coding.md"
+    passes = []
+    started = threading.Event()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=api.watch,
+        args=(tmp_path, passes.append),
+        kwargs={
+            "jobs": 1,
+            "debounce": 0.05,
+            "poll": True,
+            "interval": 0.01,
+            "on_start": lambda name: started.set(),
+            "stop": stop,
+        },
+    )
+    thread.start()
+    try:
+        assert started.wait(5)
+        assert out.exists()
+        (ap_dir / "rules" / "coding.md").write_text(
+            "---\ndescription: Coding\n---\n\n# Updated\n"
+        )
+        assert _wait_for(lambda: len(passes) == 2)
+        assert "# Updated" in out.read_text()
+        assert passes[-1].written == [".claude/rules/coding.md"]
+
+        (ap_dir / "agentpack.yaml").write_text("agents: []\n")
+        assert _wait_for(lambda: isinstance(passes[-1], api.AgentpackError))
+    finally:
+        stop.set()
+        thread.join()